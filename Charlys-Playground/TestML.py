@@ -1,103 +1,97 @@
-
-import pandas as pd
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+import os
+import sys
+from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 from sklearn.neighbors import NearestNeighbors
 import matplotlib.pyplot as plt
 
-# 1️⃣ Datensatz einlesen
-csv_path = "../steam-200k.csv" 
-cols = ["user_id", "game", "action", "hours", "extra"]
-df = pd.read_csv(csv_path, header=None, names=cols)
- 
-# =======================
-# 2️⃣ 'extra'-Spalte entfernen (nur Nullen)
-# =======================
-df = df.drop(columns=["extra"])
-
-# =======================
-# 3️⃣ Stunden bereinigen
-# =======================
-# 'action' = 'play' → echte Stunden aus 'hours'
-# 'purchase' → 0 Stunden
-df["hours_clean"] = df.apply(lambda row: row["hours"] if row["action"] == "play" else 0, axis=1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import Segment, open_interactions, open_titles
 
-# =======================
-# 4️⃣ Spielnamen numerisch kodieren
-# =======================
-le_game = LabelEncoder()
-df["game_encoded"] = le_game.fit_transform(df["game"])
+# 1️⃣ Datensatz einlesen
+# (Binär-Cache, die 'extra'-Spalte mit nur Nullen wird gar nicht erst geladen)
+csv_path = "../steam-200k.csv"
+titles = open_titles(csv_path)
 
 # =======================
-# 5️⃣ Spieler x Spiel Matrix erstellen
+# 2️⃣ Spieler x Spiel Matrix (dünnbesetzt, einmal gebaut und gespeichert)
 # =======================
-# Zeilen = Spieler, Spalten = Spiele, Werte = Stunden
-player_game_matrix = df.pivot_table(index="user_id",
-                                    columns="game_encoded",
-                                    values="hours_clean",
-                                    fill_value=0)
+# Zeilen = Spieler, Spalten = Spiele (game_id aus dem Titel-Wörterbuch), Werte = Stunden
+# 'play' → echte Stunden, nur 'purchase' → 0 Stunden (steht gar nicht in der Matrix)
+inter = open_interactions(csv_path, titles=titles)
+player_game_matrix = inter.to_scipy("csr", values="hours")
 
 # =======================
-# 6️⃣ Optional: Stunden standardisieren
+# 3️⃣ Optional: Stunden standardisieren
 # =======================
-scaler = StandardScaler()
-player_game_matrix_scaled = pd.DataFrame(scaler.fit_transform(player_game_matrix),
-                                         index=player_game_matrix.index,
-                                         columns=player_game_matrix.columns)
+# ohne Zentrieren, damit die Matrix dünnbesetzt bleibt
+scaler = StandardScaler(with_mean=False)
+player_game_matrix_scaled = scaler.fit_transform(player_game_matrix)
 
 # =======================
-# 7️⃣ KNN auf Spieler anwenden
+# 4️⃣ KNN auf Spieler anwenden
 # =======================
 knn = NearestNeighbors(n_neighbors=5, metric='cosine')  # Cosine similarity für ähnliches Spielverhalten
 knn.fit(player_game_matrix_scaled)
 
 # =======================
-# 8️⃣ Funktion: Empfehlungen für einen Spieler
+# 5️⃣ Funktion: Empfehlungen für einen Spieler
 # =======================
 def recommend_games(player_id, top_k_neighbors=5):
-    distances, indices = knn.kneighbors([player_game_matrix_scaled.loc[player_id]])
-    similar_players = player_game_matrix_scaled.index[indices.flatten()[1:]]  # erste ist Spieler selbst
+    i = int(inter.user_index(player_id))
+    distances, indices = knn.kneighbors(player_game_matrix_scaled[i])
+    similar_players = indices.flatten()[1:]  # erste ist Spieler selbst
 
     # Spiele der Nachbarn, die der Spieler noch nicht gespielt hat
-    player_games = player_game_matrix.loc[player_id] > 0
+    row = inter.user_row(i)
+    player_games = set(row["game"][row["hours"] > 0])
     recommended_games = set()
     for neighbor in similar_players:
-        neighbor_games = player_game_matrix.loc[neighbor] > 0
-        recs = neighbor_games.index[neighbor_games & ~player_games]
-        recommended_games.update(recs)
+        row = inter.user_row(neighbor)
+        neighbor_games = set(row["game"][row["hours"] > 0])
+        recommended_games.update(neighbor_games - player_games)
 
     # In Spielnamen zurückwandeln
-    recommended_game_names = le_game.inverse_transform(list(recommended_games))
+    recommended_game_names = inter.game_titles(sorted(recommended_games))
     return recommended_game_names
 
 # =======================
-# 9️⃣ Beispiel: Empfehlungen für Spieler 1
+# 6️⃣ Beispiel: Empfehlungen für Spieler 1
 # =======================
-player_id = player_game_matrix.index[0]  # z.B. erster Spieler
+player_id = inter.user_ids[0]  # z.B. erster Spieler
 print("Empfohlene Spiele für Spieler", player_id, ":", recommend_games(player_id))
 
 X = player_game_matrix_scaled  # skaliert
 
 # =======================
-# 2️⃣ K-Means Clustering
+# 7️⃣ K-Means Clustering
 # =======================
 kmeans = KMeans(n_clusters=3, random_state=42)  # 3 Gruppen, kann angepasst werden
 clusters = kmeans.fit_predict(X)
-player_game_matrix_scaled["Cluster"] = clusters
 
 # =======================
-# 3️⃣ Visualisierung: Spielstunden vs Spielname (erste 2 Dimensionen)
+# 8️⃣ Visualisierung: Spielstunden vs Spielname (erste 2 Dimensionen)
 # =======================
 plt.figure(figsize=(10,6))
 
-# PCA kann helfen, Dimensionen auf 2D zu reduzieren
-from sklearn.decomposition import PCA
-pca = PCA(n_components=2)
-X_pca = pca.fit_transform(X.drop(columns="Cluster"))
+# TruncatedSVD statt PCA: reduziert auf 2D, ohne die Matrix zu verdichten
+from sklearn.decomposition import TruncatedSVD
+svd = TruncatedSVD(n_components=2, random_state=42)
+X_pca = svd.fit_transform(X)
 
 plt.scatter(X_pca[:,0], X_pca[:,1], c=clusters, cmap="viridis", alpha=0.7)
-plt.xlabel("PCA-Komponente 1")
-plt.ylabel("PCA-Komponente 2")
+plt.xlabel("SVD-Komponente 1")
+plt.ylabel("SVD-Komponente 2")
 plt.title("Spielergruppen nach Spielverhalten (K-Means Clustering)")
 plt.colorbar(label="Cluster")
-plt.show()
\ No newline at end of file
+plt.show()
+
+# =======================
+# 9️⃣ Cluster als Nutzer-Segmente (Bitmaps über inter.user_ids)
+# =======================
+# Kennzahlen pro Spiel nur für die Spieler eines Clusters, ohne die Matrix zu filtern
+cluster_segments = Segment.from_labels(clusters, inter.user_ids)
+for label, segment in cluster_segments.items():
+    players = inter.players_per_game(segment)
+    top5 = players.argsort()[::-1][:5]
+    print(f"Cluster {label} ({len(segment)} Spieler):", list(inter.game_titles(top5)))
@@ -1,23 +1,26 @@
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import load_facts
+
 # -----------------------------
 # 1) Datei laden
 # -----------------------------
 csv_path = "../steam-200k.csv" 
-cols = ["user_id", "game", "action", "hours", "extra"]
-df = pd.read_csv(csv_path, header=None, names=cols)
 
 # -----------------------------
-# 2) Nur Spielzeit-Daten verwenden
+# 2) Nur gespielte (Spieler, Spiel)-Paare, schon dedupliziert (Faktentabelle)
 # -----------------------------
-df_play = df[df["action"] == "play"].copy()
+df_play = load_facts(csv_path, behavior="play", columns=["user_id", "game"])
 
 # -----------------------------
 # 3) Anzahl Spieler pro Spiel berechnen
 # -----------------------------
 # Hier zählt jeder Spieler einmal pro Spiel (einzigartige user_id)
-players_per_game = df_play.groupby("game")["user_id"].nunique().sort_values(ascending=False)
+players_per_game = df_play.groupby("game", observed=True)["user_id"].nunique().sort_values(ascending=False)
 
 # -----------------------------
 # 4) Top 20 meistgespielte Spiele auswählen
@@ -15,43 +15,38 @@ und die das Spiel nur "Testen" (<=3h)
 Wichtig: Wir gehen davon aus, dass unsere Daten die Allgemeinheit wiederspiegeln
 """
 
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import ThresholdIndex, load_clean, top_rows
+
 # ------------------------------------------------------------
 # 1) Daten laden
 # ------------------------------------------------------------
 csv_path = "../steam-200k.csv"
-cols = ["user_id", "game", "action", "hours", "extra"]
-df = pd.read_csv(csv_path, header=None, names=cols)
 
 # ------------------------------------------------------------
-# 2) Vorbereiten / Filtern (nur "play"-Einträge, Stunden als float)
+# 2) Vorbereiten (eine Zeile pro Spieler und Spiel)
 # ------------------------------------------------------------
-df = df[df["action"] == "play"].copy()
-df["hours"] = pd.to_numeric(df["hours"], errors="coerce")
-df = df.dropna(subset=["hours"])
+# deduplizierte Faktentabelle (max. Stunden, fehlende Stunden schon entfernt),
+# damit "total" wirklich Spieler zählt und nicht doppelte play-Zeilen
+df = load_clean(csv_path)
 
-# Bucket bilden: <=3h vs. >3h
-df["time_bucket"] = np.where(df["hours"] > 3, ">3h", "<=3h")
+# Stunden pro Spiel einmal sortieren; Schwellen sind danach nur noch searchsorted
+grenze = 3
+counts = ThresholdIndex(df, "game", "hours").counts([grenze])
 
 # ------------------------------------------------------------
-# 3) Absolute Häufigkeiten je Spiel und Bucket aggregieren
+# 3) Absolute Häufigkeiten je Spiel: >3h vs. <=3h
 # ------------------------------------------------------------
-abs_counts = (
-    df.groupby(["game", "time_bucket"])
-    .size()
-    .unstack(fill_value=0)
-    # .sort_values(by=[">3h", "<=3h"], ascending=False)
+abs_counts = pd.DataFrame(
+    {">3h": counts[grenze], "<=3h": counts["total"] - counts[grenze]}
 )
 
-# Sicherstellen, dass beide Spalten existieren
-for col in [">3h", "<=3h"]:
-    if col not in abs_counts.columns:
-        abs_counts[col] = 0
-abs_counts = abs_counts[[">3h", "<=3h"]]
-
 # Summe pro Spiel (wie viele Einträge insgesamt)
 abs_counts["total"] = abs_counts.sum(axis=1)
 
@@ -68,8 +63,9 @@ rel_freq["<=3h"] = rel_freq["<=3h"] / rel_freq["total"]
 # ------------------------------------------------------------
 # 5) Top 30 / 20 Spiele mit den meisten Spieler-Daten auswählen
 # ------------------------------------------------------------
-top30_games = rel_freq.sort_values(by="total", ascending=False).head(30)
-top20_games = rel_freq.sort_values(by="total", ascending=False).head(20)
+# (Teilauswahl statt den ganzen Katalog zu sortieren)
+top30_games = top_rows(rel_freq, "total", 30)
+top20_games = top30_games.head(20)
 
 print(top30_games)
 print(top20_games)
@@ -3,39 +3,37 @@
 Annahme: Erfolg wird berechnet durch: Anzahl Spieler * Anzahl Bleiber
 """
 
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import ThresholdIndex, load_clean, top_rows
+
 # -----------------------------
 # 1) Datei laden
 # -----------------------------
 csv_path = "../steam-200k.csv"  # Pfad zu deiner Datei
-cols = ["user_id", "game", "action", "hours", "extra"]
-df = pd.read_csv(csv_path, header=None, names=cols)
 
 # -----------------------------
-# 2) Nur "play"-Einträge
+# 2) Eine Zeile pro (Spieler, Spiel) mit max. Stunden (deduplizierte Faktentabelle)
 # -----------------------------
-df_play = df[df["action"] == "play"].copy()
-df_play["hours"] = pd.to_numeric(df_play["hours"], errors="coerce")
-df_play = df_play.dropna(subset=["hours"])
+df_play = load_clean(csv_path)
 
 # -----------------------------
-# 3) Spieler in Tester/Bleiber einteilen
+# 3) Spieler in Tester/Bleiber einteilen (Stunden pro Spiel einmal sortiert)
 # -----------------------------
-df_play["time_bucket"] = np.where(df_play["hours"] > 3, ">3h", "<=3h")
+grenze = 3
+counts = ThresholdIndex(df_play, "game", "hours").counts([grenze])
 
 # -----------------------------
 # 4) Absolute Spielerzahlen pro Spiel und Kategorie
 # -----------------------------
-abs_counts = df_play.groupby(["game", "time_bucket"]).size().unstack(fill_value=0)
-
-# Sicherstellen, dass beide Spalten existieren
-for col in [">3h", "<=3h"]:
-    if col not in abs_counts.columns:
-        abs_counts[col] = 0
-abs_counts = abs_counts[[">3h", "<=3h"]]
+abs_counts = pd.DataFrame(
+    {">3h": counts[grenze], "<=3h": counts["total"] - counts[grenze]}
+)
 
 # Gesamtzahl Einträge pro Spiel
 abs_counts["total"] = abs_counts.sum(axis=1)
@@ -54,7 +52,7 @@ abs_counts["success_score"] = abs_counts["total"] * abs_counts["bleiber_ratio"]
 # -----------------------------
 # 7) Top 20 Spiele nach Erfolgs-Score
 # -----------------------------
-top20 = abs_counts.sort_values(by="success_score", ascending=False).head(20)
+top20 = top_rows(abs_counts, "success_score", 20)
 
 # -----------------------------
 # 8) Ausgabe
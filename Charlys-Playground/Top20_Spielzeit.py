@@ -1,25 +1,27 @@
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import load_clean
+
 # -----------------------------
 # 1) Daten laden
 # -----------------------------
 csv_path = "../steam-200k.csv" 
-cols = ["user_id", "game", "action", "hours", "extra"]
-df = pd.read_csv(csv_path, header=None, names=cols)
 
 # -----------------------------
-# 2) Nur "play"-Einträge
+# 2) Eine Zeile pro (Spieler, Spiel) mit max. Stunden (deduplizierte Faktentabelle),
+#    damit doppelte play-Zeilen nicht doppelt im Histogramm landen
 # -----------------------------
-df_play = df[df["action"] == "play"].copy()
-df_play["hours"] = pd.to_numeric(df_play["hours"], errors="coerce")
-df_play = df_play.dropna(subset=["hours"])
+df_play = load_clean(csv_path)
 
 # -----------------------------
 # 3) Top 20 Spiele nach Spieleranzahl
 # -----------------------------
-player_counts = df_play.groupby("game")["user_id"].nunique()
+player_counts = df_play.groupby("game", observed=True)["user_id"].nunique()
 top20_games = player_counts.sort_values(ascending=False).head(20).index
 
 df_top20 = df_play[df_play["game"].isin(top20_games)]
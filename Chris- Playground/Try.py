@@ -1,39 +1,21 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-# CSV laden
-df = pd.read_csv("steam-200k.csv", header=None, names=["user_id", "game", "behavior", "hours", "zero"])
-total_users = df["user_id"].nunique()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import open_facts, owner_engagement_table
 
-# Basisdaten vorbereiten
-purchases = df[df["behavior"] == "purchase"]
-plays_raw = df[(df["behavior"] == "play") & (df["hours"] > 0)]
+# Eine Zeile pro (User, Spiel): purchased-Flag und summierte Spielstunden
+facts = open_facts("steam-200k.csv")
+total_users = facts.n_users
 
-# Besitzer je Spiel (unique)
-ownership_pairs = purchases[["user_id", "game"]].drop_duplicates()
-owners_per_game = ownership_pairs.groupby("game")["user_id"].nunique().rename("owners")
-
-# Spielstunden je User–Spiel aggregieren
-plays = plays_raw.groupby(["user_id", "game"])["hours"].sum().reset_index()
-
-# Alle Besitzer mit ihren Spielstunden (0, falls nie gespielt)
-owner_hours = ownership_pairs.merge(plays, on=["user_id", "game"], how="left").fillna({"hours": 0})
-owner_hours["played"] = owner_hours["hours"] > 0
-owner_hours["played_ge_2h"] = owner_hours["hours"] >= 2
-owner_hours["played_ge_3h"] = owner_hours["hours"] >= 3
-
-# Kennzahlen je Spiel
-engagement = owner_hours.groupby("game").agg(
-    owners=("user_id", "nunique"),
-    players=("played", "sum"),
-    share_played=("played", "mean"),
-    share_played_ge_2h=("played_ge_2h", "mean"),
-    share_played_ge_3h=("played_ge_3h", "mean"),
-    avg_hours_per_owner=("hours", "mean"),
-    median_hours_per_owner=("hours", "median"),
-    total_hours=("hours", "sum")
-)
+# Kennzahlen je Spiel: Kaufpaare und Spielpaare (Stunden > 0) werden über
+# sortierte Integer-Schlüssel zusammengeführt, Besitzer ohne Spielzeit = 0h
+# (owners, players, share_played, share_played_ge_2h/3h,
+#  avg/median_hours_per_owner, total_hours)
+engagement = owner_engagement_table(facts, thresholds=(2, 3))
 
 # Besitzer vs. Gesamtuser
 engagement["ownership_rate"] = engagement["owners"] / total_users
@@ -106,8 +88,9 @@ plt.show()
 """
 
 # --- Visualisierung 3: Collector vs Grinder ---
-user_hours = plays.groupby("user_id")["hours"].sum()
-owned_games = purchases.groupby("user_id")["game"].nunique().rename("owned_games")
+pairs = facts.to_frame(columns=["user_id", "hours_sum", "purchased"])
+user_hours = pairs.loc[pairs["hours_sum"] > 0].groupby("user_id")["hours_sum"].sum()
+owned_games = pairs.groupby("user_id")["purchased"].sum().rename("owned_games")
 user_stats = (
     owned_games.to_frame()
     .join(user_hours.rename("total_hours"), how="outer")
@@ -51,13 +51,19 @@ hours_per_user = plays.groupby("user_id")["hours"].sum()
 hours_per_game = plays.groupby("game")["hours"].mean()
 
 
-# Auf Genre mergen
-mg = pd.read_csv("./metacritic_games.csv")
-mgs = mg[[mg.columns[0], "genre", "developer"]].copy()
-mgs.columns = ["game", "genre", "developer"]
+# Auf Genre mergen (Titel-Zuordnung aus der Match-Tabelle, Join auf Integer-Keys)
+# (eine Zeile pro Titel, PC-Eintrag bevorzugt -> keine vervielfachten Zeilen)
+from steamlib import load_metacritic, match_titles, metacritic_index, open_titles
 
-merged = pd.merge(df, mgs, on="game", how="left")
-merged_inner = pd.merge(df, mgs, on="game", how="inner")
+titles = open_titles("./steam-200k.csv")
+mg = metacritic_index(load_metacritic("./metacritic_games.csv", titles=titles))
+mgs = mg[["genre", "developer"]].rename_axis("key").reset_index()
+
+df["key"] = match_titles(titles.norm_ids(df["game"]), mgs["key"], titles)
+titles.save()
+
+merged = pd.merge(df, mgs, on="key", how="left", validate="many_to_one")
+merged_inner = pd.merge(df, mgs, on="key", how="inner", validate="many_to_one")
 
 print(merged.head())
 merged_count = df["game"].nunique()
@@ -5,14 +5,28 @@
 # ===============================================================
 
 import os
-import re
+import sys
 import math
 import json
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime
-from difflib import get_close_matches
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import (
+    IncrementalAggregate,
+    engagement_score,
+    load_metacritic,
+    match_titles,
+    metacritic_index,
+    normalize_series,
+    open_titles,
+    quality_score,
+    top_rows,
+    write_csv_if_changed,
+    write_json_if_changed,
+)
 
 # ---------------------------
 # Konfiguration
@@ -27,68 +41,6 @@ os.makedirs(OUT_DIR, exist_ok=True)
 # ---------------------------
 
 
-def normalize_cols(cols):
-    """Spaltennamen vereinheitlichen."""
-    norm = []
-    for c in cols:
-        c = str(c)
-        c = c.strip().lower()
-        c = re.sub(r"\s+", "_", c)
-        c = c.replace("#", "num").replace("%", "pct")
-        c = re.sub(r"[^a-z0-9_]", "", c)
-        norm.append(c)
-    return norm
-
-
-def read_csv_safely(
-    path, expected_like=None, encoding_candidates=("utf-8", "utf-8-sig", "latin-1")
-):
-    """
-    Liest CSV robust ein:
-    - testet verschiedene Encodings
-    - versucht header=0, fallback header=None + erste Zeile als Header
-    - normalisiert Spaltennamen
-    """
-    last_err = None
-    for enc in encoding_candidates:
-        try:
-            # Versuch mit Header
-            df = pd.read_csv(path, encoding=enc)
-            df.columns = normalize_cols(df.columns)
-            if expected_like:
-                found = any(k in df.columns for k in expected_like)
-                if not found:
-                    # vielleicht war keine Header-Zeile, also nochmal ohne Header
-                    df2 = pd.read_csv(path, encoding=enc, header=None)
-                    # erste Zeile als Spalten nehmen
-                    new_cols = normalize_cols(df2.iloc[0].astype(str).tolist())
-                    df2 = df2.iloc[1:].copy()
-                    df2.columns = new_cols
-                    df2 = df2.reset_index(drop=True)
-                    df = df2
-                    # hier keine weitere Prüfung, nehmen wie es ist
-            return df
-        except Exception as e:
-            last_err = e
-            continue
-    raise RuntimeError(f"CSV konnte nicht gelesen werden. Letzter Fehler: {last_err}")
-
-
-def coerce_numeric(series):
-    """Konvertiert typische Bewertungsspalten (inkl. 'tbd', Strings) robust zu float."""
-    if series is None:
-        return None
-    s = (
-        series.astype(str)
-        .str.strip()
-        .str.lower()
-        .replace({"tbd": np.nan, "nan": np.nan, "": np.nan})
-    )
-    # Prozent entfernen, Komma in Punkt
-    s = s.str.replace("%", "", regex=False).str.replace(",", ".", regex=False)
-    return pd.to_numeric(s, errors="coerce")
-
-
 def detect_title_column(df):
     """
     Ermittelt die Spalte mit Spiel-Titeln.
@@ -116,24 +68,12 @@ def detect_title_column(df):
     raise KeyError("Konnte keine plausible Titel-Spalte in Metacritic-Daten finden.")
 
 
-def clean_title_series(s):
-    """Titel string-normalisieren für Match/Join."""
-    return (
-        s.astype(str)
-        .str.strip()
-        .str.lower()
-        .str.replace(r"\s+", " ", regex=True)
-        .str.replace(r"®|™|©", "", regex=True)
-    )
-
-
-def parse_year(series):
-    """Versucht Jahre aus Datum/Freitext zu extrahieren."""
-    s = series.astype(str)
-    # direkte Zahl (z.B. '2016')
-    year = s.str.extract(r"(\d{4})", expand=False)
-    year = pd.to_numeric(year, errors="coerce")
-    return year
+def clean_title_series(s, titles=None):
+    """
+    Titel string-normalisieren für Match/Join.
+    Regeln laufen nur einmal pro eindeutigem Titel (gemerkt im Titel-Wörterbuch).
+    """
+    return normalize_series(s.astype(str), titles)
 
 
 def save_fig(name):
@@ -155,22 +95,26 @@ def print_head(df, n=3, title=None):
 if not os.path.exists(STEAM_PATH):
     raise FileNotFoundError(f"Datei nicht gefunden: {STEAM_PATH}")
 
-steam = pd.read_csv(STEAM_PATH, header=None)
-# Expected: user_id, game, action, value, other
-if steam.shape[1] < 5:
-    raise ValueError("Unerwartetes Format in steam-200k.csv (weniger als 5 Spalten).")
-
-steam.columns = ["user_id", "game", "action", "value", "other"]
-steam = steam[steam["action"].isin(["play", "purchase"])].copy()
-
-# Playtime pro Spiel (Durchschnitt)
-play_df = (
-    steam[steam["action"] == "play"]
-    .groupby("game", as_index=False)["value"]
-    .mean()
-    .rename(columns={"value": "avg_playtime_hours"})
+# gemeinsames Titel-Wörterbuch (Steam + Metacritic): Joins laufen auf norm_id
+titles = open_titles(STEAM_PATH)
+
+# Aggregat-Zustand: bei jedem Lauf werden nur neu angehängte Zeilen gelesen
+steam_state = IncrementalAggregate.open(STEAM_PATH, name="FinnsPlayground")
+steam_state.refresh()
+steam_games = steam_state.game_table()
+steam_games = steam_games[steam_games["play_rows"] > 0]
+
+# Playtime pro Spiel (Durchschnitt über alle play-Zeilen)
+play_df = pd.DataFrame(
+    {
+        "game": steam_games.index.to_numpy(),
+        "avg_playtime_hours": (
+            steam_games["hours_sum"] / steam_games["play_rows"]
+        ).to_numpy(),
+    }
 )
-play_df["game_clean"] = clean_title_series(play_df["game"])
+play_df["game_clean"] = clean_title_series(play_df["game"], titles)
+play_df["norm_id"] = titles.norm_ids(play_df["game"])
 
 print_head(play_df, title="Steam: Playtime (erste Zeilen)")
 
@@ -180,54 +124,27 @@ print_head(play_df, title="Steam: Playtime (erste Zeilen)")
 if not os.path.exists(META_PATH):
     raise FileNotFoundError(f"Datei nicht gefunden: {META_PATH}")
 
-# Wir erwarten Spalten wie 'title'/'name', 'metascore', 'userscore', 'genre', 'release_date' o.ä.
-meta_expected_like = ("title", "name", "metascore", "userscore", "genre", "release")
-meta = read_csv_safely(META_PATH, expected_like=meta_expected_like)
+# typisierte Tabelle (Scores float32, Zähler int32, release_date als Datum;
+# "tbd" -> NaN), gecacht im Cache-Verzeichnis der CSV
+meta = load_metacritic(META_PATH, titles=titles).rename(
+    columns={"user_score": "userscore"}
+)
+titles.save()
 
 print(f"\nMetacritic-Spalten: {list(meta.columns)}")
 
 # Titelspalte erkennen
 title_col = detect_title_column(meta)
 meta["title"] = meta[title_col].astype(str)
-meta["title_clean"] = clean_title_series(meta["title"])
-
-# Numeric Bewertungsspalten robust konvertieren
-for c in ["metascore", "critic_score", "critic_score_avg"]:
-    if c in meta.columns and "metascore" not in meta.columns:
-        meta.rename(columns={c: "metascore"}, inplace=True)
-
-for c in ["userscore", "user_score"]:
-    if c in meta.columns and "userscore" not in meta.columns:
-        meta.rename(columns={c: "userscore"}, inplace=True)
-
-meta["metascore"] = (
-    coerce_numeric(meta["metascore"]) if "metascore" in meta.columns else np.nan
+meta["title_clean"] = clean_title_series(meta["title"], titles)
+for col in ["metascore", "userscore"]:
+    if col not in meta.columns:
+        meta[col] = np.nan
+
+# Release-Jahr aus dem vollen Datum
+meta["release_year"] = (
+    meta["release_date"].dt.year if "release_date" in meta.columns else np.nan
 )
-meta["userscore"] = (
-    coerce_numeric(meta["userscore"]) if "userscore" in meta.columns else np.nan
-)
-
-# Release-Jahr
-release_col = None
-for c in ["release_date", "release", "released", "release_year", "jahr", "year"]:
-    if c in meta.columns:
-        release_col = c
-        break
-if release_col is not None:
-    if release_col == "release_year":
-        meta["release_year"] = coerce_numeric(meta["release_year"])
-    else:
-        meta["release_year"] = parse_year(meta[release_col])
-else:
-    meta["release_year"] = np.nan
-
-# Genre-Feldvereinheitlichung (optional)
-if "genre" not in meta.columns:
-    # Fallback Suche
-    for c in ["genres", "category", "categories"]:
-        if c in meta.columns:
-            meta.rename(columns={c: "genre"}, inplace=True)
-            break
 
 print_head(
     meta[[title_col, "title", "metascore", "userscore", "release_year"]],
@@ -235,69 +152,38 @@ print_head(
 )
 
 # ---------------------------
-# 3) Exakter Join
+# 3+4) Join über die Match-Tabelle (exakt, sonst fuzzy)
 # ---------------------------
+# title_matches.json merkt sich die Zuordnung pro Titel (inkl. manueller
+# Overrides); neu gematcht werden nur Titel, die dort noch fehlen
+# Metacritic-Index: eine Zeile pro Titel (PC-Eintrag bevorzugt, dazu
+# plattformübergreifende Mittel/Maxima) -> der Join vervielfacht keine Zeilen
+meta_index = metacritic_index(meta).rename_axis("meta_norm_id").reset_index()
+play_df["meta_norm_id"] = match_titles(play_df["norm_id"], meta["norm_id"], titles)
 merged = pd.merge(
-    play_df,
-    meta,
-    left_on="game_clean",
-    right_on="title_clean",
+    play_df[play_df["meta_norm_id"] >= 0],
+    meta_index,
+    on="meta_norm_id",
     how="inner",
     suffixes=("_steam", "_meta"),
+    validate="many_to_one",
 ).copy()
+exact = merged["norm_id"] == merged["meta_norm_id"]
 
-print(f"\n✅ Exakter Join: {len(merged)} gemeinsame Spiele")
-
-# ---------------------------
-# 4) Optional: Fuzzy-Join für nicht gematchte (konservativ)
-# ---------------------------
-if len(merged) < 100:  # fuzzy nur bei schwachem Match; anpassbar
-    remaining_steam = play_df[~play_df["game_clean"].isin(merged["game_clean"])].copy()
-    meta_titles = meta["title_clean"].dropna().unique().tolist()
-
-    approx_matches = []
-    for row in remaining_steam.itertuples(index=False):
-        gc = row.game_clean
-        # einfache Heuristik – nur sehr nahe Matches zulassen
-        m = get_close_matches(gc, meta_titles, n=1, cutoff=0.93)
-        if m:
-            approx_matches.append((gc, m[0]))
-    if approx_matches:
-        fuzzy_map = pd.DataFrame(approx_matches, columns=["game_clean", "title_clean"])
-        fuzzy_join = pd.merge(remaining_steam, fuzzy_map, on="game_clean", how="inner")
-        fuzzy_join = pd.merge(
-            fuzzy_join,
-            meta,
-            on="title_clean",
-            how="inner",
-            suffixes=("_steam", "_meta"),
-        )
-        merged = pd.concat([merged, fuzzy_join], ignore_index=True).drop_duplicates(
-            subset=["game_clean"]
-        )
-
-        print(f"🔎 Fuzzy-Join ergänzt: Gesamt nun {len(merged)} Spiele")
+print(f"\n✅ Exakter Join: {int(exact.sum())} gemeinsame Spiele")
+print(f"🔎 Fuzzy-Join ergänzt: Gesamt nun {len(merged)} Spiele")
 
 # ---------------------------
 # 5) Feature Engineering
 # ---------------------------
 # Engagement-Score (Kombi aus Qualität & Nutzung)
 # log1p dämpft Ausreißer in den Spielzeiten
-ms = (
-    merged["metascore"].fillna(0).clip(lower=0, upper=100)
-    if "metascore" in merged.columns
-    else 0
-)
-merged["engagement_score"] = (ms / 100.0) * np.log1p(
-    merged["avg_playtime_hours"].clip(lower=0)
+merged["engagement_score"] = engagement_score(
+    merged["metascore"], merged["avg_playtime_hours"]
 )
 
 # einfache Qualitätskennziffer
-if "userscore" in merged.columns:
-    us_norm = merged["userscore"].fillna(0).clip(lower=0, upper=10) / 10.0
-else:
-    us_norm = 0.0
-merged["quality_score"] = 0.6 * (ms / 100.0) + 0.4 * us_norm
+merged["quality_score"] = quality_score(merged["metascore"], merged.get("userscore"))
 
 # ---------------------------
 # 6) Ausgaben/Tabellen
@@ -317,12 +203,17 @@ keep_cols = [
 keep_cols = [c for c in keep_cols if c in merged.columns]
 report = merged[keep_cols].copy()
 
-# Sortierte Toplisten
-top_engagement = report.sort_values("engagement_score", ascending=False).head(20)
-top_quality = report.sort_values("quality_score", ascending=False).head(20)
+# Sortierte Toplisten (Teilauswahl statt Vollsortierung)
+top_engagement = top_rows(report, "engagement_score", 20)
+top_quality = top_rows(report, "quality_score", 20)
 
-top_engagement.to_csv(os.path.join(OUT_DIR, "top20_engagement.csv"), index=False)
-top_quality.to_csv(os.path.join(OUT_DIR, "top20_quality.csv"), index=False)
+# nur neu schreiben, wenn sich der Inhalt geändert hat
+write_csv_if_changed(
+    top_engagement, os.path.join(OUT_DIR, "top20_engagement.csv"), index=False
+)
+write_csv_if_changed(
+    top_quality, os.path.join(OUT_DIR, "top20_quality.csv"), index=False
+)
 
 print_head(top_engagement, title="Top 20 – Engagement Score")
 print_head(top_quality, title="Top 20 – Quality Score")
@@ -419,7 +310,11 @@ if "release_year" in merged.columns and merged["release_year"].notna().any():
     plt.close()
 
 # Korrelationen (numeric)
-numeric = merged.select_dtypes(include=[np.number]).copy()
+numeric = (
+    merged.select_dtypes(include=[np.number])
+    .drop(columns=["norm_id", "meta_norm_id", "game_id"])
+    .copy()
+)
 if numeric.shape[1] >= 2:
     corr = numeric.corr()
     plt.figure(figsize=(7, 6))
@@ -445,8 +340,8 @@ insights = {
         "Zeitreihen zeigen ggf. Trends bei Scores (z. B. Generationswechsel, Plattformwellen).",
     ],
 }
-with open(os.path.join(OUT_DIR, "insights.json"), "w", encoding="utf-8") as f:
-    json.dump(insights, f, ensure_ascii=False, indent=2)
+write_json_if_changed(insights, os.path.join(OUT_DIR, "insights.json"))
+steam_state.save()  # erst nach allen Ausgaben: bei Abbruch wird das Delta wiederholt
 
 print(f"\n📝 Insights gespeichert: {os.path.join(OUT_DIR, 'insights.json')}")
 print(
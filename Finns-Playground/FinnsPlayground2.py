@@ -1,50 +1,65 @@
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-# 1) steam laden
-steam = pd.read_csv("steam-200k.csv", header=None)
-steam.columns = ["user_id", "game", "action", "value", "other"]
-steam = steam[steam["action"].isin(["play", "purchase"])]
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import (
+    load_facts,
+    load_metacritic,
+    match_titles,
+    metacritic_index,
+    open_titles,
+)
+
+# gemeinsames Titel-Wörterbuch: Join läuft auf norm_id (int32) statt auf Strings
+titles = open_titles("steam-200k.csv")
 
-# spielzeit pro (user, game)
+# 1) steam laden: eine zeile pro (user, game) aus der faktentabelle
+facts = load_facts("steam-200k.csv", titles=titles)
+
+# spielzeit pro (user, game) (doppelte play-zeilen aufsummiert)
 user_game = (
-    steam[steam["action"] == "play"]
-    .groupby(["user_id", "game"], as_index=False)["value"]
-    .sum()
-    .rename(columns={"value": "hours_user_game"})
+    facts.loc[facts["played"], ["user_id", "game", "hours_sum"]]
+    .rename(columns={"hours_sum": "hours_user_game"})
+    .fillna({"hours_user_game": 0})
 )
 
 # pro spiel: spieler, gesamtstunden, durchschnitt
-game_use = user_game.groupby("game", as_index=False).agg(
+game_use = user_game.groupby("game", as_index=False, observed=True).agg(
     players=("user_id", "nunique"), total_hours=("hours_user_game", "sum")
 )
 game_use["avg_hours_per_player"] = game_use["total_hours"] / game_use["players"]
 
 # käufe pro spiel
 purchases = (
-    steam[steam["action"] == "purchase"]
-    .groupby("game", as_index=False)["user_id"]
-    .nunique()
-    .rename(columns={"user_id": "purchasers"})
+    facts[facts["purchased"]]
+    .groupby("game", as_index=False, observed=True)["user_id"]
+    .size()
+    .rename(columns={"size": "purchasers"})
 )
 game_use = game_use.merge(purchases, on="game", how="left")
 game_use["purchasers"] = game_use["purchasers"].fillna(0).astype(int)
 
-# 2) metacritic laden (nur erste spalte als titel + genre)
-meta = pd.read_csv("metacritic_games.csv")
+# 2) metacritic laden (titelspalte 'game' bzw. erste spalte, + genre)
+meta = load_metacritic("metacritic_games.csv", titles=titles)
 
 # <<<<<<<<<<<<<< HIER WICHTIG >>>>>>>>>>>>>>
-# nimm die ERSTE spalte als titel, und 'genre' als genre.
 # wenn deine genre-spalte anders heißt, ersetze unten 'genre' durch den richtigen namen.
-meta_simple = meta[[meta.columns[0], "genre"]].copy()
-meta_simple.columns = ["title", "genre"]
+# eine zeile pro titel (pc-eintrag bevorzugt), damit der join keine zeilen vervielfacht
+meta_simple = metacritic_index(meta)[["genre"]].rename_axis("key").reset_index()
 
-# 3) join: titel == game, alles klein/trimmen
-game_use["key"] = game_use["game"].str.strip().str.lower()
-meta_simple["key"] = meta_simple["title"].astype(str).str.strip().str.lower()
+# 3) join: steam-titel -> metacritic-titel aus der match-tabelle (exakt/fuzzy/manuell)
+game_use["key"] = match_titles(
+    titles.norm_ids(game_use["game"]), meta_simple["key"], titles
+)
+titles.save()
 
-merged = game_use.merge(meta_simple[["key", "genre"]], on="key", how="left")
+merged = game_use.merge(
+    meta_simple[["key", "genre"]], on="key", how="left", validate="many_to_one"
+)
 print(merged[merged[""]].count())
 print(merged["genre"].isna().sum())
 
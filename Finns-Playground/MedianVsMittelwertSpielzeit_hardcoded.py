@@ -12,49 +12,61 @@ Ziel: Verzerrungen durch Ausreißer sauber sichtbar machen.
   (2) Top-20 nach (mean - median): stärkster Ausreißer-Einfluss in absoluten Stunden.
   (3) Ratio (mean/median) vs. Spielerzahl: zeigt Stabilität (log x-Achse).
 Pfad und Parameter sind hardcodiert. Letzte CSV-Spalte wird ignoriert (nur 0en).
+Inkrementell: nur neu angehängte Zeilen werden gelesen, nur die betroffenen
+Spiele neu berechnet; CSV und Plots werden nur bei Änderungen neu geschrieben.
+Mit SKETCH_ALPHA kommen die Kennzahlen aus mergebaren Quantil-Skizzen pro Spiel
+(steamlib.sketch) statt aus allen Stundenwerten.
 """
 
+import os
+import sys
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import IncrementalAggregate, group_stats, refresh_table, sketch_file
+from steamlib import load_clean  # pro (user_id, game) max. Stundenwert, nur 'play'
+
 # ===== Hardcoded Parameter =====
 CSV_PATH = "../steam-200k.csv"
 MIN_PLAYERS = 50
 TOP_N = 20
 OUT_DIR = "../images/Finn/"
+INCREMENTAL = True  # False: bei jedem Lauf alles neu aus der CSV berechnen
+SKETCH_ALPHA = None  # z.B. 0.01: Perzentile aus Quantil-Skizzen (±1 %), None = exakt
 # ===============================
 
 
-def load_clean(csv_path: str) -> pd.DataFrame:
-    df = pd.read_csv(
-        csv_path, header=None, names=["user_id", "game", "behavior", "value", "drop_me"]
+QUANTILES = {"median": 0.5, "q25": 0.25, "q75": 0.75}
+
+
+def compute_stats(df: pd.DataFrame, sketch=None, games=None) -> pd.DataFrame:
+    if sketch is not None:
+        # genähert aus den Quantil-Skizzen (players = Spieler, wie exakt)
+        stats = sketch.stats(quantiles=QUANTILES, games=games)
+    else:
+        # ein Sortierlauf für alle Spiele statt Lambda-Perzentile pro Gruppe
+        stats = group_stats(df, "game", "hours", quantiles=QUANTILES)
+    agg = pd.DataFrame(
+        {
+            "game": stats["game"],
+            "players": stats["count"],
+            "mean_hours": stats["mean"],
+            "median_hours": stats["median"],
+            "q25": stats["q25"],
+            "q75": stats["q75"],
+            "std_hours": stats["std"],
+        }
     )
-    df = df.loc[df["behavior"] == "play", ["user_id", "game", "value"]].copy()
-    df["hours"] = pd.to_numeric(df["value"], errors="coerce")
-    df = df.dropna(subset=["hours"])
-    # pro (user, game) nur ein Wert
-    df = df.groupby(["user_id", "game"], as_index=False)["hours"].max()
-    return df
-
-
-def compute_stats(df: pd.DataFrame) -> pd.DataFrame:
-    by_game = df.groupby("game")["hours"]
-    agg = by_game.agg(
-        players="count",
-        mean_hours="mean",
-        median_hours="median",
-        q25=lambda s: np.percentile(s, 25),
-        q75=lambda s: np.percentile(s, 75),
-        std_hours="std",
-    ).reset_index()
     agg = agg[agg["players"] >= MIN_PLAYERS].copy()
-    agg["iqr"] = agg["q75"] - agg["q25"]
+    agg["iqr"] = stats["iqr"]
     agg["diff_mean_median"] = agg["mean_hours"] - agg["median_hours"]
     agg["ratio_mean_median"] = agg["mean_hours"] / agg["median_hours"].replace(
         0, np.nan
     )
-    agg["cov"] = agg["std_hours"] / agg["mean_hours"].replace(0, np.nan)
+    agg["cov"] = stats["cov"]
     return agg
 
 
@@ -98,10 +110,39 @@ def plot_ratio_vs_players(agg: pd.DataFrame, out_path: str) -> None:
 
 
 def main():
-    df = load_clean(CSV_PATH)
-    agg = compute_stats(df)
     out_csv = OUT_DIR + "MedianVsMittelwert_stats_hardcoded.csv"
-    agg.to_csv(out_csv, index=False)
+    if INCREMENTAL:
+        state = IncrementalAggregate.open(
+            CSV_PATH, name="MedianVsMittelwert", sketch_alpha=SKETCH_ALPHA
+        )
+        changed = state.refresh()
+        agg, written = refresh_table(
+            out_csv,
+            lambda games: compute_stats(
+                state.clean_table(games=games) if state.sketch is None else None,
+                state.sketch,
+                games,
+            ),
+            changed,
+            rebuilt=state.rebuilt,
+        )
+    elif SKETCH_ALPHA is not None:
+        agg = compute_stats(None, sketch_file(CSV_PATH, SKETCH_ALPHA))
+        agg.to_csv(out_csv, index=False)
+        written = True
+    else:
+        agg = compute_stats(load_clean(CSV_PATH))
+        agg.to_csv(out_csv, index=False)
+        written = True
+    if not written:
+        print("[OK] keine Änderungen:", out_csv)
+    else:
+        write_outputs(agg, out_csv)
+    if INCREMENTAL:
+        state.save()
+
+
+def write_outputs(agg: pd.DataFrame, out_csv: str) -> None:
     plot_scatter_mean_vs_median(
         agg, OUT_DIR + "MedianVsMittelwert_scatter_hardcoded.png"
     )
@@ -1,21 +1,24 @@
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-# Load data
-df = pd.read_csv(
-    "steam-200k.csv", header=None, names=["UserID", "Game", "Event", "Hours", "Zeros"]
-)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import open_interactions, top_rows
 
-# Work only with purchases
-purchases = df[df["Event"] == "purchase"].copy()
+# Load sparse user x game interactions (built once, memory-mapped afterwards)
+inter = open_interactions("steam-200k.csv")
 
 # Universe of users
-all_users = df["UserID"].unique()
-total_users = len(all_users)
+total_users = inter.n_users
 
-# Count unique owners per game
-owners_per_game = purchases.groupby("Game")["UserID"].nunique()
+# Count unique owners per game (purchase flags per CSC column, games with owners only)
+owners_per_game = pd.Series(
+    inter.owners_per_game(), index=pd.Index(inter.game_titles(), name="Game")
+)
+owners_per_game = owners_per_game[owners_per_game > 0].sort_index()
 
 # Compute non-owners per game (relative to the same global user set)
 nonowners_per_game = total_users - owners_per_game
@@ -31,16 +34,19 @@ ownership_df = pd.DataFrame(
         "non_owners": nonowners_per_game,
         "ownership_rate": rate_per_game,
     }
-).sort_values("ownership_rate", ascending=False)
+)
+
+# --- Only the top entries are needed: partial selection instead of a full sort ---
+top_n = 20
+top_ownership = top_rows(ownership_df, "ownership_rate", top_n)
 
 # --- Print a quick summary ---
 print("Top 10 games by your ownership rate (owners / non-owners * 100):")
-print(ownership_df.head(10))
+print(top_ownership.head(10))
 
 # --- Plot the top 20 for readability ---
-top_n = 20
 plt.figure(figsize=(12, 6))
-ownership_df["ownership_rate"].head(top_n).plot(kind="bar", edgecolor="black")
+top_ownership["ownership_rate"].plot(kind="bar", edgecolor="black")
 plt.title(f"Top {top_n} Games by Ownership Rate (owners / non-owners × 100)")
 plt.xlabel("Game")
 plt.ylabel("Ownership Rate")
@@ -1,17 +1,24 @@
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-df = pd.read_csv(
-    "steam-200k.csv", header=None, names=["UserID", "Game", "Event", "Hours", "Zeros"]
-)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import open_interactions, open_titles
+
+titles = open_titles("steam-200k.csv")
+inter = open_interactions("steam-200k.csv", titles=titles)
 
 gameToCheck = "Dota 2"
 
-haveGame = df[(df["Event"] == "purchase") & (df["Game"] == gameToCheck)]
-all_users = df["UserID"].unique()
-owners = haveGame["UserID"].unique()
-not_owners = np.setdiff1d(all_users, owners)
+# Spalte des Spiels in der CSC-Matrix: Besitzer = User mit purchase-Flag
+col = inter.game_column(
+    int(inter.game_index(titles.lookup_ids([gameToCheck], False)[0]))
+)
+owners = col["user"][col["purchased"]]
+not_owners = np.setdiff1d(np.arange(inter.n_users), owners)
 
 print(f"{len(owners)} players have {gameToCheck}.")
 print(f"{len(not_owners)} players do not have {gameToCheck}.")
@@ -8,10 +8,16 @@ Hinweise:
 - Pfad zur Datei: /mnt/data/steam-200k.csv
 """
 
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import ThresholdIndex, load_steam
+
 
 grenze_hours_played = 10
 min_entries_per_game = 150  # Mindestanzahl an Einträgen pro Spiel für die Analyse
@@ -21,48 +27,36 @@ min_entries_per_game = 150  # Mindestanzahl an Einträgen pro Spiel für die Ana
 # ------------------------------------------------------------
 csv_path = "steam-200k.csv"
 
-cols = ["user_id", "game", "action", "hours", "extra"]
-df = pd.read_csv(csv_path, header=None, names=cols)
+# nur "play"-Einträge, Stunden schon als float32 (Filter direkt beim Laden)
+df = load_steam(csv_path, behavior="play", columns=["user_id", "game", "hours"])
 
 # ------------------------------------------------------------
-# 2) Vorbereiten / Filtern (nur "play"-Einträge, Stunden als float)
+# 2) Vorbereiten (fehlende Stunden entfernen)
 # ------------------------------------------------------------
-df = df[df["action"] == "play"].copy()
-df["hours"] = pd.to_numeric(df["hours"], errors="coerce")
 df = df.dropna(subset=["hours"])
 
 # ------------------------------------------------------------
 # 2b) Nur Spiele mit ausreichender Mindestanzahl an Einträgen berücksichtigen
 # ------------------------------------------------------------
-game_counts = df["game"].value_counts()
-valid_games = game_counts[game_counts >= min_entries_per_game].index
-df = df[df["game"].isin(valid_games)]
-
-# Bucket bilden: <grenze vs. >=grenze
-df["time_bucket"] = np.where(
-    df["hours"] >= grenze_hours_played,
-    f">={grenze_hours_played}h",
-    f"<{grenze_hours_played}h",
+# Stunden pro Spiel einmal sortieren; total und >=grenze kommen per searchsorted
+counts = ThresholdIndex(df, "game", "hours").counts(
+    [grenze_hours_played], inclusive=True
 )
+counts = counts[counts["total"] >= min_entries_per_game]
 
 # ------------------------------------------------------------
-# 3) Absolute Häufigkeiten je Spiel und Bucket aggregieren
+# 3) Absolute Häufigkeiten je Spiel: <grenze vs. >=grenze
 # ------------------------------------------------------------
-abs_counts = (
-    df.groupby(["game", "time_bucket"])
-    .size()
-    .unstack(fill_value=0)
-    .sort_values(
-        by=[f">={grenze_hours_played}h", f"<{grenze_hours_played}h"],
-        ascending=False,
-    )
+abs_counts = pd.DataFrame(
+    {
+        f">={grenze_hours_played}h": counts[grenze_hours_played],
+        f"<{grenze_hours_played}h": counts["total"] - counts[grenze_hours_played],
+    }
+).sort_values(
+    by=[f">={grenze_hours_played}h", f"<{grenze_hours_played}h"],
+    ascending=False,
 )
 
-for col in [f">={grenze_hours_played}h", f"<{grenze_hours_played}h"]:
-    if col not in abs_counts.columns:
-        abs_counts[col] = 0
-abs_counts = abs_counts[[f">={grenze_hours_played}h", f"<{grenze_hours_played}h"]]
-
 abs_counts_df = abs_counts.copy()
 
 # ------------------------------------------------------------
@@ -8,10 +8,16 @@ Hinweise:
 - Pfad zur Datei: /mnt/data/steam-200k.csv
 """
 
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import ThresholdIndex, load_steam
+
 
 grenze_hours_played = 100
 
@@ -20,48 +26,34 @@ grenze_hours_played = 100
 # ------------------------------------------------------------
 csv_path = "steam-200k.csv"
 
-# Das Steam-200k-Dataset liegt häufig ohne Header vor. Wir vergeben daher Spaltennamen.
-# Falls Ihre Datei Header enthält, können Sie 'header=0' setzen und die 'names'-Zeile entfernen.
-cols = ["user_id", "game", "action", "hours", "extra"]
-df = pd.read_csv(csv_path, header=None, names=cols)
+# nur "play"-Einträge, Stunden schon als float32 (Filter direkt beim Laden)
+df = load_steam(csv_path, behavior="play", columns=["user_id", "game", "hours"])
 
 # ------------------------------------------------------------
-# 2) Vorbereiten / Filtern (nur "play"-Einträge, Stunden als float)
+# 2) Vorbereiten (fehlende Stunden entfernen)
 # ------------------------------------------------------------
-df = df[df["action"] == "play"].copy()
-
-df["hours"] = pd.to_numeric(df["hours"], errors="coerce")
 df = df.dropna(subset=["hours"])
 
-# Genau 3 Stunden ausschließen, weil "länger als 3h" und "kürzer als 3h" streng gemeint ist
-df = df[df["hours"] != grenze_hours_played]
-
-# Bucket bilden: <3h vs. >3h
-df["time_bucket"] = np.where(
-    df["hours"] > grenze_hours_played,
-    f">{grenze_hours_played}h",
-    f"<{grenze_hours_played}h",
-)
+# Stunden pro Spiel einmal sortieren; > und >= der Grenze per searchsorted
+# (genau die Grenze zählt damit zu keinem Bucket, "länger"/"kürzer" ist streng gemeint)
+index = ThresholdIndex(df, "game", "hours")
+above = index.counts([grenze_hours_played])
+at_least = index.counts([grenze_hours_played], inclusive=True)
 
 # ------------------------------------------------------------
 # 3) Absolute Häufigkeiten je Spiel und Bucket aggregieren
 # ------------------------------------------------------------
 # "Einträge" = Zeilenanzahl (keine deduplizierten User). Falls einzigartige Spieler gewünscht sind,
 # könnte man z.B. per .nunique() auf user_id aggregieren.
-abs_counts = (
-    df.groupby(["game", "time_bucket"])
-    .size()
-    .unstack(fill_value=0)
-    .sort_values(
-        by=[f">{grenze_hours_played}h", f"<{grenze_hours_played}h"], ascending=False
-    )
+abs_counts = pd.DataFrame(
+    {
+        f">{grenze_hours_played}h": above[grenze_hours_played],
+        f"<{grenze_hours_played}h": above["total"] - at_least[grenze_hours_played],
+    }
+)
+abs_counts = abs_counts[abs_counts.sum(axis=1) > 0].sort_values(
+    by=[f">{grenze_hours_played}h", f"<{grenze_hours_played}h"], ascending=False
 )
-
-# Optional: sicherstellen, dass beide Spalten existieren
-for col in [f">{grenze_hours_played}h", f"<{grenze_hours_played}h"]:
-    if col not in abs_counts.columns:
-        abs_counts[col] = 0
-abs_counts = abs_counts[[f">{grenze_hours_played}h", f"<{grenze_hours_played}h"]]
 
 # Dies ist der geforderte DataFrame mit absoluten Häufigkeiten:
 abs_counts_df = abs_counts.copy()
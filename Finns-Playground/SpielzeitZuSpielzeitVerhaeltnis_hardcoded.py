@@ -11,63 +11,62 @@ Analytisch sinnvolle Visualisierungen der "Tail-Heaviness" der Spielzeit-Verteil
   (2) Scatter: P90/P50 vs. Spielerzahl (zeigt Stabilität vs. Tail-Heaviness).
   (3) Lorenzkurven der Top-5 nach Spielerzahl (Ungleichverteilung der Spielzeit).
 Pfad und Parameter sind hardcodiert. Die letzte CSV-Spalte wird ignoriert (nur 0en).
+Inkrementell: nur neu angehängte Zeilen werden gelesen, nur die betroffenen
+Spiele neu berechnet; CSV und Plots werden nur bei Änderungen neu geschrieben.
+Mit SKETCH_ALPHA kommen die Kennzahlen aus mergebaren Quantil-Skizzen pro Spiel
+(steamlib.sketch) statt aus allen Stundenwerten.
 """
 
+import os
+import sys
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import IncrementalAggregate, group_inequality, group_stats, refresh_table
+from steamlib import sketch_file
+from steamlib import load_clean  # pro (user_id, game) max. Stundenwert, nur 'play'
+
 # ===== Hardcoded Parameter =====
 CSV_PATH = "../steam-200k.csv"
 MIN_PLAYERS = 100
 TOP_N = 20
 OUT_DIR = "../images/Finn/"
+INCREMENTAL = True  # False: bei jedem Lauf alles neu aus der CSV berechnen
+SKETCH_ALPHA = None  # z.B. 0.01: Perzentile aus Quantil-Skizzen (±1 %), None = exakt
 # ===============================
 
 
-def load_clean(csv_path: str) -> pd.DataFrame:
-    df = pd.read_csv(
-        csv_path, header=None, names=["user_id", "game", "behavior", "value", "drop_me"]
-    )
-    # Nur 'play', letzte Spalte ignorieren; Stunden numerisch
-    df = df.loc[df["behavior"] == "play", ["user_id", "game", "value"]].copy()
-    df["hours"] = pd.to_numeric(df["value"], errors="coerce")
-    df = df.dropna(subset=["hours"])
-    # Pro (user, game) nur ein Stundenwert (max, da 'value' typ. kumulierte Stunden sind)
-    df = df.groupby(["user_id", "game"], as_index=False)["hours"].max()
-    return df
-
-
-def gini_coefficient(x: np.ndarray) -> float:
-    """Gini-Koeffizient (0 = gleich verteilt, 1 = extrem ungleich)."""
-    x = np.asarray(x, dtype=float)
-    if x.size == 0:
-        return np.nan
-    if np.all(x == 0):
-        return 0.0
-    x = np.sort(x)
-    n = x.size
-    cumx = np.cumsum(x)
-    gini = (n + 1 - 2 * np.sum(cumx) / cumx[-1]) / n
-    return float(gini)
-
-
-def compute_game_stats(df: pd.DataFrame) -> pd.DataFrame:
-    grouped = df.groupby("game")["hours"]
-    agg = grouped.agg(
-        players="count",
-        p25=lambda s: np.percentile(s, 25),
-        p50=lambda s: np.percentile(s, 50),
-        p75=lambda s: np.percentile(s, 75),
-        p90=lambda s: np.percentile(s, 90),
-        p95=lambda s: np.percentile(s, 95),
-        mean="mean",
-    ).reset_index()
-    # Gini pro Spiel
-    agg["gini"] = grouped.apply(lambda s: gini_coefficient(s.values)).values
-    # Tail-Ratios (robust gegen Division durch 0)
-    agg["ratio_p90_p50"] = agg["p90"] / agg["p50"].replace(0, np.nan)
-    agg["ratio_p75_p25"] = agg["p75"] / agg["p25"].replace(0, np.nan)
+QUANTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9, "p95": 0.95}
+TAIL_RATIOS = {"ratio_p90_p50": ("p90", "p50"), "ratio_p75_p25": ("p75", "p25")}
+
+
+def compute_game_stats(df: pd.DataFrame, sketch=None, games=None) -> pd.DataFrame:
+    if sketch is not None:
+        # genähert aus den Quantil-Skizzen (players = Spieler, wie exakt)
+        stats = sketch.stats(QUANTILES, gini=True, tail_ratios=TAIL_RATIOS, games=games)
+    else:
+        # Perzentile, Mittel, Gini und Tail-Ratios in einem Sortierlauf für alle Spiele
+        stats = group_stats(
+            df, "game", "hours", QUANTILES, gini=True, tail_ratios=TAIL_RATIOS
+        )
+    agg = stats.rename(columns={"count": "players"})[
+        [
+            "game",
+            "players",
+            "p25",
+            "p50",
+            "p75",
+            "p90",
+            "p95",
+            "mean",
+            "gini",
+            "ratio_p90_p50",
+            "ratio_p75_p25",
+        ]
+    ]
     # Filter auf ausreichend Stichprobe
     agg = agg[agg["players"] >= MIN_PLAYERS].copy()
     return agg
@@ -76,7 +75,7 @@ def compute_game_stats(df: pd.DataFrame) -> pd.DataFrame:
 def plot_top20_boxplots_log(df: pd.DataFrame, out_path: str) -> None:
     # Top-20 Spiele nach Spielerzahl
     top_games = (
-        df.groupby("game")["user_id"]
+        df.groupby("game", observed=True)["user_id"]
         .nunique()
         .sort_values(ascending=False)
         .head(TOP_N)
@@ -108,24 +107,15 @@ def plot_ratio_vs_players(agg: pd.DataFrame, out_path: str) -> None:
 
 
 def plot_lorenz_top5(df: pd.DataFrame, out_path: str) -> None:
-    # Top-5 nach Spielerzahl
-    top5 = (
-        df.groupby("game")["user_id"]
-        .nunique()
-        .sort_values(ascending=False)
-        .head(5)
-        .index.tolist()
-    )
+    # Lorenzkurven aller Spiele in einem Sortierlauf, davon Top-5 nach Spielerzahl
+    table, curves = group_inequality(df, "game", "hours")
+    top5 = table.nlargest(5, "count")
+    xs = np.linspace(0, 1, curves.shape[1], endpoint=True)
     plt.figure(figsize=(8, 8))
     # Gleichheitslinie
     plt.plot([0, 1], [0, 1], linestyle="--")
-    for g in top5:
-        v = df.loc[df["game"] == g, "hours"].values
-        v = np.sort(v)
-        cum = np.cumsum(v)
-        cum = cum / cum[-1] if cum[-1] > 0 else cum
-        xs = np.linspace(0, 1, len(cum), endpoint=True)
-        plt.plot(xs, cum, label=g)
+    for i, g in zip(top5.index, top5["game"]):
+        plt.plot(xs, curves[i], label=g)
     plt.xlabel("Kumulierter Anteil der Spieler")
     plt.ylabel("Kumulierter Anteil der Spielzeit")
     plt.title("Lorenzkurven – Ungleichverteilung der Spielzeit (Top 5 Spiele)")
@@ -136,11 +126,39 @@ def plot_lorenz_top5(df: pd.DataFrame, out_path: str) -> None:
 
 
 def main():
-    df = load_clean(CSV_PATH)
-    agg = compute_game_stats(df)
-    # Export Tabelle
     out_csv = OUT_DIR + "SpielzeitVerhaeltnis_stats_hardcoded.csv"
-    agg.to_csv(out_csv, index=False)
+    if INCREMENTAL:
+        state = IncrementalAggregate.open(
+            CSV_PATH, name="SpielzeitVerhaeltnis", sketch_alpha=SKETCH_ALPHA
+        )
+        changed = state.refresh()
+        # Export Tabelle (nur geänderte Spiele neu berechnen)
+        agg, written = refresh_table(
+            out_csv,
+            lambda games: compute_game_stats(
+                state.clean_table(games=games) if state.sketch is None else None,
+                state.sketch,
+                games,
+            ),
+            changed,
+            rebuilt=state.rebuilt,
+        )
+        df = state.clean_table() if written else None
+    else:
+        df = load_clean(CSV_PATH)
+        sketch = None if SKETCH_ALPHA is None else sketch_file(CSV_PATH, SKETCH_ALPHA)
+        agg = compute_game_stats(df, sketch)
+        agg.to_csv(out_csv, index=False)
+        written = True
+    if not written:
+        print("[OK] keine Änderungen:", out_csv)
+    else:
+        write_outputs(df, agg, out_csv)
+    if INCREMENTAL:
+        state.save()
+
+
+def write_outputs(df: pd.DataFrame, agg: pd.DataFrame, out_csv: str) -> None:
     # Plots
     plot_top20_boxplots_log(df, OUT_DIR + "Top20_Boxplots_LogHours.png")
     plot_ratio_vs_players(agg, OUT_DIR + "TailRatios_vs_Players.png")
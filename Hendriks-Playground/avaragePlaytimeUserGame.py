@@ -1,14 +1,17 @@
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# Daten einlesen
-df = pd.read_csv('steam-200k.csv', header=None, names=['UserID', 'Game', 'Action', 'Value', 'Other'])
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import load_clean
 
-# Nur Spielzeit-Datensätze filtern
-play_data = df[df['Action'] == 'play'].copy()
+# Daten einlesen: Spielzeit pro (User, Spiel), doppelte play-Zeilen aufsummiert
+play_data = load_clean('steam-200k.csv', reduce='sum')
+play_data.columns = ['UserID', 'Game', 'Value']
 
 # Gesamtspielzeit pro Spiel berechnen
-game_playtime = play_data.groupby('Game')['Value'].sum().sort_values(ascending=False)
+game_playtime = play_data.groupby('Game', observed=True)['Value'].sum().sort_values(ascending=False)
 
 # Top 20 Spiele mit höchster Spielzeit
 top_20_games = game_playtime.head(20)
@@ -1,15 +1,18 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 
-# CSV laden
-df = pd.read_csv("steam-200k.csv", header=None, names=["user_id", "game", "behavior", "hours", "zero"])
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import load_steam, validation_report
 
-#zero spalte Eliminieren, durch ganzen Datensatz durch nur 0 Werte --> Redundant
-df = df.drop(columns=["zero"])
+# CSV laden (wird beim Einlesen geprüft, ungültige Zeilen kommen in die Quarantäne)
+# zero-Spalte wird nur geprüft (muss überall 0 sein) und nicht übernommen --> Redundant
+df = load_steam("steam-200k.csv")
 
-#löschen der zero spalte anzeigen lassen
-#print(df.columns)
-#check hat funktioniert
+# Datenqualität: Anzahl Zeilen pro verletzter Regel
+# (Details: steam-200k.csv.cache/validation.json und quarantine.csv)
+print(validation_report("steam-200k.csv"))
 
 
 def count_purchase_play(df):
@@ -1,24 +1,26 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-# CSV laden
-df = pd.read_csv("steam-200k.csv", header=None, names=["user_id", "game", "behavior", "hours", "zero"])
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import open_facts, owner_engagement_table, top_rows
 
-# Zero-Spalte eliminieren
-df = df.drop(columns=["zero"])
+# Faktentabelle laden (eine Zeile pro User und Spiel, schon dedupliziert)
+facts = open_facts("steam-200k.csv")
 
 # Gesamtzahl der User berechnen
-total_users = df["user_id"].nunique()
+total_users = facts.n_users
 
-# Nur Kaufwerte berücksichtigen
-purchases = df[df["behavior"] == "purchase"]
+# Besitzer pro Spiel (eindeutige Kaufpaare, per sortiertem Integer-Merge)
+owners = owner_engagement_table(facts)["owners"]
 
 # Ownership-Rate berechnen (pro Spiel)
-ownership_rates = purchases["game"].value_counts() / total_users * 100
+ownership_rates = (owners / total_users * 100).rename("ownership_rate")
 
 # Top 20 Spiele mit höchster Ownership-Rate
-top_20_rates = ownership_rates.head(20)
+top_20_rates = top_rows(ownership_rates.to_frame(), "ownership_rate", 20)["ownership_rate"]
 
 # Diagramm
 plt.figure(figsize=(10, 6))
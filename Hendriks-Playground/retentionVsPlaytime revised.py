@@ -1,7 +1,12 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import retention_table
+
 # =========================
 # Daten einlesen
 # =========================
@@ -12,30 +17,17 @@ df = pd.read_csv(
 # =========================
 # Daten vorbereiten
 # =========================
-purchases = df[df["Action"] == "purchase"][["UserID", "Game"]]
-play_data = df[df["Action"] == "play"][["UserID", "Game", "Value"]]
-
-games_analysis = []
-for game in purchases["Game"].unique():
-    buyers = purchases[purchases["Game"] == game]["UserID"].nunique()
-    players = play_data[play_data["Game"] == game]["UserID"].nunique()
-    retention_rate = (players / buyers * 100) if buyers > 0 else 0
-    avg_playtime = (
-        play_data[play_data["Game"] == game]["Value"].mean() if players > 0 else 0
-    )
-
-    games_analysis.append(
-        {
-            "game": game,
-            "retention_rate": retention_rate,
-            "avg_playtime": avg_playtime,  # Minuten
-            "buyers": buyers,
-            "players": players,
-        }
-    )
-
-games_df = pd.DataFrame(games_analysis)
-filtered_games = games_df[games_df["buyers"] >= 100].copy()
+# Käufer, Spieler, Retention, Ø-Spielzeit, Retention-Kategorie und Quadrant
+# für alle Spiele in einem Durchgang (statt einer Schleife über alle Spiele)
+filtered_games = retention_table(
+    df,
+    min_buyers=100,
+    bounds=(40, 90),
+    user="UserID",
+    game="Game",
+    behavior="Action",
+    hours="Value",
+)
 
 # =========================
 # Spiele mit >150h Ø-Spielzeit (9000 Min.) anzeigen
@@ -52,21 +44,6 @@ else:
         print(f"{row['game']} — {row['avg_playtime'] / 60:.1f}h")
 
 
-# =========================
-# Kategorien für Retention definieren
-# =========================
-def categorize_retention(rate):
-    if rate < 40:
-        return "Niedrig (<40%)"
-    elif rate <= 90:
-        return "Mittel (40-90%)"
-    else:
-        return "Hoch (>90%)"
-
-
-filtered_games["retention_category"] = filtered_games["retention_rate"].apply(
-    categorize_retention
-)
 colors = {"Niedrig (<40%)": "red", "Mittel (40-90%)": "orange", "Hoch (>90%)": "green"}
 
 # =========================
@@ -129,25 +106,8 @@ plt.tight_layout()
 plt.show()
 
 # =========================
-# Quadrantenanalyse
+# Quadrantenanalyse (Spalte quadrant aus retention_table)
 # =========================
-filtered_games["quadrant"] = np.where(
-    (filtered_games["retention_rate"] >= median_retention)
-    & (filtered_games["avg_playtime"] >= median_playtime),
-    "Oben Rechts",
-    np.where(
-        (filtered_games["retention_rate"] >= median_retention)
-        & (filtered_games["avg_playtime"] < median_playtime),
-        "Oben Links",
-        np.where(
-            (filtered_games["retention_rate"] < median_retention)
-            & (filtered_games["avg_playtime"] >= median_playtime),
-            "Unten Rechts",
-            "Unten Links",
-        ),
-    ),
-)
-
 print("\n=== Verteilung der Spiele auf die 4 Quadranten ===")
 quadrant_summary = (
     filtered_games.groupby("quadrant")
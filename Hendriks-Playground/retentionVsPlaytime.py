@@ -1,53 +1,34 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import load_events, retention_table
+
 # Daten einlesen
-df = pd.read_csv(
-    "steam-200k.csv", header=None, names=["UserID", "Game", "Action", "Value", "Other"]
+df = load_events("steam-200k.csv").rename(
+    columns={
+        "user_id": "UserID",
+        "game": "Game",
+        "behavior": "Action",
+        "hours": "Value",
+    }
 )
 
-# Vorbereitung der Daten für Engagement vs. Retention
-purchases = df[df["Action"] == "purchase"][["UserID", "Game"]]
-play_data = df[df["Action"] == "play"][["UserID", "Game", "Value"]]
-
-# Für jedes Spiel berechnen
-games_analysis = []
-for game in purchases["Game"].unique():
-    buyers = purchases[purchases["Game"] == game]["UserID"].nunique()
-    players = play_data[play_data["Game"] == game]["UserID"].nunique()
-    retention_rate = (players / buyers * 100) if buyers > 0 else 0
-    avg_playtime = (
-        play_data[play_data["Game"] == game]["Value"].mean() if players > 0 else 0
-    )
-
-    games_analysis.append(
-        {
-            "game": game,
-            "retention_rate": retention_rate,
-            "avg_playtime": avg_playtime,
-            "buyers": buyers,
-            "players": players,
-        }
-    )
-
-games_df = pd.DataFrame(games_analysis)
-filtered_games = games_df[games_df["buyers"] >= 100]
-
-
-# Kategorien für Retention definieren
-def categorize_retention(rate):
-    if rate < 40:
-        return "Niedrig (<40%)"
-    elif rate <= 80:
-        return "Mittel (40-80%)"
-    else:
-        return "Hoch (>80%)"
-
-
-filtered_games["retention_category"] = filtered_games["retention_rate"].apply(
-    categorize_retention
+# Käufer, Spieler, Retention, Ø-Spielzeit, Retention-Kategorie und Quadrant
+# für alle Spiele in einem Durchgang (statt einer Schleife über alle Spiele)
+filtered_games = retention_table(
+    df,
+    min_buyers=100,
+    bounds=(40, 80),
+    user="UserID",
+    game="Game",
+    behavior="Action",
+    hours="Value",
 )
+
 colors = {"Niedrig (<40%)": "red", "Mittel (40-80%)": "orange", "Hoch (>80%)": "green"}
 
 # Diagramm erstellen
@@ -99,23 +80,6 @@ plt.legend()
 plt.tight_layout()
 plt.show()
 
-# Zusätzliche Analyse der Quadranten
-filtered_games["quadrant"] = np.where(
-    (filtered_games["retention_rate"] >= median_retention)
-    & (filtered_games["avg_playtime"] >= median_playtime),
-    "Oben Rechts",
-    np.where(
-        (filtered_games["retention_rate"] >= median_retention)
-        & (filtered_games["avg_playtime"] < median_playtime),
-        "Oben Links",
-        np.where(
-            (filtered_games["retention_rate"] < median_retention)
-            & (filtered_games["avg_playtime"] >= median_playtime),
-            "Unten Rechts",
-            "Unten Links",
-        ),
-    ),
-)
-
+# Zusätzliche Analyse der Quadranten (Spalte quadrant aus retention_table)
 print("\n=== Verteilung der Spiele auf die 4 Quadranten ===")
 quadrant_summary = filtered_games.groupby("quadrant").agg
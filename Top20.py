@@ -1,9 +1,154 @@
+"""
+Top-20-Listen aus einem vorberechneten Ranking-Index
+====================================================
+getTop20Dataframe(criterion, n, min_players) liefert die n besten Spiele
+nach einem Kriterium, ohne bei jeder Abfrage den ganzen Katalog zu
+sortieren (steamlib.ranking.RankingIndex, Teilauswahl per argpartition).
+
+    total_hours     Summe aller play-Stunden
+    players         eindeutige Spieler
+    success_score   Spieler mit > 3h (max. Stunden pro Spieler; Spielerzahl ×
+                    Bleiber-Anteil wie in Top20_Erfolg)
+    retention       Spieler / Käufer in % (retentionVsPlaytime)
+    engagement      Metascore/100 · log1p(Ø Spielzeit) (FinnsPlayground)
+    quality         0.6 · Metascore/100 + 0.4 · Userscore/10 (FinnsPlayground)
+
+Der Index wird beim ersten Aufruf gebaut (inkrementeller Aggregat-Zustand +
+Metacritic-Join über die Match-Tabelle) und danach wiederverwendet, solange
+Größe und mtime der Quelldateien gleich sind; nach Anhängen an die CSV (oder
+einer neuen Partition) wird er beim nächsten Aufruf neu gebaut.
+"""
+
+import os
+import sys
+
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from steamlib import (
+    IncrementalAggregate,
+    RankingIndex,
+    ThresholdIndex,
+    engagement_score,
+    file_fingerprint,
+    list_partitions,
+    load_metacritic,
+    match_titles,
+    metacritic_index,
+    open_titles,
+    quality_score,
+)
+
+CSV_PATH = "steam-200k.csv"
+META_PATH = "metacritic_games.csv"
+CRITERIA = (
+    "total_hours",
+    "players",
+    "success_score",
+    "retention",
+    "engagement",
+    "quality",
+)
+BLEIBER_HOURS = 3
+
+_INDEXES = {}
+
+
+def build_game_table(csv_path: str = CSV_PATH, meta_path: str = META_PATH):
+    """Eine Zeile pro Spiel mit allen Kriterien (Metacritic-Spalten, falls vorhanden)."""
+    state = IncrementalAggregate.open(csv_path, name="Top20")
+    state.refresh()
+    state.save()
+    games = state.game_table()
+    games = games[(games["play_rows"] > 0) | (games["buyers"] > 0)]
+    # Bleiber pro Spieler (dedupliziert), nicht pro play-Zeile – wie Top20_Erfolg
+    bleiber = ThresholdIndex(state.clean_table()).counts([BLEIBER_HOURS])
+    bleiber = bleiber[float(BLEIBER_HOURS)].rename(index=str)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table = pd.DataFrame(
+            {
+                "game": games.index.to_numpy(),
+                "players": games["players"].to_numpy(),
+                "buyers": games["buyers"].to_numpy(),
+                "total_hours": games["hours_sum"].to_numpy(),
+                "avg_playtime_hours": (
+                    games["hours_sum"] / games["play_rows"].replace(0, np.nan)
+                ).to_numpy(),
+                "success_score": bleiber.reindex(games.index, fill_value=0).to_numpy(),
+                "retention": (
+                    games["players"] / games["buyers"].replace(0, np.nan) * 100
+                ).to_numpy(),
+            }
+        )
+    table["engagement"] = np.nan
+    table["quality"] = np.nan
+    if not os.path.exists(meta_path):
+        return table
+
+    titles = open_titles(csv_path)
+    meta = load_metacritic(meta_path, titles=titles)
+    titles.save()
+    meta_index = metacritic_index(meta).rename_axis("meta_norm_id").reset_index()
+    table["meta_norm_id"] = match_titles(
+        titles.norm_ids(table["game"]), meta["norm_id"], titles
+    )
+    table = table.merge(
+        meta_index[["meta_norm_id", "metascore", "user_score"]],
+        on="meta_norm_id",
+        how="left",
+        validate="many_to_one",
+    )
+    matched = table["meta_norm_id"] >= 0
+    table["engagement"] = engagement_score(
+        table["metascore"], table["avg_playtime_hours"].fillna(0)
+    ).where(matched)
+    table["quality"] = quality_score(table["metascore"], table["user_score"]).where(
+        matched
+    )
+    return table.drop(columns="meta_norm_id")
+
+
+def _sources(csv_path: str, meta_path: str) -> tuple:
+    """(Pfad, Größe, mtime) aller Partitionen und der Metacritic-Datei."""
+    paths = list_partitions(csv_path)
+    if os.path.exists(meta_path):
+        paths.append(meta_path)
+    return tuple(
+        (os.path.abspath(p),) + tuple(file_fingerprint(p, with_hash=False).values())
+        for p in paths
+    )
+
+
+def ranking_index(csv_path: str = CSV_PATH, meta_path: str = META_PATH):
+    """
+    Ranking-Index pro (CSV, Metacritic) bauen und wiederverwenden, bis sich
+    eine der Quelldateien ändert (Größe/mtime), dann neu bauen.
+    """
+    key = (os.path.abspath(csv_path), os.path.abspath(meta_path))
+    sources = _sources(csv_path, meta_path)
+    cached = _INDEXES.get(key)
+    if cached is None or cached[0] != sources:
+        index = RankingIndex(build_game_table(csv_path, meta_path), CRITERIA)
+        cached = _INDEXES[key] = (sources, index)
+    return cached[1]
+
 
-def getTop20Dataframe():
-    return "Hi"
+def getTop20Dataframe(
+    criterion: str = "players",
+    n: int = 20,
+    min_players: int = 0,
+    csv_path: str = CSV_PATH,
+    meta_path: str = META_PATH,
+) -> pd.DataFrame:
+    """
+    Die n besten Spiele nach criterion (siehe CRITERIA), absteigend.
+    min_players: nur Spiele mit mindestens so vielen Spielern.
+    """
+    top = ranking_index(csv_path, meta_path).top(criterion, n, min_players)
+    top = top.reset_index(drop=True)
+    top.insert(0, "rank", np.arange(1, len(top) + 1))
+    return top
 
 
 GetTop20 = getTop20Dataframe
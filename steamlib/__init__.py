@@ -0,0 +1,123 @@
+"""
+steamlib – gemeinsame Lade- und Analysefunktionen für steam-200k.csv
+====================================================================
+Statt dass jedes Skript die CSV selbst parst, gehen alle über diese Module.
+Einbinden aus einem Playground-Unterordner:
+
+    import os, sys
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from steamlib import load_events
+"""
+
+from .cache import (
+    BEHAVIORS,
+    Events,
+    build_cache,
+    file_fingerprint,
+    list_partitions,
+    load_events,
+    open_events,
+)
+from .facts import Facts, load_facts, open_facts
+from .fuzzy import TitleIndex, fuzzy_match
+from .hll import DistinctCounter, count_distinct, distinct_benchmark
+from .incremental import (
+    IncrementalAggregate,
+    refresh_table,
+    write_csv_if_changed,
+    write_json_if_changed,
+)
+from .interactions import Interactions, build_interactions, open_interactions
+from .loader import STEAM_COLUMNS, STEAM_SCHEMA, load_clean, load_steam, read_steam_csv
+from .matches import MatchTable, match_titles, open_matches
+from .metacritic import PLATFORM_PRIORITY, load_metacritic, metacritic_index
+from .normalize import normalize_series, normalize_title
+from .ownership import owner_engagement, owner_engagement_table
+from .parallel import parse_parallel
+from .partitions import open_partitions
+from .ranking import RankingIndex, engagement_score, quality_score, top_order, top_rows
+from .retention import retention_table
+from .segments import (
+    Segment,
+    heavy_users,
+    owned_more_than,
+    owners_of,
+    user_universe,
+)
+from .sketch import QuantileSketch, compare_sketch, sketch_file
+from .sniff import read_csv_sniffed, sniff_csv
+from .stats import group_inequality, group_stats, segment_lorenz, segment_stats
+from .streaming import StreamAggregate, aggregate_stream
+from .thresholds import ThresholdIndex, threshold_shares
+from .titles import TitleDictionary, open_titles
+from .validation import ValidationReport, validation_report
+
+__all__ = [
+    "BEHAVIORS",
+    "DistinctCounter",
+    "Events",
+    "Facts",
+    "IncrementalAggregate",
+    "Interactions",
+    "MatchTable",
+    "PLATFORM_PRIORITY",
+    "QuantileSketch",
+    "RankingIndex",
+    "STEAM_COLUMNS",
+    "STEAM_SCHEMA",
+    "Segment",
+    "StreamAggregate",
+    "ThresholdIndex",
+    "TitleDictionary",
+    "TitleIndex",
+    "ValidationReport",
+    "aggregate_stream",
+    "build_cache",
+    "build_interactions",
+    "compare_sketch",
+    "count_distinct",
+    "distinct_benchmark",
+    "engagement_score",
+    "file_fingerprint",
+    "fuzzy_match",
+    "group_inequality",
+    "group_stats",
+    "heavy_users",
+    "list_partitions",
+    "load_clean",
+    "load_events",
+    "load_facts",
+    "load_metacritic",
+    "load_steam",
+    "match_titles",
+    "metacritic_index",
+    "normalize_series",
+    "normalize_title",
+    "open_events",
+    "open_facts",
+    "open_interactions",
+    "open_matches",
+    "open_partitions",
+    "open_titles",
+    "owned_more_than",
+    "owner_engagement",
+    "owner_engagement_table",
+    "owners_of",
+    "parse_parallel",
+    "quality_score",
+    "read_steam_csv",
+    "read_csv_sniffed",
+    "refresh_table",
+    "retention_table",
+    "segment_lorenz",
+    "segment_stats",
+    "sketch_file",
+    "sniff_csv",
+    "threshold_shares",
+    "top_order",
+    "top_rows",
+    "user_universe",
+    "validation_report",
+    "write_csv_if_changed",
+    "write_json_if_changed",
+]
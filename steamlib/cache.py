@@ -0,0 +1,397 @@
+"""
+Spaltenbasierter Binär-Cache für steam-200k.csv
+===============================================
+Die CSV wird genau einmal geparst und spaltenweise als Rohbinärdateien
+abgelegt, die danach per np.memmap ohne erneutes Text-Parsing geöffnet werden:
+- user_id  -> uint32
+- game     -> int32-game_id aus dem globalen Titel-Wörterbuch (titles.py);
+              games.json enthält den Stand des Wörterbuchs beim Bauen
+- behavior -> int8-Enum (Index in BEHAVIORS, -1 = unbekannt)
+- hours    -> float32
+Die fünfte CSV-Spalte (nur 0en) wird nur geprüft, nicht übernommen; ungültige
+Zeilen landen in der Quarantäne statt im Cache (siehe validation.py).
+Der Cache wird neu gebaut, sobald sich Größe, mtime oder Inhalt (BLAKE2b-Hash)
+der Quelldatei ändern oder das Titel-Wörterbuch neu angelegt wurde.
+Statt einer Datei kann auch ein Verzeichnis oder ein Glob mit mehreren
+(ggf. gz/bz2/xz-komprimierten) Partitionen angegeben werden; jede Partition
+bekommt dann ihren eigenen Cache (siehe partitions.py).
+"""
+
+import glob
+import hashlib
+import itertools
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .titles import TitleDictionary, open_titles
+
+CACHE_VERSION = 4
+CHUNK_ROWS = 1_000_000
+HASH_BLOCK = 1 << 20
+
+RAW_COLUMNS = ["user_id", "game", "behavior", "hours", "other"]
+BEHAVIORS = ("purchase", "play")
+COLUMN_DTYPES = {
+    "user_id": np.dtype("<u4"),
+    "game": np.dtype("<i4"),
+    "behavior": np.dtype("i1"),
+    "hours": np.dtype("<f4"),
+}
+
+# Zahlenspalten ohne festen Typ: sauber gelesen sind sie int64/float64,
+# ein kaputter Wert ("abc") macht nur diesen Chunk zu object statt das
+# Einlesen abzubrechen; validation.coerce_chunk wandelt um und meldet ihn
+RAW_READ_OPTIONS = {
+    "header": None,
+    "names": RAW_COLUMNS,
+    "usecols": [0, 1, 2, 3, 4],
+    "dtype": {
+        "game": "category",
+        "behavior": "category",
+    },
+}
+
+PARTITION_SUFFIXES = (".csv", ".csv.gz", ".csv.bz2", ".csv.xz")
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz")
+
+MANIFEST_FILE = "manifest.json"
+GAMES_FILE = "games.json"
+
+
+@dataclass
+class Events:
+    """Spalten eines Steam-Event-Logs als (memory-mapped) numpy-Arrays."""
+
+    user_id: np.ndarray
+    game: np.ndarray
+    behavior: np.ndarray
+    hours: np.ndarray
+    games: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.user_id)
+
+    def behavior_code(self, name: str) -> int:
+        return BEHAVIORS.index(name)
+
+    def to_frame(self, mask=None) -> pd.DataFrame:
+        """DataFrame mit user_id, game (category), behavior (category), hours."""
+        sel = slice(None) if mask is None else mask
+        return pd.DataFrame(
+            {
+                "user_id": np.asarray(self.user_id[sel]),
+                "game": pd.Categorical.from_codes(
+                    np.asarray(self.game[sel]), categories=self.games, validate=False
+                ),
+                "behavior": pd.Categorical.from_codes(
+                    np.asarray(self.behavior[sel]),
+                    categories=list(BEHAVIORS),
+                    validate=False,
+                ),
+                "hours": np.asarray(self.hours[sel]),
+            }
+        )
+
+
+def is_partitioned(source: str) -> bool:
+    """Verzeichnis oder Glob-Muster statt einer einzelnen Datei?"""
+    source = os.fspath(source)
+    return os.path.isdir(source) or glob.has_magic(source)
+
+
+def is_compressed(path: str) -> bool:
+    return os.fspath(path).lower().endswith(COMPRESSED_SUFFIXES)
+
+
+def list_partitions(source: str) -> list:
+    """
+    Partitionsdateien, sortiert nach Pfad.
+    Verzeichnis: alle *.csv[.gz|.bz2|.xz] darin; Glob: alle passenden Dateien.
+    """
+    source = os.fspath(source)
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.lower().endswith(PARTITION_SUFFIXES) and not name.startswith(".")
+        ]
+    elif glob.has_magic(source):
+        paths = glob.glob(source)
+    else:
+        paths = [source]
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def default_cache_dir(csv_path: str) -> str:
+    """<datei>.cache; bei Partitionen ein Sammelverzeichnis im Basisordner."""
+    csv_path = os.fspath(csv_path)
+    if not is_partitioned(csv_path):
+        return csv_path + ".cache"
+    base = csv_path
+    while glob.has_magic(base):
+        base = os.path.dirname(base)
+    tag = hashlib.blake2b(
+        os.path.abspath(csv_path).encode("utf-8"), digest_size=4
+    ).hexdigest()
+    return os.path.join(base or ".", f".partitions-{tag}.cache")
+
+
+def hash_file(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_fingerprint(path: str, with_hash: bool = True) -> dict:
+    st = os.stat(path)
+    fp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if with_hash:
+        fp["blake2b"] = hash_file(path)
+    return fp
+
+
+def read_manifest(cache_dir: str):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(cache_dir: str, manifest: dict) -> None:
+    tmp = os.path.join(cache_dir, MANIFEST_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(cache_dir, MANIFEST_FILE))
+
+
+def cache_is_fresh(
+    csv_path: str, cache_dir: str, verify_hash: bool = False, titles_token: str = None
+) -> bool:
+    """
+    Prüft, ob der Cache zur Quelldatei (und zum Titel-Wörterbuch) passt.
+    - andere Größe -> veraltet
+    - gleiche mtime -> aktuell (bei verify_hash=True zusätzlich Hash-Vergleich)
+    - andere mtime -> Hash entscheidet; bei gleichem Inhalt wird nur die mtime
+      im Manifest nachgezogen, statt neu zu parsen
+    """
+    manifest = read_manifest(cache_dir)
+    if not manifest or manifest.get("version") != CACHE_VERSION:
+        return False
+    if titles_token is not None and manifest.get("titles_token") != titles_token:
+        return False
+    src = manifest["source"]
+    st = os.stat(csv_path)
+    if st.st_size != src["size"]:
+        return False
+    if st.st_mtime_ns == src["mtime_ns"] and not verify_hash:
+        return True
+    if hash_file(csv_path) != src["blake2b"]:
+        return False
+    if st.st_mtime_ns != src["mtime_ns"]:
+        src["mtime_ns"] = st.st_mtime_ns
+        write_manifest(cache_dir, manifest)
+    return True
+
+
+def read_raw_chunks(csv_path: str, chunk_rows: int = CHUNK_ROWS):
+    """
+    Liest die Roh-CSV chunkweise mit festen Typen (ohne 5. Spalte).
+    Komprimierte Dateien werden beim Lesen entpackt; bei Verzeichnis/Glob
+    kommen die Chunks aller Partitionen nacheinander.
+    """
+    if is_partitioned(csv_path):
+        return itertools.chain.from_iterable(
+            read_raw_chunks(path, chunk_rows) for path in list_partitions(csv_path)
+        )
+    return pd.read_csv(csv_path, chunksize=chunk_rows, **RAW_READ_OPTIONS)
+
+
+def encode_categories(cat: pd.Categorical, lookup, append: bool = True):
+    """
+    Übersetzt die chunk-lokalen Kategorien in globale Codes.
+    lookup ist ein dict oder ein TitleDictionary. Neue Werte werden
+    (bei append=True) hinten angehängt; NaN -> -1.
+    """
+    if isinstance(lookup, TitleDictionary):
+        local = lookup.lookup_ids(cat.categories, append)
+    else:
+        local = np.empty(len(cat.categories), dtype=np.int32)
+        for i, value in enumerate(cat.categories):
+            code = lookup.get(value)
+            if code is None:
+                if not append:
+                    code = -1
+                else:
+                    code = len(lookup)
+                    lookup[value] = code
+            local[i] = code
+    codes = np.asarray(cat.codes)
+    out = np.full(len(codes), -1, dtype=np.int32)
+    valid = codes >= 0
+    out[valid] = local[codes[valid]]
+    return out
+
+
+def encode_chunk(chunk: pd.DataFrame, game_lookup) -> dict:
+    """Wandelt einen geparsten CSV-Chunk in die Cache-Spalten um."""
+    user_id = chunk["user_id"].to_numpy()
+    if len(user_id) and (user_id.min() < 0 or user_id.max() > np.iinfo(np.uint32).max):
+        raise ValueError("user_id außerhalb des uint32-Bereichs.")
+    behavior_lookup = {name: i for i, name in enumerate(BEHAVIORS)}
+    return {
+        "user_id": user_id.astype(COLUMN_DTYPES["user_id"]),
+        "game": encode_categories(chunk["game"].array, game_lookup),
+        "behavior": encode_categories(
+            chunk["behavior"].array, behavior_lookup, append=False
+        ).astype(COLUMN_DTYPES["behavior"]),
+        "hours": chunk["hours"].to_numpy(dtype=COLUMN_DTYPES["hours"]),
+    }
+
+
+def build_cache(
+    csv_path: str,
+    cache_dir: str = None,
+    chunk_rows: int = CHUNK_ROWS,
+    titles: TitleDictionary = None,
+    workers: int = 1,
+) -> str:
+    """
+    Parst die CSV und schreibt die Binärspalten + Manifest.
+    workers: 1 = chunkweise im Hauptprozess, None = alle Kerne (ab
+    ~128 MB, siehe parallel.py), n > 1 = n Prozesse über Byte-Bereiche.
+    Beide Wege teilen die Datei gleich auf und liefern dieselben game_ids.
+    chunk_rows gilt nur für komprimierte Dateien.
+    """
+    from .parallel import iter_parsed_parts, read_raw_parts, resolve_workers
+
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    titles = titles if titles is not None else open_titles(csv_path)
+    fingerprint = file_fingerprint(csv_path)
+    report = new_report(cache_dir)
+    if resolve_workers(csv_path, workers) == 1:
+        parts = (
+            encode_chunk(report.filter(chunk), titles)
+            for chunk in read_raw_parts(csv_path, chunk_rows=chunk_rows)
+        )
+    else:
+        parts = iter_parsed_parts(csv_path, titles, workers, report=report)
+    return write_cache(cache_dir, parts, titles, fingerprint, report)
+
+
+def new_report(cache_dir: str):
+    """Leerer Validierungsbericht, der in cache_dir/quarantine.csv schreibt."""
+    from .validation import QUARANTINE_FILE, ValidationReport
+
+    os.makedirs(cache_dir, exist_ok=True)
+    return ValidationReport(os.path.join(cache_dir, QUARANTINE_FILE))
+
+
+def write_cache(
+    cache_dir: str, parts, titles: TitleDictionary, fingerprint: dict, report
+) -> str:
+    """
+    Schreibt kodierte Spalten-Dicts (game = globale game_id) als Cache.
+    report (ValidationReport) wird beim Durchlaufen von parts gefüllt und
+    danach als validation.json abgelegt.
+    """
+    from .validation import VALIDATION_FILE
+
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)  # halbfertiger Cache darf nie als gültig gelten
+
+    rows = 0
+    files = {
+        name: open(os.path.join(cache_dir, name + ".bin"), "wb")
+        for name in COLUMN_DTYPES
+    }
+    try:
+        for cols in parts:
+            for name, arr in cols.items():
+                files[name].write(np.ascontiguousarray(arr).tobytes())
+            rows += len(cols["user_id"])
+    finally:
+        for f in files.values():
+            f.close()
+
+    if titles.path is not None:
+        titles.save()
+    with open(os.path.join(cache_dir, GAMES_FILE), "w", encoding="utf-8") as f:
+        json.dump(titles.raw, f, ensure_ascii=False)
+    report.save(os.path.join(cache_dir, VALIDATION_FILE))
+    write_manifest(
+        cache_dir,
+        {
+            "version": CACHE_VERSION,
+            "titles_token": titles.token,
+            "source": fingerprint,
+            "rows": rows,
+            "columns": {name: dt.str for name, dt in COLUMN_DTYPES.items()},
+            "behaviors": list(BEHAVIORS),
+        },
+    )
+    return cache_dir
+
+
+def open_cache(cache_dir: str) -> Events:
+    """Öffnet einen fertigen Cache read-only per memmap."""
+    manifest = read_manifest(cache_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Kein gültiger Cache in: {cache_dir}")
+    rows = manifest["rows"]
+    cols = {}
+    for name, dt in manifest["columns"].items():
+        path = os.path.join(cache_dir, name + ".bin")
+        cols[name] = (
+            np.memmap(path, dtype=np.dtype(dt), mode="r", shape=(rows,))
+            if rows
+            else np.empty(0, dtype=np.dtype(dt))
+        )
+    with open(os.path.join(cache_dir, GAMES_FILE), encoding="utf-8") as f:
+        games = np.array(json.load(f), dtype=object)
+    return Events(games=games, **cols)
+
+
+def open_events(
+    csv_path: str,
+    cache_dir: str = None,
+    rebuild: bool = False,
+    verify_hash: bool = False,
+    titles: TitleDictionary = None,
+    workers: int = None,
+) -> Events:
+    """
+    Liefert die Events aus dem Cache und baut ihn bei Bedarf (neu).
+    workers wird an build_cache weitergereicht (None = automatisch).
+    """
+    if is_partitioned(csv_path):
+        from .partitions import open_partitions
+
+        return open_partitions(
+            csv_path, cache_dir, rebuild, verify_hash, titles=titles, workers=workers
+        )
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Datei nicht gefunden: {csv_path}")
+    cache_dir = cache_dir or default_cache_dir(csv_path)
+    titles = titles if titles is not None else open_titles(csv_path)
+    fresh = cache_is_fresh(
+        csv_path, cache_dir, verify_hash=verify_hash, titles_token=titles.token
+    )
+    if rebuild or not fresh:
+        build_cache(csv_path, cache_dir, titles=titles, workers=workers)
+    return open_cache(cache_dir)
+
+
+def load_events(
+    csv_path: str, cache_dir: str = None, titles: TitleDictionary = None
+) -> pd.DataFrame:
+    """Alle Events als DataFrame (user_id, game, behavior, hours) aus dem Cache."""
+    return open_events(csv_path, cache_dir, titles=titles).to_frame()
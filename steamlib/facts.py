@@ -0,0 +1,229 @@
+"""
+Deduplizierte Faktentabelle pro (user_id, game_id)
+==================================================
+Die Skripte fassen doppelte (user, game)-play-Zeilen unterschiedlich
+zusammen (load_clean: max, FinnsPlayground2/ownershiprate: sum, viele
+Charly-/Hendrik-Skripte gar nicht – dort sind "Spieler" eigentlich Zeilen).
+Hier wird einmal aus dem Event-Cache eine Zeile pro Paar gebaut:
+
+    user_id    uint32
+    game_id    int32     globale ID aus dem Titel-Wörterbuch
+    hours_max  float32   max. Spielzeit der play-Zeilen (NaN ohne play)
+    hours_sum  float32   Summe der Spielzeit der play-Zeilen (NaN ohne play)
+    rows       int32     Anzahl Zeilen insgesamt (purchase + play)
+    play_rows  int32     davon play-Zeilen
+    purchased  bool      es gibt eine purchase-Zeile
+    played     bool      es gibt eine play-Zeile
+
+Gebaut per Sortierung nach dem 64-Bit-Schlüssel (user_id << 32 | game_id)
+und segmentierter Reduktion (ufunc.reduceat über die Segmentgrenzen), ohne
+groupby/Hash-Tabelle. Abgelegt als .npy-Dateien in <cache>/facts/ neben dem
+Event-Cache, danach per memmap geöffnet; neu gebaut, wenn sich Quelle oder
+Titel-Wörterbuch ändern. Sortiert nach (user_id, game_id).
+hours_max ist exakt der Wert einer Zeile. hours_sum wird in float64
+summiert und erst dann auf float32 gerundet; bei mehreren play-Zeilen pro
+Paar kann das in der letzten float32-Stelle von einem groupby-sum über die
+float32-Spalte abweichen (pandas summiert dort kompensiert in float32).
+"""
+
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .cache import BEHAVIORS, default_cache_dir, open_events, read_manifest
+from .streaming import pair_keys
+from .titles import TitleDictionary, open_titles
+
+FACTS_VERSION = 1
+FACTS_DIR = "facts"
+FACT_SCHEMA = {
+    "user_id": "uint32",
+    "game_id": "int32",
+    "hours_max": "float32",
+    "hours_sum": "float32",
+    "rows": "int32",
+    "play_rows": "int32",
+    "purchased": "bool",
+    "played": "bool",
+}
+FACT_COLUMNS = list(FACT_SCHEMA)
+FRAME_COLUMNS = ["user_id", "game"] + FACT_COLUMNS[1:]
+
+
+@dataclass
+class Facts:
+    """Spalten der Faktentabelle als (memory-mapped) numpy-Arrays."""
+
+    user_id: np.ndarray
+    game_id: np.ndarray
+    hours_max: np.ndarray
+    hours_sum: np.ndarray
+    rows: np.ndarray
+    play_rows: np.ndarray
+    purchased: np.ndarray
+    played: np.ndarray
+    games: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.user_id)
+
+    @property
+    def n_users(self) -> int:
+        """Anzahl verschiedener User (user_id ist sortiert)."""
+        user_id = np.asarray(self.user_id)
+        return int(len(user_id) > 0) + int((user_id[1:] != user_id[:-1]).sum())
+
+    def to_frame(self, mask=None, columns=None) -> pd.DataFrame:
+        """
+        DataFrame mit user_id, game (category) und den Faktenspalten,
+        sortiert nach (user_id, game) wie ein groupby(["user_id", "game"]).
+        """
+        columns = FRAME_COLUMNS if columns is None else list(columns)
+        unknown = [c for c in columns if c not in FRAME_COLUMNS]
+        if unknown:
+            raise KeyError(f"Unbekannte Spalten: {unknown} (erlaubt: {FRAME_COLUMNS})")
+        sel = slice(None) if mask is None else mask
+        game_id = np.asarray(self.game_id[sel])
+        user_id = np.asarray(self.user_id[sel])
+        # Kategorien wie im Loader: nur vorkommende Titel, alphabetisch
+        used = np.unique(game_id)
+        titles = self.games[used]
+        alpha = np.argsort(titles.astype(str), kind="stable")
+        rank = np.empty(len(used), dtype=np.int32)
+        rank[alpha] = np.arange(len(used), dtype=np.int32)
+        codes = rank[np.searchsorted(used, game_id)]
+        order = np.lexsort((codes, user_id))
+        data = {}
+        for c in columns:
+            if c == "game":
+                data[c] = pd.Categorical.from_codes(
+                    codes[order], categories=titles[alpha], validate=False
+                )
+            elif c == "user_id":
+                data[c] = user_id[order]
+            elif c == "game_id":
+                data[c] = game_id[order]
+            else:
+                data[c] = np.asarray(getattr(self, c)[sel])[order]
+        return pd.DataFrame(data)
+
+
+def reduce_events(
+    user_id: np.ndarray,
+    game: np.ndarray,
+    behavior: np.ndarray,
+    hours: np.ndarray,
+) -> dict:
+    """Eine Zeile pro (user_id, game): sortieren, dann reduceat pro Segment."""
+    keys = pair_keys(np.asarray(user_id), np.asarray(game))
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    if len(keys) == 0:
+        return {name: np.zeros(0, dtype=dtype) for name, dtype in FACT_SCHEMA.items()}
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    behavior = np.asarray(behavior)[order]
+    play = behavior == BEHAVIORS.index("play")
+    hours = np.asarray(hours, dtype=np.float64)[order]
+    timed = play & ~np.isnan(hours)
+
+    play_rows = np.add.reduceat(play.astype(np.int32), starts)
+    timed_rows = np.add.reduceat(timed.astype(np.int32), starts)
+    purchases = np.add.reduceat(
+        (behavior == BEHAVIORS.index("purchase")).astype(np.int32), starts
+    )
+    hours_max = np.fmax.reduceat(np.where(timed, hours, np.nan), starts)
+    hours_sum = np.add.reduceat(np.where(timed, hours, 0.0), starts)
+    hours_sum[timed_rows == 0] = np.nan
+
+    first = keys[starts]
+    return {
+        "user_id": (first >> np.uint64(32)).astype(np.uint32),
+        "game_id": (first & np.uint64(0xFFFFFFFF)).astype(np.int32),
+        "hours_max": hours_max.astype(np.float32),
+        "hours_sum": hours_sum.astype(np.float32),
+        "rows": np.diff(np.append(starts, len(keys))).astype(np.int32),
+        "play_rows": play_rows,
+        "purchased": purchases > 0,
+        "played": play_rows > 0,
+    }
+
+
+def build_facts(
+    csv_path: str, out_dir: str = None, titles: TitleDictionary = None
+) -> str:
+    """Baut die Faktentabelle aus dem Event-Cache und legt sie als .npy ab."""
+    titles = titles if titles is not None else open_titles(csv_path)
+    events = open_events(csv_path, titles=titles)
+    out_dir = out_dir or os.path.join(default_cache_dir(csv_path), FACTS_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)  # halbfertige Tabelle darf nie als gültig gelten
+
+    facts = reduce_events(events.user_id, events.game, events.behavior, events.hours)
+    for name, arr in facts.items():
+        np.save(os.path.join(out_dir, name + ".npy"), arr)
+    source = read_manifest(default_cache_dir(csv_path))
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": FACTS_VERSION,
+                "source_blake2b": source["source"]["blake2b"],
+                "titles_token": titles.token,
+                "events": len(events),
+                "pairs": len(facts["user_id"]),
+                "duplicates": int((facts["play_rows"] > 1).sum()),
+            },
+            f,
+            indent=2,
+        )
+    return out_dir
+
+
+def open_facts(
+    csv_path: str, out_dir: str = None, titles: TitleDictionary = None
+) -> Facts:
+    """Öffnet die gespeicherte Faktentabelle per memmap; baut sie bei Bedarf neu."""
+    titles = titles if titles is not None else open_titles(csv_path)
+    events = open_events(csv_path, titles=titles)  # hält den Event-Cache aktuell
+    out_dir = out_dir or os.path.join(default_cache_dir(csv_path), FACTS_DIR)
+    manifest = read_manifest(out_dir)
+    source = read_manifest(default_cache_dir(csv_path))
+    if (
+        manifest is None
+        or manifest.get("version") != FACTS_VERSION
+        or manifest.get("source_blake2b") != source["source"]["blake2b"]
+        or manifest.get("titles_token") != titles.token
+    ):
+        build_facts(csv_path, out_dir, titles=titles)
+    arrays = {
+        name: np.load(os.path.join(out_dir, name + ".npy"), mmap_mode="r")
+        for name in FACT_COLUMNS
+    }
+    return Facts(games=events.games, **arrays)
+
+
+def load_facts(
+    csv_path: str,
+    behavior: str = None,
+    columns=None,
+    titles: TitleDictionary = None,
+) -> pd.DataFrame:
+    """
+    Faktentabelle als DataFrame (eine Zeile pro user_id × game).
+    behavior: "play" (nur gespielte Paare), "purchase" (nur gekaufte) oder None.
+    columns:  Teilmenge von user_id, game, game_id, hours_max, hours_sum,
+              rows, play_rows, purchased, played (Default: alle).
+    """
+    if behavior is not None and behavior not in BEHAVIORS:
+        raise ValueError(f"Unbekanntes behavior: {behavior!r} (erlaubt: {BEHAVIORS})")
+    facts = open_facts(csv_path, titles=titles)
+    if behavior is None:
+        mask = None
+    else:
+        flags = facts.played if behavior == "play" else facts.purchased
+        mask = np.flatnonzero(np.asarray(flags))
+    return facts.to_frame(mask, columns)
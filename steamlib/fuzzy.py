@@ -0,0 +1,196 @@
+"""
+Indexierter Fuzzy-Abgleich von Spieltiteln
+==========================================
+Ersatz für difflib.get_close_matches in einer Schleife (O(N·M) reine
+Python-Vergleiche). Ähnlichkeit = Dice-Koeffizient der Zeichen-Trigramme
+(Titel mit je einem Leerzeichen aufgefüllt):
+
+    score = 2 · |gemeinsame Trigramme| / (|Trigramme a| + |Trigramme b|)
+
+- Blocking: invertierter Index Trigramm -> Titel. Pro Anfrage werden nur die
+  seltensten Trigramme nachgeschlagen (Prefix-Filter); die Anzahl ist so
+  gewählt, dass kein Kandidat mit score >= cutoff verloren geht.
+- Scoring: alle Kandidatenpaare eines Batches werden mit numpy auf einmal
+  bewertet (searchsorted auf (Titel, Trigramm)-Schlüsseln).
+- Parallel: große Anfragemengen werden in Batches auf Prozesse verteilt
+  ("fork", siehe parallel.py); der Index wird dabei nicht kopiert.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .parallel import pool_context
+
+NGRAM = 3
+FUZZY_CUTOFF = 0.85
+BATCH_QUERIES = 2000
+PARALLEL_MIN_QUERIES = 4 * BATCH_QUERIES
+
+_WORKER_INDEX = None  # Index für die geforkten Worker
+
+
+def ngrams(text: str, n: int = NGRAM) -> set:
+    """Zeichen-n-Gramme von ' text ' (leerer Text -> leere Menge)."""
+    if not text:
+        return set()
+    padded = f" {text} "
+    return {padded[i : i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+
+class TitleIndex:
+    """Trigramm-Index über die Vergleichstitel (z.B. alle Metacritic-Titel)."""
+
+    def __init__(self, titles, n: int = NGRAM):
+        self.n = n
+        self.titles = np.asarray(list(titles), dtype=object)
+        self.vocab = {}
+        rows, grams = [], []
+        for i, title in enumerate(self.titles):
+            ids = [self.vocab.setdefault(g, len(self.vocab)) for g in ngrams(title, n)]
+            rows.extend([i] * len(ids))
+            grams.extend(ids)
+        rows = np.asarray(rows, dtype=np.int64)
+        grams = np.asarray(grams, dtype=np.int64)
+        n_titles, n_grams = len(self.titles), len(self.vocab)
+        self.sizes = np.bincount(rows, minlength=n_titles)
+        # sortierte Schlüssel Titel·V + Trigramm für Mitgliedschaftstests
+        self.keys = np.sort(rows * n_grams + grams)
+        # Postings: Trigramm -> Titel (CSR)
+        order = np.argsort(grams, kind="stable")
+        self.posting_titles = rows[order]
+        counts = np.bincount(grams, minlength=n_grams)
+        self.posting_ptr = np.concatenate([[0], np.cumsum(counts)])
+        self.df = counts
+
+    def _encode(self, query: str):
+        """(alle bekannten Trigramm-IDs nach Seltenheit, Anzahl Trigramme)."""
+        grams = ngrams(query, self.n)
+        ids = np.array(
+            [self.vocab[g] for g in grams if g in self.vocab], dtype=np.int64
+        )
+        return ids[np.argsort(self.df[ids], kind="stable")], len(grams)
+
+    def match(self, queries, cutoff: float = FUZZY_CUTOFF, workers: int = None):
+        """
+        Bester Titel pro Anfrage.
+        Rückgabe: (Index in self.titles oder -1, score) als Arrays.
+        """
+        queries = list(queries)
+        batches = [
+            queries[i : i + BATCH_QUERIES]
+            for i in range(0, len(queries), BATCH_QUERIES)
+        ]
+        if workers is None:
+            workers = 1 if len(queries) < PARALLEL_MIN_QUERIES else None
+        ctx = pool_context()
+        if workers == 1 or ctx is None or len(batches) < 2:
+            results = [self._match_batch(b, cutoff) for b in batches]
+        else:
+            global _WORKER_INDEX
+            _WORKER_INDEX = self
+            try:
+                with ProcessPoolExecutor(workers, mp_context=ctx) as pool:
+                    results = list(
+                        pool.map(_match_batch, batches, [cutoff] * len(batches))
+                    )
+            finally:
+                _WORKER_INDEX = None
+        if not results:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        best = np.concatenate([r[0] for r in results])
+        score = np.concatenate([r[1] for r in results])
+        return best, score
+
+    def _match_batch(self, queries, cutoff: float):
+        m = len(queries)
+        best = np.full(m, -1, dtype=np.int64)
+        score = np.zeros(m)
+        encoded = [self._encode(q) for q in queries]
+        q_sizes = np.array([size for _, size in encoded], dtype=np.int64)
+
+        # 1) Blocking: Prefix der seltensten Trigramme -> Kandidaten
+        #    score >= c  =>  gemeinsame >= need = c·|q| / (2 - c)
+        n_known = np.array([len(ids) for ids, _ in encoded], dtype=np.int64)
+        need = np.maximum(
+            np.ceil(cutoff * q_sizes / (2 - cutoff) - 1e-9).astype(np.int64), 1
+        )
+        prefix = np.maximum(n_known - need + 1, 0)
+        if not prefix.any():
+            return best, score
+        flat = np.concatenate([ids for ids, _ in encoded])
+        ptr = np.concatenate([[0], np.cumsum(n_known)])
+        q_rep = np.repeat(np.arange(m), prefix)
+        g_rep = flat[_ranges(ptr[:-1], prefix)]
+        lens = self.df[g_rep]
+        cand = self.posting_titles[_ranges(self.posting_ptr[g_rep], lens)]
+        pairs, hits = np.unique(
+            np.repeat(q_rep, lens) * len(self.titles) + cand, return_counts=True
+        )
+        pair_q, pair_c = np.divmod(pairs, len(self.titles))
+
+        # Längenfilter: score >= c  =>  c·|q|/(2-c) <= |t| <= (2-c)·|q|/c
+        # Schranke: Prefix-Treffer + alle übrigen Trigramme der Anfrage
+        qs, ts = q_sizes[pair_q], self.sizes[pair_c]
+        rest = n_known[pair_q] - prefix[pair_q]
+        keep = (
+            (ts * (2 - cutoff) >= cutoff * qs - 1e-9)
+            & (ts * cutoff <= (2 - cutoff) * qs + 1e-9)
+            & (2 * (hits + np.minimum(rest, ts)) >= cutoff * (qs + ts) - 1e-9)
+        )
+        pair_q, pair_c, hits, rest = pair_q[keep], pair_c[keep], hits[keep], rest[keep]
+
+        # 2) Scoring: Prefix-Treffer + übrige Trigramme im Kandidaten suchen
+        pair_idx = np.repeat(np.arange(len(pair_q)), rest)
+        gram = flat[_ranges(ptr[pair_q] + prefix[pair_q], rest)]
+        probe = pair_c[pair_idx] * len(self.vocab) + gram
+        pos = np.minimum(np.searchsorted(self.keys, probe), len(self.keys) - 1)
+        shared = hits + np.bincount(
+            pair_idx, weights=self.keys[pos] == probe, minlength=len(pair_q)
+        )
+        dice = 2 * shared / (q_sizes[pair_q] + self.sizes[pair_c])
+
+        # 3) bester Kandidat pro Anfrage (bei Gleichstand der erste Titel)
+        ok = dice >= cutoff - 1e-12
+        pair_q, pair_c, dice = pair_q[ok], pair_c[ok], dice[ok]
+        if not len(pair_q):
+            return best, score
+        order = np.lexsort((pair_c, -dice, pair_q))
+        pair_q, pair_c, dice = pair_q[order], pair_c[order], dice[order]
+        first = np.flatnonzero(np.r_[True, pair_q[1:] != pair_q[:-1]])
+        best[pair_q[first]] = pair_c[first]
+        score[pair_q[first]] = dice[first]
+        return best, score
+
+
+def _ranges(starts, lens):
+    """Verkettete Indexbereiche starts[i] : starts[i] + lens[i]."""
+    ends = np.cumsum(lens)
+    return np.repeat(starts - ends + lens, lens) + np.arange(
+        ends[-1] if len(ends) else 0
+    )
+
+
+def _match_batch(queries, cutoff):
+    return _WORKER_INDEX._match_batch(queries, cutoff)
+
+
+def fuzzy_match(
+    queries, choices, cutoff: float = FUZZY_CUTOFF, workers: int = None
+) -> pd.DataFrame:
+    """
+    Bester Treffer aus choices für jede Anfrage mit score >= cutoff.
+    Rückgabe: DataFrame query, match, score (nur Anfragen mit Treffer).
+    """
+    queries = pd.unique(pd.Series(list(queries), dtype=object).dropna())
+    index = TitleIndex(pd.unique(pd.Series(list(choices), dtype=object).dropna()))
+    best, score = index.match(queries, cutoff, workers)
+    hit = best >= 0
+    return pd.DataFrame(
+        {
+            "query": queries[hit],
+            "match": index.titles[best[hit]],
+            "score": score[hit],
+        }
+    )
@@ -0,0 +1,424 @@
+"""
+HyperLogLog-Zähler für eindeutige User pro Segment
+==================================================
+Optionale Alternative zu exakten nunique()-Zählungen (Hash-Sets, die mit
+den Daten wachsen). Pro Segment (Spiel, Genre, Kohorte, ... oder ein
+einziges Segment für "alle") werden 2^precision Register à 1 Byte
+gehalten – aber erst, wenn das Segment mehr als 2^precision / 4
+verschiedene Werte hat. Bis dahin ist es dünn: seine Hashes liegen exakt
+in einer sortierten Liste (12 Byte pro Wert), gezählt wird dann exakt.
+Die meisten Spiele haben nur wenige Spieler und bleiben so klein;
+Registerzeilen werden mit geometrisch wachsender Kapazität angelegt.
+Speicher: höchstens 3 · 2^precision Byte pro dünnem und 2^precision
+Byte pro dichtem Segment (plus bis zu doppelte Reserve an Zeilen).
+Register eines dichten Segments:
+
+    Hash      pd.util.hash_array (64 Bit) der user_id
+    Register  obere precision Bits des Hashs
+    Wert      Position der ersten 1 in den restlichen Bits (Maximum je Register)
+
+Die Schätzung ist die übliche HLL-Formel mit Linear Counting für kleine
+Zahlen; der Standardfehler liegt bei etwa 1.04 / sqrt(2^precision), bei
+HLL_PRECISION = 12 also ~1.6 % bei 4 KiB pro dichtem Segment. Zähler mit
+gleicher precision lassen sich mit merge() (Hash-Listen vereinigen bzw.
+Register-Maximum) zusammenführen – Chunks, Prozesse und Partitionen ergeben
+dieselben Zustände wie ein Durchlauf über alles (ein Segment ist genau dann
+dicht, wenn es insgesamt mehr als 2^precision / 4 Werte hat).
+
+count_distinct() ist der Einstieg für Einzeldateien und partitionierte Logs:
+precision=None (Default) zählt exakt, sonst wird pro Partition ein Zähler
+aus deren Binär-Cache gebaut, als distinct-*.npz daneben gespeichert und
+gemergt. StreamAggregate(distinct_precision=...) nutzt die Zähler statt
+der (user, game)-Paartabelle. Parität zum exakten Pfad:
+
+    python -m steamlib.hll ../steam-200k.csv
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .cache import (
+    BEHAVIORS,
+    default_cache_dir,
+    is_partitioned,
+    list_partitions,
+    open_cache,
+    read_manifest,
+)
+
+HLL_PRECISION = 12
+HLL_PRECISIONS = range(4, 17)
+HLL_SPARSE_SHARE = 4  # exakt bis 2^precision / 4 Werte pro Segment
+HLL_BLOCK = 1024  # Segmente pro Block bei der Schätzung (begrenzt Zwischenspeicher)
+HLL_FILE = "distinct-{behavior}-{by}-p{precision}.npz"
+BENCH_PRECISIONS = (10, 12, 14)
+
+
+def _leading_zeros(w: np.ndarray) -> np.ndarray:
+    """Anzahl führender Nullbits je uint64 (64 für 0)."""
+    x = w.copy()
+    n = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        top_clear = x < (np.uint64(1) << np.uint64(64 - shift))
+        n += top_clear * shift
+        x = np.where(top_clear, x << np.uint64(shift), x)
+    return n + (x >> np.uint64(63) == 0)
+
+
+def _alpha(m: int) -> float:
+    return {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+
+
+class DistinctCounter:
+    """HyperLogLog-Register pro Segment, mergebar und speicherbar."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        if precision not in HLL_PRECISIONS:
+            raise ValueError(
+                f"precision muss in {HLL_PRECISIONS.start}..{HLL_PRECISIONS.stop - 1} "
+                f"liegen, nicht {precision}"
+            )
+        self.precision = int(precision)
+        self.lookup = {}
+        # Registerzeile je Segment-Code, -1 = noch dünn (exakte Hashes)
+        self.rows = np.zeros(0, dtype=np.int64)
+        # dichte Zeilen; Kapazität wächst geometrisch, belegt sind n_dense
+        self.registers = np.zeros((0, 1 << self.precision), dtype=np.uint8)
+        self.n_dense = 0
+        # dünne Segmente: eindeutige (Segment, Hash), sortiert
+        self.sparse_segment = np.zeros(0, dtype=np.int32)
+        self.sparse_hash = np.zeros(0, dtype=np.uint64)
+
+    @property
+    def segments(self) -> np.ndarray:
+        return np.array(list(self.lookup), dtype=object)
+
+    @property
+    def sparse_limit(self) -> int:
+        """Maximale Anzahl exakter Hashes, bevor ein Segment Register bekommt."""
+        return (1 << self.precision) // HLL_SPARSE_SHARE
+
+    @property
+    def nbytes(self) -> int:
+        """Belegter Speicher (Register inkl. Reserve + dünne Einträge)."""
+        return (
+            self.registers.nbytes
+            + self.rows.nbytes
+            + self.sparse_segment.nbytes
+            + self.sparse_hash.nbytes
+        )
+
+    def _grow(self) -> None:
+        extra = len(self.lookup) - len(self.rows)
+        if extra > 0:
+            self.rows = np.concatenate([self.rows, np.full(extra, -1, np.int64)])
+
+    def _reserve(self, n: int) -> None:
+        if n <= len(self.registers):
+            return
+        capacity = max(n, 2 * len(self.registers), 16)
+        registers = np.zeros((capacity, self.registers.shape[1]), dtype=np.uint8)
+        registers[: self.n_dense] = self.registers[: self.n_dense]
+        self.registers = registers
+
+    # --- Aktualisieren -----------------------------------------------
+
+    def add(self, segments, values) -> "DistinctCounter":
+        """Nimmt (Segment-Label, Wert)-Paare auf, z.B. game/user_id."""
+        codes, uniques = pd.factorize(pd.Series(segments))
+        remap = np.array(
+            [self.lookup.setdefault(s, len(self.lookup)) for s in uniques],
+            dtype=np.int64,
+        )
+        segment = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+        return self.add_arrays(segment, values)
+
+    def add_arrays(self, segment, values) -> "DistinctCounter":
+        """Nimmt bereits kodierte Segmente auf (Codes in self.lookup, -1 = keins)."""
+        self._grow()
+        segment = np.asarray(segment, dtype=np.int64)
+        values = np.asarray(values)
+        valid = segment >= 0
+        if not valid.all():
+            segment, values = segment[valid], values[valid]
+        if not len(values):
+            return self
+        self._add_hashes(segment, pd.util.hash_array(values))
+        return self
+
+    def _add_hashes(self, segment: np.ndarray, h: np.ndarray) -> None:
+        row = self.rows[segment]
+        dense = row >= 0
+        if dense.any():
+            self._fold(row[dense], h[dense])
+        if dense.all():
+            return
+        seg = np.concatenate([self.sparse_segment, segment[~dense].astype(np.int32)])
+        h = np.concatenate([self.sparse_hash, h[~dense]])
+        order = np.lexsort((h, seg))
+        seg, h = seg[order], h[order]
+        first = np.concatenate([[True], (seg[1:] != seg[:-1]) | (h[1:] != h[:-1])])
+        self.sparse_segment, self.sparse_hash = seg[first], h[first]
+        n = np.bincount(self.sparse_segment, minlength=len(self.rows))
+        full = np.flatnonzero(n > self.sparse_limit)
+        if len(full):
+            self._promote(full)
+
+    def _fold(self, row: np.ndarray, h: np.ndarray) -> None:
+        """Hashes in die Registerzeilen row eintragen (Register-Maximum)."""
+        p = np.uint64(self.precision)
+        index = (h >> (np.uint64(64) - p)).astype(np.int64)
+        rank = np.minimum(_leading_zeros(h << p) + 1, 64 - self.precision + 1)
+        flat = row * self.registers.shape[1] + index
+        np.maximum.at(self.registers.reshape(-1), flat, rank.astype(np.uint8))
+
+    def _promote(self, codes: np.ndarray) -> None:
+        """Gibt dünnen Segmenten eine Registerzeile und trägt ihre Hashes ein."""
+        codes = codes[self.rows[codes] < 0]
+        if not len(codes):
+            return
+        self._reserve(self.n_dense + len(codes))
+        self.rows[codes] = np.arange(self.n_dense, self.n_dense + len(codes))
+        self.n_dense += len(codes)
+        move = np.isin(self.sparse_segment, codes)
+        self._fold(self.rows[self.sparse_segment[move]], self.sparse_hash[move])
+        self.sparse_segment = self.sparse_segment[~move]
+        self.sparse_hash = self.sparse_hash[~move]
+
+    def merge(self, other: "DistinctCounter") -> "DistinctCounter":
+        """Führt einen zweiten Zähler (gleiche precision) hinzu."""
+        if self.precision != other.precision:
+            raise ValueError("Zähler mit unterschiedlicher precision.")
+        remap = np.array(
+            [self.lookup.setdefault(s, len(self.lookup)) for s in other.lookup],
+            dtype=np.int64,
+        )
+        self._grow()
+        other._grow()
+        if len(other.sparse_hash):
+            self._add_hashes(remap[other.sparse_segment], other.sparse_hash)
+        dense = np.flatnonzero(other.rows >= 0)
+        if len(dense):
+            self._promote(remap[dense])
+            row = self.rows[remap[dense]]
+            self.registers[row] = np.maximum(
+                self.registers[row], other.registers[other.rows[dense]]
+            )
+        return self
+
+    # --- Speichern ---------------------------------------------------
+
+    def to_state(self) -> dict:
+        """Zustand als dict von Arrays (für np.savez); Labels siehe .segments."""
+        self._grow()
+        return {
+            "registers": self.registers[: self.n_dense],
+            "rows": self.rows,
+            "sparse_segment": self.sparse_segment,
+            "sparse_hash": self.sparse_hash,
+            "precision": np.array(self.precision),
+        }
+
+    @classmethod
+    def from_state(cls, state, segments) -> "DistinctCounter":
+        """Gegenstück zu to_state(); segments in der Reihenfolge der Codes."""
+        counter = cls(int(state["precision"]))
+        counter.lookup = {s: i for i, s in enumerate(segments)}
+        counter.registers = np.array(state["registers"])
+        counter.n_dense = len(counter.registers)
+        if "rows" in state:
+            counter.rows = np.array(state["rows"], dtype=np.int64)
+            counter.sparse_segment = np.array(state["sparse_segment"], dtype=np.int32)
+            counter.sparse_hash = np.array(state["sparse_hash"], dtype=np.uint64)
+        else:  # ältere Zustände: nur dichte Register, eine Zeile pro Segment
+            counter.rows = np.arange(counter.n_dense, dtype=np.int64)
+        return counter
+
+    # --- Auswerten ---------------------------------------------------
+
+    def estimate(self) -> np.ndarray:
+        """
+        Anzahl eindeutiger Werte je Segment (float64): exakt für dünne
+        Segmente, sonst HLL-Schätzung.
+        """
+        self._grow()
+        out = np.bincount(self.sparse_segment, minlength=len(self.rows)).astype(
+            np.float64
+        )
+        m = self.registers.shape[1]
+        weights = 2.0 ** -np.arange(66, dtype=np.float64)
+        dense = np.empty(self.n_dense)
+        for start in range(0, self.n_dense, HLL_BLOCK):
+            block = self.registers[start : min(start + HLL_BLOCK, self.n_dense)]
+            raw = _alpha(m) * m * m / weights[block].sum(axis=1)
+            zeros = (block == 0).sum(axis=1)
+            with np.errstate(divide="ignore"):
+                linear = m * np.log(m / zeros)
+            dense[start : start + HLL_BLOCK] = np.where(
+                (raw <= 2.5 * m) & (zeros > 0), linear, raw
+            )
+        has_row = self.rows >= 0
+        out[has_row] = dense[self.rows[has_row]]
+        return out
+
+    def counts(self, name: str = "users") -> pd.Series:
+        """Geschätzte Anzahlen (gerundet) mit den Segment-Labels als Index."""
+        return pd.Series(
+            np.rint(self.estimate()).astype(np.int64), index=self.segments, name=name
+        )
+
+
+# --- Einzeldateien und Partitionen --------------------------------------
+
+
+def _partition_counter(
+    path: str, by: str, behavior: str, precision: int, titles
+) -> DistinctCounter:
+    """Zähler einer Partition aus ihrem Cache (gespeichert neben dem Cache)."""
+    cache_dir = default_cache_dir(path)
+    manifest = read_manifest(cache_dir)
+    stamp = f"{manifest['source']['blake2b']}:{manifest.get('titles_token')}"
+    file = os.path.join(
+        cache_dir,
+        HLL_FILE.format(
+            behavior=behavior or "all", by=by or "all", precision=precision
+        ),
+    )
+    try:
+        with np.load(file) as arrays:
+            if str(arrays["stamp"]) == stamp:
+                return DistinctCounter.from_state(arrays, arrays["segments"].tolist())
+    except (OSError, KeyError, ValueError):
+        pass
+    events = open_cache(cache_dir)
+    mask = slice(None)
+    if behavior is not None:
+        mask = np.flatnonzero(np.asarray(events.behavior) == BEHAVIORS.index(behavior))
+    users = np.asarray(events.user_id[mask])
+    counter = DistinctCounter(precision)
+    if by == "game":
+        used, game = np.unique(np.asarray(events.game[mask]), return_inverse=True)
+        counter.lookup = {titles.raw[g]: i for i, g in enumerate(used)}
+        counter.add_arrays(game, users)
+    else:
+        counter.lookup = {"all": 0}
+        counter.add_arrays(np.zeros(len(users), dtype=np.int64), users)
+    state = counter.to_state()
+    tmp = file + ".tmp.npz"
+    segments = np.array(list(counter.lookup), dtype=str)
+    np.savez_compressed(tmp, segments=segments, stamp=np.array(stamp), **state)
+    os.replace(tmp, file)
+    return counter
+
+
+def count_distinct(
+    source: str,
+    by: str = "game",
+    behavior: str = "play",
+    precision: int = None,
+    titles=None,
+) -> pd.Series:
+    """
+    Eindeutige user_id pro Spiel (by="game") oder insgesamt (by=None, Series
+    mit einem Eintrag). behavior: "play", "purchase" oder None (alle Zeilen).
+    precision: None = exakt (Default), sonst HyperLogLog mit 2^precision
+    Registern pro Segment. Index: Titel (nur Spiele mit Zeilen), alphabetisch.
+    """
+    from .cache import open_events
+    from .partitions import build_partitions, stale_partitions
+    from .titles import open_titles
+
+    titles = titles if titles is not None else open_titles(source)
+    if precision is None:
+        events = open_events(source, titles=titles)
+        mask = np.ones(len(events), dtype=bool)
+        if behavior is not None:
+            mask = np.asarray(events.behavior) == events.behavior_code(behavior)
+        users = np.asarray(events.user_id)[mask]
+        if by is None:
+            return pd.Series([len(np.unique(users))], name="users")
+        keys = np.unique(
+            (np.asarray(events.game)[mask].astype(np.uint64) << np.uint64(32))
+            | users.astype(np.uint64)
+        )
+        game = (keys >> np.uint64(32)).astype(np.int64)
+        n = np.bincount(game, minlength=len(titles.raw))
+        counts = pd.Series(n, index=np.array(titles.raw, dtype=object), name="users")
+        return counts[n > 0].sort_index()
+
+    paths = list_partitions(source)
+    if is_partitioned(source):
+        build_partitions(stale_partitions(paths, titles), titles)
+    else:
+        open_events(source, titles=titles)  # baut den Cache bei Bedarf
+    counter = DistinctCounter(precision)
+    for path in paths:
+        counter.merge(_partition_counter(path, by, behavior, precision, titles))
+    counts = counter.counts()
+    if by is None:
+        return counts.reset_index(drop=True)
+    return counts[counts > 0].sort_index()
+
+
+def distinct_benchmark(
+    source: str, precisions=BENCH_PRECISIONS, behavior: str = "play"
+) -> pd.DataFrame:
+    """
+    Parität HLL vs. exakt pro Spiel: mittlerer/maximaler relativer Fehler,
+    Fehler der Gesamtzahl, erwarteter Standardfehler, Laufzeit und
+    Speicher pro Spiel (dünn + dicht) je precision (Zeile "exact" als Referenz).
+    """
+    from .titles import open_titles
+
+    titles = open_titles(source)
+    start = time.perf_counter()
+    exact = count_distinct(source, behavior=behavior, titles=titles)
+    exact_total = int(
+        count_distinct(source, by=None, behavior=behavior, titles=titles).iloc[0]
+    )
+    rows = [
+        {
+            "precision": "exact",
+            "games": len(exact),
+            "mean_rel_error": 0.0,
+            "max_rel_error": 0.0,
+            "total_rel_error": 0.0,
+            "expected_error": 0.0,
+            "seconds": time.perf_counter() - start,
+            "bytes_per_segment": np.nan,
+        }
+    ]
+    for p in precisions:
+        start = time.perf_counter()
+        approx = count_distinct(source, behavior=behavior, precision=p, titles=titles)
+        total = count_distinct(
+            source, by=None, behavior=behavior, precision=p, titles=titles
+        )
+        total = int(total[0])
+        seconds = time.perf_counter() - start
+        counter = DistinctCounter(p)
+        for path in list_partitions(source):  # Zähler liegen jetzt im Cache
+            counter.merge(_partition_counter(path, "game", behavior, p, titles))
+        rel = (approx.reindex(exact.index, fill_value=0) - exact).abs() / exact
+        rows.append(
+            {
+                "precision": p,
+                "games": len(exact),
+                "mean_rel_error": rel.mean(),
+                "max_rel_error": rel.max(),
+                "total_rel_error": abs(total - exact_total) / max(exact_total, 1),
+                "expected_error": 1.04 / np.sqrt(1 << p),
+                "seconds": seconds,
+                "bytes_per_segment": counter.nbytes / max(len(counter.lookup), 1),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "steam-200k.csv"
+    print(distinct_benchmark(csv_path).to_string(index=False))
@@ -0,0 +1,367 @@
+"""
+Inkrementelle Aggregation für wachsende Event-Logs
+==================================================
+Hält einen StreamAggregate-Zustand auf der Platte und merkt sich pro
+Quelldatei, bis zu welchem Byte-Offset sie schon eingelesen wurde. Ein
+erneuter Lauf liest nur die angehängten Zeilen (bzw. neue Partitionen) und
+liefert die Titel der Spiele, die sich dadurch geändert haben:
+
+    state = IncrementalAggregate.open(CSV_PATH, name="median")
+    changed = state.refresh()          # beim ersten Lauf: alle Spiele
+    ...Ausgaben nur für changed neu berechnen (refresh_table)...
+    state.save()
+
+Mit sketch_alpha=... wird zusätzlich eine QuantileSketch pro Spiel
+mitgeführt und als sketch-<gen>.npz neben dem Zustand gespeichert
+(Perzentile genähert, siehe sketch.py). Sie enthält wie clean_table() einen
+Wert pro gespieltem (user_id, game) (max. Stunden); geänderte Spiele werden
+nach jedem refresh() aus der Paartabelle neu skizziert.
+
+Ob eine Datei wirklich nur verlängert wurde, wird über Hashes des
+Dateianfangs und der letzten Bytes vor dem alten Offset geprüft; ist das
+nicht der Fall (oder fehlt eine Partition), wird der Zustand komplett neu
+aufgebaut. Komprimierte Partitionen gelten als unveränderlich.
+Gelesen wird nur bis zum letzten Zeilenumbruch: eine halb angehängte
+Zeile bleibt liegen, bis ein späterer Lauf sie vollständig sieht (eine
+letzte Zeile ohne abschließendes "\\n" wird daher erst mit dem Umbruch
+gelesen).
+Quantile u.ä. werden nicht genähert: die deduplizierte (user, game)-Tabelle
+ist Teil des Zustands, daraus werden die geänderten Spiele exakt neu
+berechnet. Jedes Skript nutzt einen eigenen name, damit es die Änderungen
+seit seinem eigenen letzten Lauf sieht. save() erst nach dem Schreiben der
+Ausgaben aufrufen – bricht ein Lauf vorher ab, wird das Delta beim
+nächsten Mal einfach erneut verarbeitet.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import (
+    default_cache_dir,
+    hash_file,
+    is_compressed,
+    list_partitions,
+    read_manifest,
+    write_manifest,
+)
+from .parallel import byte_ranges, parse_file, parse_range
+from .sketch import QuantileSketch
+from .streaming import DEFAULT_THRESHOLDS, StreamAggregate, split_pair_keys
+
+INCREMENTAL_VERSION = 3
+INCREMENTAL_DIR = "incremental"
+CHECK_BYTES = 1 << 16
+TAIL_BLOCK = 1 << 16
+
+
+def _hash_span(path: str, start: int, end: int) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        f.seek(start)
+        h.update(f.read(end - start))
+    return h.hexdigest()
+
+
+def _complete_end(path: str, start: int, end: int) -> int:
+    """Position hinter dem letzten b"\\n" in [start, end) (start, wenn keiner)."""
+    with open(path, "rb") as f:
+        pos = end
+        while pos > start:
+            block = max(start, pos - TAIL_BLOCK)
+            f.seek(block)
+            nl = f.read(pos - block).rfind(b"\n")
+            if nl >= 0:
+                return block + nl + 1
+            pos = block
+    return start
+
+
+def _plain_entry(path: str, offset: int) -> dict:
+    return {
+        "offset": offset,
+        "head": _hash_span(path, 0, min(offset, CHECK_BYTES)),
+        "tail": _hash_span(path, max(0, offset - CHECK_BYTES), offset),
+    }
+
+
+def _compressed_entry(path: str) -> dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "blake2b": hash_file(path)}
+
+
+def _is_unchanged(path: str, entry: dict) -> bool:
+    """Komprimierte Partition unverändert? (mtime gleich -> ohne Hash)"""
+    st = os.stat(path)
+    if st.st_size != entry.get("size"):
+        return False
+    return st.st_mtime_ns == entry["mtime_ns"] or hash_file(path) == entry["blake2b"]
+
+
+def _is_append(path: str, entry: dict) -> bool:
+    """Wurde die Datei seit entry nur hinten verlängert?"""
+    offset = entry["offset"]
+    if os.path.getsize(path) < offset:
+        return False
+    return _plain_entry(path, offset) == entry
+
+
+class IncrementalAggregate:
+    """StreamAggregate + Lesestand pro Quelldatei, persistent gespeichert."""
+
+    def __init__(
+        self,
+        source: str,
+        state_dir: str,
+        thresholds=DEFAULT_THRESHOLDS,
+        sketch_alpha: float = None,
+    ):
+        self.source = source
+        self.state_dir = state_dir
+        self.agg = StreamAggregate(thresholds)
+        self.sketch_alpha = sketch_alpha
+        self.sketch = self._new_sketch()
+        self.files = {}
+        self.generation = 0
+        self.rebuilt = False
+
+    def _new_sketch(self):
+        if self.sketch_alpha is None:
+            return None
+        sketch = QuantileSketch(self.sketch_alpha)
+        sketch.lookup = self.agg.lookup  # gleiche Spiel-Codes wie das Aggregat
+        return sketch
+
+    @classmethod
+    def open(
+        cls,
+        source: str,
+        name: str = "default",
+        state_dir: str = None,
+        thresholds=DEFAULT_THRESHOLDS,
+        sketch_alpha: float = None,
+    ) -> "IncrementalAggregate":
+        """
+        Gespeicherten Zustand laden (oder leer anlegen).
+        sketch_alpha: Fehlerschranke der Quantil-Skizze (None = keine Skizze)
+        """
+        state_dir = state_dir or os.path.join(
+            default_cache_dir(source), INCREMENTAL_DIR, name
+        )
+        state = cls(source, state_dir, thresholds, sketch_alpha)
+        manifest = read_manifest(state_dir)
+        if (
+            manifest is None
+            or manifest.get("version") != INCREMENTAL_VERSION
+            or manifest.get("thresholds") != sorted(float(t) for t in thresholds)
+            or manifest.get("sketch_alpha") != sketch_alpha
+        ):
+            if manifest is not None:
+                # nächstes save() ersetzt (und löscht) die alte Generation
+                state.generation = manifest.get("generation", 0)
+            return state
+        gen = manifest["generation"]
+        with open(os.path.join(state_dir, f"games-{gen}.json"), encoding="utf-8") as f:
+            games = json.load(f)
+        with np.load(os.path.join(state_dir, f"state-{gen}.npz")) as arrays:
+            state.agg = StreamAggregate.from_state(arrays, games)
+        if sketch_alpha is not None:
+            path = os.path.join(state_dir, f"sketch-{gen}.npz")
+            with np.load(path) as arrays:
+                state.sketch = QuantileSketch.from_state(arrays, games)
+            state.sketch.lookup = state.agg.lookup
+        state.files = manifest["files"]
+        state.generation = gen
+        return state
+
+    # --- Einlesen ----------------------------------------------------
+
+    def _add(self, parsed: tuple, changed: set) -> None:
+        # parsed = (cols, local, checked) aus parse_range/parse_file; checked
+        # (Prüfbericht) wird hier nicht gebraucht, ungültige Zeilen fehlen schon
+        cols, local, _ = parsed
+        lookup = self.agg.lookup
+        remap = np.array(
+            [lookup.setdefault(t, len(lookup)) for t in local], dtype=np.int32
+        )
+        game = cols["game"]
+        valid = game >= 0
+        codes = np.full(len(game), -1, dtype=np.int32)
+        codes[valid] = remap[game[valid]]
+        changed.update(np.unique(codes[valid]).tolist())
+        self.agg.update_arrays(cols["user_id"], codes, cols["behavior"], cols["hours"])
+
+    def _resketch(self, codes: list) -> None:
+        """Skizze der Spiele codes aus den max. Stunden der Paartabelle neu."""
+        pairs = self.agg.pairs()
+        _, game = split_pair_keys(pairs["keys"])
+        sel = (pairs["play_rows"] > 0) & np.isin(game, codes)
+        self.sketch.drop(codes).update_arrays(game[sel], pairs["hours_max"][sel])
+
+    def _read_plain(self, path: str, start: int, end: int, changed: set) -> None:
+        for a, b in byte_ranges(path, start=start, end=end):
+            self._add(parse_range(path, a, b), changed)
+
+    def refresh(self) -> np.ndarray:
+        """
+        Liest neue Zeilen/Partitionen ein.
+        Rückgabe: Titel der Spiele mit neuen Zeilen (nach einem Neuaufbau alle).
+        """
+        paths = list_partitions(self.source)
+        if not paths:
+            raise FileNotFoundError(f"Datei nicht gefunden: {self.source}")
+        names = {os.path.basename(p): p for p in paths}
+        if any(n not in names for n in self.files) or any(
+            n in self.files
+            and not (_is_unchanged if is_compressed(p) else _is_append)(
+                p, self.files[n]
+            )
+            for n, p in names.items()
+        ):
+            self.reset()
+
+        changed = set()
+        for name, path in names.items():
+            entry = self.files.get(name)
+            if is_compressed(path):
+                if entry is None:
+                    self._add(parse_file(path), changed)
+                    self.files[name] = _compressed_entry(path)
+                continue
+            start = 0 if entry is None else entry["offset"]
+            # nur vollständige Zeilen; ein halb geschriebener Rest wartet
+            end = _complete_end(path, start, os.path.getsize(path))
+            if end > start:
+                self._read_plain(path, start, end, changed)
+                self.files[name] = _plain_entry(path, end)
+        if self.sketch is not None and changed:
+            self._resketch(sorted(changed))
+        games = self.agg.games
+        if self.rebuilt:
+            return np.sort(games)
+        return np.sort(games[sorted(changed)]) if changed else games[:0]
+
+    def reset(self) -> None:
+        """Zustand verwerfen; der nächste refresh() liest alles neu."""
+        self.agg = StreamAggregate(self.agg.thresholds)
+        self.sketch = self._new_sketch()
+        self.files = {}
+        self.rebuilt = True
+
+    def save(self) -> None:
+        """Zustand atomar speichern (neue Generation, dann Manifest)."""
+        os.makedirs(self.state_dir, exist_ok=True)
+        gen = self.generation + 1
+        with open(
+            os.path.join(self.state_dir, f"games-{gen}.json"), "w", encoding="utf-8"
+        ) as f:
+            json.dump(list(self.agg.lookup), f, ensure_ascii=False)
+        np.savez(
+            os.path.join(self.state_dir, f"state-{gen}.npz"), **self.agg.to_state()
+        )
+        if self.sketch is not None:
+            np.savez(
+                os.path.join(self.state_dir, f"sketch-{gen}.npz"),
+                **self.sketch.to_state(),
+            )
+        write_manifest(
+            self.state_dir,
+            {
+                "version": INCREMENTAL_VERSION,
+                "generation": gen,
+                "thresholds": self.agg.thresholds.tolist(),
+                "sketch_alpha": self.sketch_alpha,
+                "files": self.files,
+            },
+        )
+        for old in (
+            f"games-{self.generation}.json",
+            f"state-{self.generation}.npz",
+            f"sketch-{self.generation}.npz",
+        ):
+            path = os.path.join(self.state_dir, old)
+            if os.path.exists(path):
+                os.remove(path)
+        self.generation = gen
+        self.rebuilt = False
+
+    # --- Ergebnisse --------------------------------------------------
+
+    def game_table(self) -> pd.DataFrame:
+        return self.agg.game_table()
+
+    def clean_table(self, reduce: str = "max", games=None) -> pd.DataFrame:
+        return self.agg.clean_table(reduce, games=games)
+
+
+# --- Ausgaben nur bei Änderung schreiben --------------------------------
+
+
+def write_if_changed(path: str, text: str) -> bool:
+    """Schreibt text nur, wenn sich der Dateiinhalt ändert. True = geschrieben."""
+    try:
+        with open(path, encoding="utf-8", newline="") as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return True
+
+
+def write_csv_if_changed(df: pd.DataFrame, path: str, **kwargs) -> bool:
+    return write_if_changed(path, df.to_csv(**kwargs))
+
+
+def write_json_if_changed(obj, path: str) -> bool:
+    return write_if_changed(path, json.dumps(obj, ensure_ascii=False, indent=2))
+
+
+def read_table(path: str, key: str = "game"):
+    """Liest eine früher geschriebene Tabelle verlustfrei zurück (None, wenn fehlt)."""
+    if not os.path.exists(path):
+        return None
+    columns = pd.read_csv(path, nrows=0).columns
+    return pd.read_csv(
+        path,
+        dtype={key: str},
+        keep_default_na=False,
+        na_values={c: [""] for c in columns if c != key},
+        float_precision="round_trip",
+    )
+
+
+def refresh_table(
+    path: str, compute, changed, key: str = "game", rebuilt: bool = False
+) -> tuple:
+    """
+    Aktualisiert eine Tabelle pro Spiel: compute(games) berechnet die Zeilen
+    für die Titel in games (None = alle). Zeilen unveränderter Spiele werden
+    aus der bestehenden Datei übernommen – außer nach einem Neuaufbau
+    (rebuilt=state.rebuilt), dann wird alles neu berechnet, damit Spiele,
+    die es nicht mehr gibt, auch aus der Tabelle verschwinden.
+    Rückgabe: (Tabelle, True wenn die Datei neu geschrieben wurde).
+    """
+    previous = read_table(path, key)
+    if previous is None or rebuilt:
+        table = compute(None)
+    elif len(changed) == 0:
+        return previous, False
+    else:
+        fresh = compute(changed)
+        fresh[key] = fresh[key].astype(str)
+        keep = previous[~previous[key].isin(list(changed))]
+        # gleiche dtypes wie compute() (z.B. float32), damit das CSV identisch formatiert ist
+        keep = keep.astype(fresh.dtypes.to_dict())
+        table = (
+            pd.concat([keep, fresh], ignore_index=True)
+            .sort_values(key, kind="stable")
+            .reset_index(drop=True)
+        )
+    return table, write_csv_if_changed(table, path, index=False)
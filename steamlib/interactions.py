@@ -0,0 +1,229 @@
+"""
+Dünnbesetzte User×Spiel-Interaktionsmatrix
+==========================================
+Einmal aus der Faktentabelle (facts.py) gebaut, als .npy-Arrays gespeichert und danach
+per memmap wiederverwendet (statt pivot_table(..., fill_value=0) mit
+~12k × 5k float64-Zellen, die fast alle 0 sind).
+Pro (user, game)-Paar:
+- hours     float32  max. Spielzeit (0, wenn nur gekauft)
+- purchased bool     es gibt eine purchase-Zeile
+- played    bool     es gibt eine play-Zeile
+Gespeichert in zwei Layouts:
+- CSR (Zeile = User):  user_indptr, user_games, user_hours, user_purchased, user_played
+- CSC (Spalte = Spiel): game_indptr, game_users, game_hours, game_purchased, game_played
+Dazu die ID-Abbildungen user_ids (uint32, sortiert) und game_ids (globale
+game_id aus dem Titel-Wörterbuch, sortiert). Zeilen-/Spaltenindex i gehört
+also zu user_ids[i] bzw. game_ids[i].
+"""
+
+import json
+import os
+
+import numpy as np
+
+from .cache import default_cache_dir, open_events, read_manifest
+from .facts import open_facts
+from .titles import TitleDictionary, open_titles
+
+INTERACTIONS_VERSION = 1
+INTERACTIONS_DIR = "interactions"
+ARRAYS = (
+    "user_ids",
+    "game_ids",
+    "user_indptr",
+    "user_games",
+    "user_hours",
+    "user_purchased",
+    "user_played",
+    "game_indptr",
+    "game_users",
+    "game_hours",
+    "game_purchased",
+    "game_played",
+)
+
+
+class Interactions:
+    """Lesender Zugriff auf die CSR/CSC-Arrays, ohne je zu verdichten."""
+
+    def __init__(self, arrays: dict, games: np.ndarray):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.games = games
+
+    @property
+    def n_users(self) -> int:
+        return len(self.user_ids)
+
+    @property
+    def n_games(self) -> int:
+        return len(self.game_ids)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.user_games)
+
+    # --- ID-Abbildungen ----------------------------------------------
+
+    def user_index(self, user_id) -> np.ndarray:
+        """Zeilenindex zu user_id(s); -1, wenn unbekannt."""
+        return _index_of(self.user_ids, user_id)
+
+    def game_index(self, game_id) -> np.ndarray:
+        """Spaltenindex zu globaler game_id(s); -1, wenn unbekannt."""
+        return _index_of(self.game_ids, game_id)
+
+    def game_titles(self, game_index=None) -> np.ndarray:
+        ids = self.game_ids if game_index is None else self.game_ids[game_index]
+        return self.games[np.asarray(ids)]
+
+    # --- Slices ------------------------------------------------------
+
+    def user_row(self, i: int) -> dict:
+        """Spiele eines Users: game (Spaltenindex), hours, purchased, played."""
+        s = slice(self.user_indptr[i], self.user_indptr[i + 1])
+        return {
+            "game": self.user_games[s],
+            "hours": self.user_hours[s],
+            "purchased": self.user_purchased[s],
+            "played": self.user_played[s],
+        }
+
+    def game_column(self, j: int) -> dict:
+        """User eines Spiels: user (Zeilenindex), hours, purchased, played."""
+        s = slice(self.game_indptr[j], self.game_indptr[j + 1])
+        return {
+            "user": self.game_users[s],
+            "hours": self.game_hours[s],
+            "purchased": self.game_purchased[s],
+            "played": self.game_played[s],
+        }
+
+    # --- Kennzahlen pro Spiel (direkt aus den Segmenten) ---------------
+
+    def _per_game(self, flags: np.ndarray, segment=None) -> np.ndarray:
+        col = np.repeat(np.arange(self.n_games), np.diff(self.game_indptr))
+        flags = np.asarray(flags)
+        if segment is not None:
+            # Zeilenindex -> user_ids -> Bit im Segment
+            flags = flags & segment.contains(self.user_ids)[self.game_users]
+        return np.bincount(col[flags], minlength=self.n_games)
+
+    def owners_per_game(self, segment=None) -> np.ndarray:
+        return self._per_game(self.game_purchased, segment)
+
+    def players_per_game(self, segment=None) -> np.ndarray:
+        return self._per_game(self.game_played, segment)
+
+    # --- scipy (optional) --------------------------------------------
+
+    def to_scipy(self, layout: str = "csr", values: str = "hours"):
+        """
+        scipy.sparse-Matrix (User × Spiel) ohne Kopie der Indexarrays.
+        values: "hours", "purchased" oder "played".
+        """
+        try:
+            from scipy import sparse
+        except ImportError as e:
+            raise ImportError("to_scipy() benötigt scipy.") from e
+        shape = (self.n_users, self.n_games)
+        if layout == "csr":
+            data = np.asarray(getattr(self, "user_" + values), dtype=np.float32)
+            return sparse.csr_matrix(
+                (data, self.user_games, self.user_indptr), shape=shape
+            )
+        if layout == "csc":
+            data = np.asarray(getattr(self, "game_" + values), dtype=np.float32)
+            return sparse.csc_matrix(
+                (data, self.game_users, self.game_indptr), shape=shape
+            )
+        raise ValueError(f"Unbekanntes Layout: {layout!r} (erlaubt: 'csr', 'csc')")
+
+
+def _index_of(sorted_ids: np.ndarray, values) -> np.ndarray:
+    values = np.asarray(values)
+    if len(sorted_ids) == 0:
+        return np.full(values.shape, -1)
+    pos = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return np.where(np.asarray(sorted_ids)[pos] == values, pos, -1)
+
+
+def _indptr(index: np.ndarray, n: int) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(np.bincount(index, minlength=n))]).astype(
+        np.int64
+    )
+
+
+def build_interactions(
+    csv_path: str,
+    out_dir: str = None,
+    titles: TitleDictionary = None,
+) -> str:
+    """Baut CSR + CSC aus der Faktentabelle (ein Eintrag pro Paar)."""
+    titles = titles if titles is not None else open_titles(csv_path)
+    out_dir = out_dir or os.path.join(default_cache_dir(csv_path), INTERACTIONS_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    facts = open_facts(csv_path, titles=titles)
+    # nach (user_id, game_id) sortiert -> bereits CSR-Reihenfolge
+    user_ids, row = np.unique(np.asarray(facts.user_id), return_inverse=True)
+    game_ids, col = np.unique(np.asarray(facts.game_id), return_inverse=True)
+    hours = np.nan_to_num(np.asarray(facts.hours_max), nan=0.0).astype(np.float32)
+    purchased = np.asarray(facts.purchased)
+    played = np.asarray(facts.played)
+    order = np.lexsort((row, col))
+
+    arrays = {
+        "user_ids": user_ids.astype(np.uint32),
+        "game_ids": game_ids.astype(np.int32),
+        "user_indptr": _indptr(row, len(user_ids)),
+        "user_games": col.astype(np.int32),
+        "user_hours": hours,
+        "user_purchased": purchased,
+        "user_played": played,
+        "game_indptr": _indptr(col, len(game_ids)),
+        "game_users": row[order].astype(np.int32),
+        "game_hours": hours[order],
+        "game_purchased": purchased[order],
+        "game_played": played[order],
+    }
+    for name, arr in arrays.items():
+        np.save(os.path.join(out_dir, name + ".npy"), arr)
+    source = read_manifest(default_cache_dir(csv_path))
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": INTERACTIONS_VERSION,
+                "source_blake2b": source["source"]["blake2b"],
+                "titles_token": titles.token,
+                "n_users": len(user_ids),
+                "n_games": len(game_ids),
+                "nnz": len(hours),
+            },
+            f,
+            indent=2,
+        )
+    return out_dir
+
+
+def open_interactions(
+    csv_path: str, out_dir: str = None, titles: TitleDictionary = None
+) -> Interactions:
+    """Öffnet die gespeicherten Arrays per memmap; baut sie bei Bedarf neu."""
+    titles = titles if titles is not None else open_titles(csv_path)
+    events = open_events(csv_path, titles=titles)  # hält den Event-Cache aktuell
+    out_dir = out_dir or os.path.join(default_cache_dir(csv_path), INTERACTIONS_DIR)
+    manifest = read_manifest(out_dir)
+    source = read_manifest(default_cache_dir(csv_path))
+    if (
+        manifest is None
+        or manifest.get("version") != INTERACTIONS_VERSION
+        or manifest.get("source_blake2b") != source["source"]["blake2b"]
+        or manifest.get("titles_token") != titles.token
+    ):
+        build_interactions(csv_path, out_dir, titles=titles)
+    arrays = {
+        name: np.load(os.path.join(out_dir, name + ".npy"), mmap_mode="r")
+        for name in ARRAYS
+    }
+    return Interactions(arrays, events.games)
@@ -0,0 +1,192 @@
+"""
+Kanonischer Loader für steam-200k.csv
+=====================================
+Ersetzt die kopierten load_clean()-Varianten der einzelnen Skripte.
+Stabiles Schema (immer diese Namen und Typen, in dieser Reihenfolge):
+
+    user_id   uint32
+    game      category   (Kategorien alphabetisch, nur tatsächlich vorkommende)
+    behavior  category   ("purchase", "play")
+    hours     float32
+
+Optional (nur auf Anfrage über columns=...), aus dem globalen Titel-Wörterbuch:
+
+    game_id   int32      (ID des Roh-Titels)
+    norm_id   int32      (ID des normalisierten Titels, Join-Schlüssel)
+
+- Spalten-Pruning: nur angeforderte Spalten werden materialisiert,
+  die 5. CSV-Spalte (nur 0en) wird nur beim Validieren gelesen.
+- Validierung: Zeilen, die eine Regel aus validation.py verletzen, fehlen
+  im Ergebnis (Bericht: validation_report(csv_path)).
+- Filter-Pushdown: behavior wird schon beim Lesen (Cache-Maske bzw. pro Chunk)
+  gefiltert, ausgeschlossene Zeilen landen nie im Ergebnis-DataFrame.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .cache import BEHAVIORS, CHUNK_ROWS, open_events, read_raw_chunks
+from .facts import load_facts
+from .titles import TitleDictionary, open_titles
+from .validation import validate_chunk
+
+STEAM_SCHEMA = {
+    "user_id": "uint32",
+    "game": "category",
+    "behavior": "category",
+    "hours": "float32",
+}
+STEAM_COLUMNS = list(STEAM_SCHEMA)
+ID_SCHEMA = {"game_id": "int32", "norm_id": "int32"}
+COLUMN_ORDER = STEAM_COLUMNS + list(ID_SCHEMA)
+REDUCERS = ("max", "sum")
+
+
+def _check_args(behavior, columns):
+    if behavior is not None and behavior not in BEHAVIORS:
+        raise ValueError(f"Unbekanntes behavior: {behavior!r} (erlaubt: {BEHAVIORS})")
+    columns = STEAM_COLUMNS if columns is None else list(columns)
+    unknown = [c for c in columns if c not in COLUMN_ORDER]
+    if unknown:
+        raise KeyError(f"Unbekannte Spalten: {unknown} (erlaubt: {COLUMN_ORDER})")
+    return columns
+
+
+def _finalize(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """Bringt einen Frame in das stabile Schema (Reihenfolge, Kategorien)."""
+    if "game" in df:
+        game = df["game"].cat.remove_unused_categories()
+        df["game"] = game.cat.reorder_categories(sorted(game.cat.categories))
+    if "behavior" in df:
+        df["behavior"] = df["behavior"].cat.set_categories(list(BEHAVIORS))
+    return df[[c for c in COLUMN_ORDER if c in columns]].reset_index(drop=True)
+
+
+def read_steam_csv(
+    csv_path: str,
+    behavior: str = None,
+    columns=None,
+    chunk_rows: int = CHUNK_ROWS,
+    titles: TitleDictionary = None,
+) -> pd.DataFrame:
+    """Liest direkt aus der CSV (ohne Cache), filtert pro Chunk."""
+    columns = _check_args(behavior, columns)
+    with_ids = any(c in ID_SCHEMA for c in columns)
+    needed = [c for c in STEAM_COLUMNS if c in columns or (c == "game" and with_ids)]
+    parts = []
+    for chunk in read_raw_chunks(csv_path, chunk_rows):
+        chunk, _, _ = validate_chunk(chunk)
+        if behavior is not None:
+            chunk = chunk.loc[chunk["behavior"] == behavior]
+        parts.append(chunk[needed])
+    if not parts:
+        schema = {**STEAM_SCHEMA, **ID_SCHEMA}
+        return pd.DataFrame({c: pd.Series(dtype=schema[c]) for c in columns})
+    df = pd.DataFrame(
+        {
+            c: (
+                union_categoricals([p[c].array for p in parts])
+                if STEAM_SCHEMA[c] == "category"
+                else np.concatenate([p[c].to_numpy() for p in parts])
+            )
+            for c in parts[0].columns
+        }
+    )
+    if "user_id" in df:
+        df["user_id"] = df["user_id"].astype(STEAM_SCHEMA["user_id"])
+    if with_ids:
+        titles = titles if titles is not None else open_titles(csv_path)
+        game_id = titles.ids(df["game"])
+        if titles.path is not None:
+            titles.save()
+        df["game_id"] = game_id
+        df["norm_id"] = titles.to_norm(game_id)
+    return _finalize(df, columns)
+
+
+def load_steam(
+    csv_path: str,
+    behavior: str = None,
+    columns=None,
+    use_cache: bool = True,
+    cache_dir: str = None,
+    titles: TitleDictionary = None,
+) -> pd.DataFrame:
+    """
+    Steam-Events im stabilen Schema laden.
+    behavior: "play", "purchase" oder None (alle Zeilen).
+    columns:  Teilmenge von STEAM_COLUMNS + game_id/norm_id (Default: STEAM_COLUMNS).
+    titles:   gemeinsames Titel-Wörterbuch (Default: das neben csv_path)
+    """
+    if not use_cache:
+        return read_steam_csv(
+            csv_path, behavior=behavior, columns=columns, titles=titles
+        )
+    columns = _check_args(behavior, columns)
+    titles = titles if titles is not None else open_titles(csv_path)
+    events = open_events(csv_path, cache_dir, titles=titles)
+    if behavior is None:
+        mask = slice(None)
+    else:
+        mask = np.flatnonzero(
+            np.asarray(events.behavior) == events.behavior_code(behavior)
+        )
+    data = {}
+    if "user_id" in columns:
+        data["user_id"] = np.asarray(events.user_id[mask])
+    if "game" in columns:
+        data["game"] = pd.Categorical.from_codes(
+            np.asarray(events.game[mask]), categories=events.games, validate=False
+        )
+    if "behavior" in columns:
+        data["behavior"] = pd.Categorical.from_codes(
+            np.asarray(events.behavior[mask]),
+            categories=list(BEHAVIORS),
+            validate=False,
+        )
+    if "hours" in columns:
+        data["hours"] = np.asarray(events.hours[mask])
+    if "game_id" in columns or "norm_id" in columns:
+        game_id = np.asarray(events.game[mask])
+        data["game_id"] = game_id
+        data["norm_id"] = titles.to_norm(game_id)
+    return _finalize(pd.DataFrame(data), columns)
+
+
+def load_clean(
+    csv_path: str,
+    behavior: str = "play",
+    reduce: str = "max",
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    Spielzeiten pro (user_id, game) – Schema: user_id, game, hours.
+    reduce: "max" (Default, 'hours' sind kumulierte Stunden), "sum" oder None
+            (keine Deduplizierung, eine Zeile pro Event). Mit Cache kommen
+            max/sum direkt aus der Faktentabelle (facts.py); max ist
+            identisch zum groupby, sum gleich bis auf float32-Rundung.
+    """
+    if reduce is not None and reduce not in REDUCERS:
+        raise ValueError(f"Unbekannte Reduktion: {reduce!r} (erlaubt: {REDUCERS})")
+    if use_cache and behavior == "play" and reduce is not None:
+        # bereits deduplizierte Faktentabelle (facts.py) statt groupby
+        col = "hours_" + reduce
+        df = load_facts(csv_path, behavior="play", columns=["user_id", "game", col])
+        df = df.loc[df[col].notna()].rename(columns={col: "hours"})
+        df["game"] = df["game"].cat.remove_unused_categories()
+        return df.reset_index(drop=True)
+    df = load_steam(
+        csv_path,
+        behavior=behavior,
+        columns=["user_id", "game", "hours"],
+        use_cache=use_cache,
+    )
+    df = df.loc[df["hours"].notna()]
+    if reduce is None:
+        return df.reset_index(drop=True)
+    df = df.groupby(["user_id", "game"], as_index=False, observed=True)["hours"].agg(
+        reduce
+    )
+    df["hours"] = df["hours"].astype(STEAM_SCHEMA["hours"])
+    return df
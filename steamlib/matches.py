@@ -0,0 +1,226 @@
+"""
+Persistente Zuordnung Steam-Titel -> Metacritic-Titel
+=====================================================
+Statt bei jedem Lauf exakt und fuzzy neu zu matchen, wird das Ergebnis pro
+normalisiertem Steam-Titel in title_matches.json (neben title_ids.json)
+abgelegt:
+
+    steam   normalisierter Steam-Titel
+    meta    normalisierter Metacritic-Titel (None = kein Treffer)
+    method  "exact", "fuzzy", "none" oder "manual"
+    score   1.0 bei exact/manual, Dice-Score bei fuzzy, 0.0 bei none
+
+Spätere Läufe berechnen nur Titel, die noch nicht in der Tabelle stehen.
+Ändert sich die Menge der Metacritic-Titel oder der Fuzzy-Cutoff, werden
+"fuzzy"- und "none"-Einträge (und "exact"-Einträge, deren Ziel fehlt) neu
+berechnet. "manual"-Einträge (set_override) werden nie überschrieben; bei
+neuen Normalisierungsregeln werden sie nur neu normalisiert.
+Im Speicher ist die Tabelle ein dichtes Array norm_id -> norm_id, die Joins
+laufen also als Integer-Lookup.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .fuzzy import FUZZY_CUTOFF, TitleIndex
+from .normalize import NORMALIZE_VERSION, normalize_title
+from .titles import TitleDictionary, default_title_path
+
+MATCH_TABLE_VERSION = 1
+MATCH_TABLE_FILE = "title_matches.json"
+
+
+def default_match_path(data_path: str) -> str:
+    """Tabelle liegt neben dem Titel-Wörterbuch der Datendatei."""
+    return os.path.join(
+        os.path.dirname(default_title_path(data_path)), MATCH_TABLE_FILE
+    )
+
+
+def _candidate_digest(meta_norm: list) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for title in sorted(meta_norm):
+        digest.update(title.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+
+class MatchTable:
+    """Steam norm_id -> Metacritic norm_id, mit Methode und Score."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.cutoff = FUZZY_CUTOFF
+        self.candidates = None
+        self.rows = {}  # steam -> (meta, method, score)
+        self._dirty = False
+
+    @classmethod
+    def open(cls, path: str) -> "MatchTable":
+        """Lädt die Tabelle aus path (oder legt eine leere an)."""
+        table = cls(path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MATCH_TABLE_VERSION:
+                raise ValueError(f"Unbekannte Match-Tabellen-Version in {path}")
+            table.cutoff = data["cutoff"]
+            table.candidates = data["candidates"]
+            table.rows = {
+                steam: (meta, method, score)
+                for steam, meta, method, score in data["rows"]
+            }
+            if data.get("rules", 1) != NORMALIZE_VERSION:
+                table._renormalize()
+        return table
+
+    def _renormalize(self) -> None:
+        """Neue Normalisierungsregeln: nur manuelle Einträge bleiben (umgeschlüsselt)."""
+        self.rows = {
+            normalize_title(steam): (
+                None if meta is None else normalize_title(meta),
+                method,
+                score,
+            )
+            for steam, (meta, method, score) in self.rows.items()
+            if method == "manual"
+        }
+        self.candidates = None
+        self._dirty = True
+
+    def save(self, path: str = None) -> None:
+        path = path or self.path
+        if path is None:
+            raise ValueError("Kein Pfad für die Match-Tabelle angegeben.")
+        if not self._dirty and path == self.path and os.path.exists(path):
+            return
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MATCH_TABLE_VERSION,
+                    "rules": NORMALIZE_VERSION,
+                    "cutoff": self.cutoff,
+                    "candidates": self.candidates,
+                    "rows": [
+                        [steam, meta, method, score]
+                        for steam, (meta, method, score) in sorted(self.rows.items())
+                    ],
+                },
+                f,
+                ensure_ascii=False,
+                indent=0,
+            )
+        os.replace(tmp, path)
+        self.path = path
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def set_override(self, steam_title: str, meta_title: str = None) -> None:
+        """
+        Manuelle Zuordnung (Titel werden normalisiert). meta_title=None
+        erzwingt "kein Treffer".
+        """
+        meta = None if meta_title is None else normalize_title(meta_title)
+        self.rows[normalize_title(steam_title)] = (meta, "manual", 1.0)
+        self._dirty = True
+
+    def resolve(
+        self,
+        steam_norm_ids,
+        meta_norm_ids,
+        titles: TitleDictionary,
+        cutoff: float = FUZZY_CUTOFF,
+        workers: int = None,
+    ) -> None:
+        """Ergänzt die Tabelle um alle noch unbekannten Steam-Titel."""
+        meta_ids = np.unique(np.asarray(meta_norm_ids))
+        meta_ids = meta_ids[meta_ids >= 0]
+        meta_norm = titles.norm_titles(meta_ids).tolist()
+        meta_set = set(meta_norm)
+        candidates = _candidate_digest(meta_norm)
+        if candidates != self.candidates or cutoff != self.cutoff:
+            self.rows = {
+                steam: row
+                for steam, row in self.rows.items()
+                if row[1] == "manual" or (row[1] == "exact" and row[0] in meta_set)
+            }
+            self.candidates, self.cutoff = candidates, cutoff
+            self._dirty = True
+
+        steam_ids = np.unique(np.asarray(steam_norm_ids))
+        steam_ids = steam_ids[steam_ids >= 0]
+        new = [t for t in titles.norm_titles(steam_ids) if t not in self.rows]
+        if not new:
+            return
+        exact = [t for t in new if t in meta_set]
+        for t in exact:
+            self.rows[t] = (t, "exact", 1.0)
+        rest = [t for t in new if t not in meta_set]
+        if rest and meta_norm:
+            index = TitleIndex(meta_norm)
+            best, score = index.match(rest, cutoff, workers)
+            for t, b, s in zip(rest, best.tolist(), score.tolist()):
+                self.rows[t] = (
+                    (index.titles[b], "fuzzy", s) if b >= 0 else (None, "none", 0.0)
+                )
+        else:
+            for t in rest:
+                self.rows[t] = (None, "none", 0.0)
+        self._dirty = True
+
+    def lookup(self, norm_ids, titles: TitleDictionary) -> np.ndarray:
+        """Metacritic-norm_id je Steam-norm_id (-1 = kein/unbekannter Treffer)."""
+        target = np.full(len(titles.norm), -1, dtype=np.int32)
+        norm_lookup = titles._norm_lookup
+        for steam, (meta, _, _) in self.rows.items():
+            src, dst = norm_lookup.get(steam), norm_lookup.get(meta)
+            if src is not None and dst is not None:
+                target[src] = dst
+        norm_ids = np.asarray(norm_ids)
+        return np.where(norm_ids >= 0, target[np.maximum(norm_ids, 0)], -1).astype(
+            np.int32
+        )
+
+    def frame(self) -> pd.DataFrame:
+        """Tabelle als DataFrame steam, meta, method, score."""
+        return pd.DataFrame(
+            [(s, m, method, score) for s, (m, method, score) in self.rows.items()],
+            columns=["steam", "meta", "method", "score"],
+        )
+
+
+def open_matches(data_path: str) -> MatchTable:
+    """Die gemeinsame Match-Tabelle neben data_path."""
+    return MatchTable.open(default_match_path(data_path))
+
+
+def match_titles(
+    steam_norm_ids,
+    meta_norm_ids,
+    titles: TitleDictionary,
+    cutoff: float = FUZZY_CUTOFF,
+    path: str = None,
+) -> np.ndarray:
+    """
+    Metacritic-norm_id für jede Steam-norm_id (Spalte, -1 = kein Treffer).
+    Neue Titel werden gematcht; die Tabelle liegt in path bzw. neben
+    titles.path (z.B. path=default_match_path(CSV_PATH) für ein
+    Wörterbuch, das nur im Speicher liegt).
+    """
+    if path is None:
+        if titles.path is None:
+            raise ValueError(
+                "Titel-Wörterbuch ohne Datei: Pfad der Match-Tabelle per path= "
+                "angeben (z.B. matches.default_match_path(CSV_PATH))."
+            )
+        path = os.path.join(os.path.dirname(titles.path), MATCH_TABLE_FILE)
+    table = MatchTable.open(path)
+    table.resolve(steam_norm_ids, meta_norm_ids, titles, cutoff)
+    table.save()
+    return table.lookup(steam_norm_ids, titles)
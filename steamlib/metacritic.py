@@ -0,0 +1,170 @@
+"""
+Loader für metacritic_games.csv
+===============================
+Eine Zeile pro (game, platform). Die Spalten werden beim Einlesen in einem
+Durchgang typisiert:
+
+    metascore, user_score                   float32 (NaN bei "tbd"/leer)
+    positive_/neutral_/negative_critics     int32 (float32, falls Lücken)
+    positive_/neutral_/negative_users       int32 (float32, falls Lücken)
+    release_date                            datetime64 (Format "Apr 18, 2011")
+
+"tbd" wird nur als exakter Zellwert als fehlend gelesen (na_values beim
+Parsen, kein String-Vorverarbeiten). Spaltennamen werden wie bei
+read_csv_sniffed normalisiert und vereinheitlicht (META_RENAMES).
+Die typisierte Tabelle wird als metacritic.pkl im Cache-Verzeichnis der
+Datei abgelegt und wiederverwendet, solange Größe und mtime gleich sind.
+Zusätzlich werden game_id und norm_id aus dem globalen Titel-Wörterbuch
+vergeben (nicht gecacht), damit der Join mit den Steam-Daten auf Integern
+läuft (norm_id == norm_id).
+
+metacritic_index() verdichtet die Tabelle auf genau eine Zeile pro
+normalisiertem Titel: der Eintrag der bevorzugten Plattform (für Steam
+zuerst PC) plus plattformübergreifende Scores. Joins dagegen sind 1:1 bzw.
+n:1 und vervielfachen keine Zeilen mehr.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import default_cache_dir, file_fingerprint
+from .sniff import read_csv_sniffed
+from .titles import TitleDictionary, open_titles
+
+META_TITLE_COLUMN = "game"
+META_CACHE_VERSION = 1
+META_CACHE_FILE = "metacritic.pkl"
+META_CACHE_MANIFEST = "metacritic.json"
+META_NA_VALUES = ("tbd",)
+META_DATE_FORMAT = "%b %d, %Y"
+META_SCORES = ("metascore", "user_score")
+META_COUNTS = (
+    "positive_critics",
+    "neutral_critics",
+    "negative_critics",
+    "positive_users",
+    "neutral_users",
+    "negative_users",
+)
+META_RENAMES = {
+    "metascore": ["critic_score", "critic_score_avg"],
+    "user_score": ["userscore"],
+    "genre": ["genres", "category", "categories"],
+    "release_date": ["release", "released"],
+}
+PLATFORM_PRIORITY = ("PC", "PS4", "XONE", "Switch", "WIIU", "3DS", "VITA")
+SCORE_COLUMNS = ("metascore", "user_score", "userscore")
+
+
+def _typed(meta: pd.DataFrame) -> pd.DataFrame:
+    """Scores/Zähler numerisch, release_date als Datum (festes Format)."""
+    for col in META_SCORES:
+        if col in meta.columns:
+            meta[col] = pd.to_numeric(meta[col], errors="coerce").astype(np.float32)
+    for col in META_COUNTS:
+        if col in meta.columns:
+            values = pd.to_numeric(meta[col], errors="coerce")
+            meta[col] = values.astype(np.float32 if values.isna().any() else np.int32)
+    if "release_date" in meta.columns:
+        meta["release_date"] = pd.to_datetime(
+            meta["release_date"], format=META_DATE_FORMAT, errors="coerce"
+        )
+    return meta
+
+
+def read_metacritic(path: str, renames: dict = META_RENAMES) -> pd.DataFrame:
+    """Typisierte Metacritic-Tabelle (aus dem Cache oder frisch geparst)."""
+    cache_dir = default_cache_dir(path)
+    fingerprint = file_fingerprint(path, with_hash=False)
+    stamp = {
+        "version": META_CACHE_VERSION,
+        "source": fingerprint,
+        "renames": {k: list(v) for k, v in (renames or {}).items()},
+    }
+    try:
+        with open(os.path.join(cache_dir, META_CACHE_MANIFEST), encoding="utf-8") as f:
+            if json.load(f) == stamp:
+                return pd.read_pickle(os.path.join(cache_dir, META_CACHE_FILE))
+    except (OSError, ValueError):
+        pass
+    meta = _typed(
+        read_csv_sniffed(
+            path,
+            expected_like=(META_TITLE_COLUMN, "metascore", "platform"),
+            renames=renames,
+            na_values=list(META_NA_VALUES),
+        )
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+    meta.to_pickle(os.path.join(cache_dir, META_CACHE_FILE))
+    tmp = os.path.join(cache_dir, META_CACHE_MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(stamp, f, indent=2)
+    os.replace(tmp, os.path.join(cache_dir, META_CACHE_MANIFEST))
+    return meta
+
+
+def load_metacritic(
+    path: str,
+    titles: TitleDictionary = None,
+    title_col: str = None,
+    renames: dict = META_RENAMES,
+) -> pd.DataFrame:
+    """
+    Typisierte Metacritic-Tabelle laden und Titel-IDs anhängen.
+    titles:    gemeinsames Wörterbuch (Default: das neben path)
+    title_col: Titelspalte (Default: "game", sonst die erste Spalte)
+    renames:   Zielname -> Kandidaten (siehe sniff.resolve_renames)
+    """
+    meta = read_metacritic(path, renames)
+    if title_col is None:
+        title_col = (
+            META_TITLE_COLUMN if META_TITLE_COLUMN in meta.columns else meta.columns[0]
+        )
+    titles = titles if titles is not None else open_titles(path)
+    game_id = titles.ids(meta[title_col].astype("string"))
+    if titles.path is not None:
+        titles.save()
+    meta["game_id"] = game_id
+    meta["norm_id"] = titles.to_norm(game_id)
+    return meta
+
+
+def metacritic_index(
+    meta: pd.DataFrame,
+    platform_priority=PLATFORM_PRIORITY,
+    score_columns=None,
+    key: str = "norm_id",
+) -> pd.DataFrame:
+    """
+    Eine Zeile pro key (Index, eindeutig):
+    - alle Spalten des bevorzugten Eintrags: erste Plattform aus
+      platform_priority, unbekannte Plattformen danach, sonst Dateireihenfolge
+    - platforms: Anzahl Einträge, platform_list: z.B. "PC|PS4"
+    - <score>_mean / <score>_max über alle Plattformen
+      (score_columns, Default: vorhandene aus SCORE_COLUMNS)
+    """
+    meta = meta[meta[key] >= 0]
+    if score_columns is None:
+        score_columns = [c for c in SCORE_COLUMNS if c in meta.columns]
+    if "platform" in meta.columns:
+        rank = pd.Categorical(meta["platform"], categories=list(platform_priority))
+        rank = np.where(rank.codes >= 0, rank.codes, len(platform_priority))
+    else:
+        rank = np.zeros(len(meta), dtype=np.int64)
+    order = np.lexsort((np.arange(len(meta)), rank, meta[key].to_numpy()))
+    ranked = meta.iloc[order]
+    index = ranked.drop_duplicates(key).set_index(key)
+
+    index["platforms"] = ranked.groupby(key).size()
+    if "platform" in ranked.columns:
+        platform = ranked["platform"].astype(str)
+        index["platform_list"] = platform.groupby(ranked[key]).agg("|".join)
+    for col in score_columns:
+        scores = pd.to_numeric(ranked[col], errors="coerce").groupby(ranked[key])
+        index[f"{col}_mean"] = scores.mean()
+        index[f"{col}_max"] = scores.max()
+    return index
@@ -0,0 +1,91 @@
+"""
+Titel-Normalisierung (einmal pro eindeutigem Titel)
+===================================================
+Regeln in dieser Reihenfolge:
+
+    1. ®, ™, © entfernen, Unicode NFKC, klein, Ränder strippen
+    2. Apostrophe entfernen ("assassin's" -> "assassins"), "&" -> "and"
+    3. übrige Satzzeichen -> Leerzeichen, Leerraum zusammenfassen
+    4. Editions-Suffixe abschneiden ("goty", "game of the year",
+       "definitive edition", "special edition", ...)
+    5. römische Zahlen als eigenes Wort -> Ziffern ("ii" -> "2", "v" -> "5";
+       "i" und "x" bleiben, zu oft echte Wörter/Teil von Namen)
+
+normalize_series() wendet die Regeln nur auf die eindeutigen Werte an und
+verteilt das Ergebnis über Kategorie-Codes zurück auf die Zeilen. Mit einem
+TitleDictionary wird das Ergebnis dort gespeichert (raw -> norm in
+title_ids.json) und hält damit über Läufe hinweg; ohne Wörterbuch gibt es
+nur den Memo-Cache im Prozess.
+Ändern sich die Regeln, wird NORMALIZE_VERSION erhöht; Wörterbuch und
+Match-Tabelle normalisieren dann beim Öffnen neu.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+NORMALIZE_VERSION = 2
+
+_SYMBOLS = re.compile(r"[®™©]")
+_APOSTROPHES = re.compile(r"['’`´]")
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+_SPACES = re.compile(r"\s+")
+_EDITION = re.compile(
+    r"\s(?:goty|game of the year"
+    r"|(?:goty|game of the year|definitive|complete|deluxe|digital deluxe|gold"
+    r"|enhanced|ultimate|special|standard|legendary|premium|platinum"
+    r"|collectors|anniversary) edition)$"
+)
+ROMAN_NUMERALS = {
+    "ii": "2",
+    "iii": "3",
+    "iv": "4",
+    "v": "5",
+    "vi": "6",
+    "vii": "7",
+    "viii": "8",
+    "ix": "9",
+    "xi": "11",
+    "xii": "12",
+    "xiii": "13",
+    "xiv": "14",
+    "xv": "15",
+    "xvi": "16",
+}
+
+
+@lru_cache(maxsize=None)
+def normalize_title(title: str) -> str:
+    """Titel string-normalisieren für Match/Join (Regeln siehe Modul-Doku)."""
+    t = _SYMBOLS.sub("", str(title))
+    t = unicodedata.normalize("NFKC", t).lower().strip()
+    t = _APOSTROPHES.sub("", t).replace("&", " and ")
+    t = _SPACES.sub(" ", _PUNCTUATION.sub(" ", t)).strip()
+    while True:
+        folded = _EDITION.sub("", t)
+        if folded == t or not folded:
+            break
+        t = folded
+    return " ".join(ROMAN_NUMERALS.get(w, w) for w in t.split(" "))
+
+
+def normalize_series(values, titles=None) -> pd.Series:
+    """
+    Normalisierte Titel für eine ganze Spalte als Kategorie-Serie.
+    titles: TitleDictionary – Ergebnis wird dort (persistent) mitgeführt.
+    """
+    index = getattr(values, "index", None)
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    uniques = [str(u) for u in uniques]
+    if titles is not None:
+        norm = titles.norm_titles(titles.to_norm(titles.lookup_ids(uniques)))
+    else:
+        norm = np.array([normalize_title(u) for u in uniques], dtype=object)
+    # gleiche Normalform aus verschiedenen Roh-Titeln -> eine Kategorie
+    norm_codes, categories = pd.factorize(pd.Series(norm, dtype=object))
+    lookup = np.append(norm_codes, -1)  # Code -1 (NaN) bleibt -1
+    cat = pd.Categorical.from_codes(lookup[codes], categories=categories)
+    return pd.Series(cat, index=index)
@@ -0,0 +1,113 @@
+"""
+Besitzer-Engagement pro Spiel per sortiertem Integer-Merge
+==========================================================
+Try.py baut dafür owner_hours per
+ownership_pairs.merge(plays, on=["user_id", "game"], how="left") auf
+String-Schlüsseln, hängt drei bool-Spalten an und aggregiert neun Spalten.
+Hier:
+
+1. Kauf- und Spielpaare tragen denselben 64-Bit-Schlüssel
+   (user_id << 32 | game_id, siehe streaming.pair_keys).
+2. Die Spielpaare sind nach Schlüssel sortiert; jedes Kaufpaar wird per
+   searchsorted gefunden (Merge-Join ohne Hash-Tabelle), Besitzer ohne
+   Spielzeit bekommen 0 Stunden.
+3. Einmal nach (Spiel, Stunden) sortieren; alle Kennzahlen sind danach
+   Segment-Reduktionen, der Median liegt direkt in der Segmentmitte.
+
+Speicher: eine Handvoll Arrays mit je einem Eintrag pro Kaufpaar.
+
+    owners, players, share_played, share_played_ge_<t>h (pro Schwelle),
+    avg_hours_per_owner, median_hours_per_owner, total_hours
+"""
+
+import numpy as np
+import pandas as pd
+
+from .facts import Facts
+from .streaming import pair_keys
+
+OWNER_THRESHOLDS = (2, 3)
+GAME_MASK = np.uint64(0xFFFFFFFF)
+
+
+def threshold_column(t) -> str:
+    return f"share_played_ge_{float(t):g}h"
+
+
+def owner_engagement(
+    owner_keys: np.ndarray,
+    play_keys: np.ndarray,
+    play_hours: np.ndarray,
+    thresholds=OWNER_THRESHOLDS,
+) -> dict:
+    """
+    Kennzahlen pro Spiel über alle Besitzer.
+    owner_keys: Schlüssel der Kaufpaare (eindeutig)
+    play_keys:  Schlüssel der Spielpaare (eindeutig), play_hours: Stunden dazu
+    Rückgabe: game (game_id, aufsteigend) und ein Array pro Kennzahl.
+    """
+    owner_keys = np.asarray(owner_keys, dtype=np.uint64)
+    play_keys = np.asarray(play_keys, dtype=np.uint64)
+    play_hours = np.asarray(play_hours, dtype=np.float64)
+    if len(play_keys) > 1 and (play_keys[1:] < play_keys[:-1]).any():
+        order = np.argsort(play_keys, kind="stable")
+        play_keys, play_hours = play_keys[order], play_hours[order]
+
+    hours = np.zeros(len(owner_keys))
+    if len(play_keys):
+        pos = np.minimum(np.searchsorted(play_keys, owner_keys), len(play_keys) - 1)
+        hit = play_keys[pos] == owner_keys
+        hours[hit] = play_hours[pos[hit]]
+
+    columns = ["owners", "players", "share_played"]
+    columns += [threshold_column(t) for t in thresholds]
+    columns += ["avg_hours_per_owner", "median_hours_per_owner", "total_hours"]
+    if len(owner_keys) == 0:
+        out = {"game": np.zeros(0, dtype=np.int32)}
+        out.update({c: np.zeros(0) for c in columns})
+        return out
+
+    game = (owner_keys & GAME_MASK).astype(np.int32)
+    order = np.lexsort((hours, game))
+    game, hours = game[order], hours[order]
+    starts = np.flatnonzero(np.concatenate([[True], game[1:] != game[:-1]]))
+    owners = np.diff(np.append(starts, len(game)))
+    total = np.add.reduceat(hours, starts)
+    players = np.add.reduceat((hours > 0).astype(np.int64), starts)
+    # Segmente sind nach Stunden sortiert: Median = Mitte (bzw. Mittel der beiden)
+    median = (hours[starts + (owners - 1) // 2] + hours[starts + owners // 2]) / 2
+
+    out = {
+        "game": game[starts],
+        "owners": owners,
+        "players": players,
+        "share_played": players / owners,
+    }
+    for t in thresholds:
+        above = np.add.reduceat((hours >= t).astype(np.int64), starts)
+        out[threshold_column(t)] = above / owners
+    out["avg_hours_per_owner"] = total / owners
+    out["median_hours_per_owner"] = median
+    out["total_hours"] = total
+    return out
+
+
+def owner_engagement_table(
+    facts: Facts, thresholds=OWNER_THRESHOLDS, segment=None
+) -> pd.DataFrame:
+    """
+    owner_engagement() auf der Faktentabelle (facts.py): Besitzer = Paare mit
+    purchase-Zeile, Stunden = Summe der play-Stunden (0 = nie gespielt).
+    Index: Spieltitel (alphabetisch, wie groupby("game")).
+    segment: nur Besitzer im Segment (segments.Segment).
+    """
+    user_id = np.asarray(facts.user_id)
+    keys = pair_keys(user_id, np.asarray(facts.game_id))
+    hours = np.nan_to_num(np.asarray(facts.hours_sum, dtype=np.float64))
+    played = hours > 0
+    owned = np.asarray(facts.purchased)
+    if segment is not None:
+        owned = owned & segment.contains(user_id)
+    out = owner_engagement(keys[owned], keys[played], hours[played], thresholds)
+    index = pd.Index(facts.games[out.pop("game")], name="game")
+    return pd.DataFrame(out, index=index).sort_index()
@@ -0,0 +1,220 @@
+"""
+Paralleles Parsen einer großen Steam-CSV über Byte-Bereiche
+===========================================================
+Die Datei wird in zeilenbündige Byte-Bereiche (~PART_BYTES) zerlegt: jede
+Grenze wird vom geschätzten Offset bis hinter das nächste '\\n' verschoben,
+so dass keine Zeile geteilt oder doppelt gelesen wird. Jeder Bereich wird in
+einem eigenen Prozess mit pd.read_csv geparst und mit einem lokalen
+Titel-Dict kodiert; der Hauptprozess übersetzt die lokalen Codes in der
+Reihenfolge der Bereiche in globale game_ids.
+Die Reihenfolge neuer Titel im Wörterbuch hängt von der Aufteilung ab
+(pro Stück alphabetisch, dann nach Stück). Deshalb liest auch der
+sequentielle Weg unkomprimierte Dateien über dieselben Byte-Bereiche
+(read_raw_parts): Zeilenreihenfolge und game_ids sind so unabhängig von
+der Zahl der Prozesse.
+Annahme: Titel enthalten keine Zeilenumbrüche (gilt für steam-200k.csv).
+Komprimierte Dateien lassen sich nicht per Byte-Offset teilen; sie werden
+als Ganzes geparst (parse_file), parallel nur über mehrere Partitionen.
+Worker laufen im "fork"-Kontext, damit Skripte ohne __main__-Guard nicht
+erneut ausgeführt werden; ohne fork (Windows) wird sequentiell geparst.
+"""
+
+import io
+import itertools
+import multiprocessing as mp
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .cache import (
+    CHUNK_ROWS,
+    COLUMN_DTYPES,
+    RAW_READ_OPTIONS,
+    encode_chunk,
+    is_compressed,
+    read_raw_chunks,
+)
+from .validation import ValidationReport, validate_chunk
+from .titles import TitleDictionary
+
+PART_BYTES = 64 << 20
+SCAN_BYTES = 1 << 16
+WINDOW_PER_WORKER = 2  # offene Bereiche pro Prozess beim geordneten Abholen
+
+
+def byte_ranges(
+    path: str, part_bytes: int = PART_BYTES, start: int = 0, end: int = None
+) -> list:
+    """
+    Zeilenbündige (start, end)-Bereiche, die die Datei (bzw. den Ausschnitt
+    [start, end), start auf einem Zeilenanfang) lückenlos abdecken.
+    """
+    size = os.path.getsize(path) if end is None else end
+    bounds = [start]
+    with open(path, "rb") as f:
+        target = start + part_bytes
+        while target < size:
+            f.seek(target)
+            while True:
+                block = f.read(SCAN_BYTES)
+                if not block:
+                    pos = size
+                    break
+                nl = block.find(b"\n")
+                if nl >= 0:
+                    pos = f.tell() - len(block) + nl + 1
+                    break
+            if pos >= size:
+                break
+            bounds.append(pos)
+            target = pos + part_bytes
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def parse_range(path: str, start: int, end: int):
+    """
+    Parst einen Byte-Bereich und validiert ihn.
+    Rückgabe: (kodierte gültige Zeilen, lokale Titelliste, Prüfergebnis),
+    Prüfergebnis = Argumente für ValidationReport.add.
+    """
+    return parse_chunks(_read_range(path, start, end))
+
+
+def parse_file(path: str):
+    """Parst eine ganze (ggf. komprimierte) Datei wie parse_range."""
+    return parse_chunks(read_raw_parts(path))
+
+
+def _read_range(path: str, start: int, end: int) -> list:
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if not data.strip():
+        return []
+    return [pd.read_csv(io.BytesIO(data), **RAW_READ_OPTIONS)]
+
+
+def read_raw_parts(
+    path: str, part_bytes: int = PART_BYTES, chunk_rows: int = CHUNK_ROWS
+):
+    """
+    Roh-Chunks in derselben Aufteilung wie beim parallelen Parsen:
+    unkomprimiert die Byte-Bereiche aus byte_ranges, komprimiert die
+    Zeilen-Chunks von read_raw_chunks.
+    """
+    if is_compressed(path):
+        yield from read_raw_chunks(path, chunk_rows)
+        return
+    for a, b in byte_ranges(path, part_bytes):
+        yield from _read_range(path, a, b)
+
+
+def parse_chunks(chunks):
+    local = {}
+    report = ValidationReport()
+    quarantined = []
+    parts = []
+    for chunk in chunks:
+        valid, counts, bad = validate_chunk(chunk)
+        report.add(len(chunk), counts, bad)
+        quarantined.append(bad)
+        parts.append(encode_chunk(valid, local))
+    cols = {
+        name: np.concatenate([p[name] for p in parts]) if parts else np.zeros(0, dt)
+        for name, dt in COLUMN_DTYPES.items()
+    }
+    bad = pd.concat(quarantined) if quarantined else pd.DataFrame()
+    return cols, list(local), (report.rows, report.counts, bad)
+
+
+def pool_context():
+    try:
+        return mp.get_context("fork")
+    except ValueError:
+        return None
+
+
+def resolve_workers(path: str, workers: int = None, part_bytes: int = PART_BYTES):
+    """None -> alle Kerne, aber sequentiell (1) bei kleinen Dateien oder ohne fork."""
+    if pool_context() is None or is_compressed(path):
+        return 1
+    if workers is None:
+        if os.path.getsize(path) < 2 * part_bytes:
+            return 1
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def iter_parsed_parts(
+    path: str,
+    titles: TitleDictionary,
+    workers: int = None,
+    part_bytes: int = PART_BYTES,
+    report: ValidationReport = None,
+):
+    """
+    Kodierte Spalten-Dicts (game = globale game_id) in Dateireihenfolge.
+    Neue Titel werden in derselben Reihenfolge wie beim sequentiellen Lesen
+    ins Wörterbuch aufgenommen; Prüfergebnisse gehen in report.
+    """
+    ranges = byte_ranges(path, part_bytes)
+    workers = min(resolve_workers(path, workers, part_bytes), max(len(ranges), 1))
+    if workers == 1:
+        results = (parse_range(path, a, b) for a, b in ranges)
+    else:
+        pool = ProcessPoolExecutor(workers, mp_context=pool_context())
+        results = _bounded_results(pool, path, ranges, WINDOW_PER_WORKER * workers)
+    try:
+        for cols, local, checked in results:
+            if report is not None:
+                report.add(*checked)
+            yield globalize_codes(cols, local, titles)
+    finally:
+        if workers > 1:
+            pool.shutdown(cancel_futures=True)
+
+
+def _bounded_results(pool, path: str, ranges: list, window: int):
+    """
+    Ergebnisse von parse_range in Dateireihenfolge, mit höchstens window
+    offenen Aufträgen: das älteste wird abgeholt, dann der nächste Bereich
+    eingereicht. Abgeholte Ergebnisse hält danach niemand mehr, der
+    Speicher bleibt bei ~window Bereichen statt der ganzen Datei.
+    """
+    pending = deque()
+    todo = iter(ranges)
+    for a, b in itertools.islice(todo, window):
+        pending.append(pool.submit(parse_range, path, a, b))
+    while pending:
+        result = pending.popleft().result()
+        for a, b in itertools.islice(todo, 1):
+            pending.append(pool.submit(parse_range, path, a, b))
+        yield result
+        del result
+
+
+def globalize_codes(cols: dict, local: list, titles: TitleDictionary) -> dict:
+    ids = titles.lookup_ids(local)
+    game = cols["game"]
+    out = np.full(len(game), -1, dtype=np.int32)
+    valid = game >= 0
+    out[valid] = ids[game[valid]]
+    cols["game"] = out
+    return cols
+
+
+def parse_parallel(
+    path: str,
+    titles: TitleDictionary,
+    workers: int = None,
+    part_bytes: int = PART_BYTES,
+) -> dict:
+    """Ganze Datei parallel parsen und zu einem Spalten-Dict zusammenfügen."""
+    parts = list(iter_parsed_parts(path, titles, workers, part_bytes))
+    if not parts:
+        return {}
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
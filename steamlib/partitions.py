@@ -0,0 +1,135 @@
+"""
+Partitionierte Event-Logs (Verzeichnis oder Glob)
+=================================================
+Tages- oder Shard-Dateien (auch .gz/.bz2/.xz, beim Lesen gestreamt entpackt)
+werden einzeln in ihren eigenen Binär-Cache (<datei>.cache) geschrieben.
+Bei einem erneuten Lauf werden nur neue oder geänderte Partitionen geparst –
+mehrere davon parallel in eigenen Prozessen; die lokalen Titel-Codes werden
+im Hauptprozess in Partitionsreihenfolge ins gemeinsame Wörterbuch
+übernommen. Die übrigen Partitionen kommen unverändert aus ihrem Cache.
+Das Sammelverzeichnis (default_cache_dir(source)) enthält nur ein Manifest
+mit der Partitionsliste und einem kombinierten Hash, damit abgeleitete
+Artefakte (z.B. interactions) wie bei einer Einzeldatei prüfen können, ob
+sie noch aktuell sind.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cache import (
+    CACHE_VERSION,
+    COLUMN_DTYPES,
+    Events,
+    build_cache,
+    cache_is_fresh,
+    default_cache_dir,
+    file_fingerprint,
+    list_partitions,
+    new_report,
+    open_cache,
+    read_manifest,
+    write_cache,
+    write_manifest,
+)
+from .parallel import globalize_codes, parse_file, pool_context
+from .titles import TitleDictionary, open_titles
+
+
+def stale_partitions(
+    paths: list, titles: TitleDictionary, verify_hash: bool = False
+) -> list:
+    """Partitionen ohne gültigen Cache (neu, geändert oder neues Wörterbuch)."""
+    return [
+        p
+        for p in paths
+        if not cache_is_fresh(
+            p, default_cache_dir(p), verify_hash=verify_hash, titles_token=titles.token
+        )
+    ]
+
+
+def build_partitions(paths: list, titles: TitleDictionary, workers: int = None) -> None:
+    """Baut die Caches der angegebenen Partitionen (parallel, falls möglich)."""
+    if not paths:
+        return
+    if len(paths) == 1:
+        build_cache(paths[0], titles=titles, workers=workers)
+        return
+    if pool_context() is None:
+        workers = 1
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers == 1:
+        for path in paths:
+            build_cache(path, titles=titles, workers=1)
+        return
+    with ProcessPoolExecutor(workers, mp_context=pool_context()) as pool:
+        jobs = [(p, file_fingerprint(p), pool.submit(parse_file, p)) for p in paths]
+        for path, fingerprint, fut in jobs:
+            cols, local, checked = fut.result()
+            cache_dir = default_cache_dir(path)
+            report = new_report(cache_dir)
+            report.add(*checked)
+            write_cache(
+                cache_dir,
+                [globalize_codes(cols, local, titles)],
+                titles,
+                fingerprint,
+                report,
+            )
+
+
+def open_partitions(
+    source: str,
+    cache_dir: str = None,
+    rebuild: bool = False,
+    verify_hash: bool = False,
+    titles: TitleDictionary = None,
+    workers: int = None,
+) -> Events:
+    """
+    Events aller Partitionen in Pfadreihenfolge.
+    Bei nur einer Partition bleiben die Spalten memory-mapped, sonst werden
+    sie aneinandergehängt.
+    """
+    paths = list_partitions(source)
+    if not paths:
+        raise FileNotFoundError(f"Keine Partitionen gefunden: {source}")
+    titles = titles if titles is not None else open_titles(source)
+    stale = paths if rebuild else stale_partitions(paths, titles, verify_hash)
+    build_partitions(stale, titles, workers)
+
+    parts = [open_cache(default_cache_dir(p)) for p in paths]
+    _write_source_manifest(cache_dir or default_cache_dir(source), paths, titles)
+    if len(parts) == 1:
+        cols = {name: getattr(parts[0], name) for name in COLUMN_DTYPES}
+    else:
+        cols = {
+            name: np.concatenate([np.asarray(getattr(e, name)) for e in parts])
+            for name in COLUMN_DTYPES
+        }
+    return Events(games=np.array(titles.raw, dtype=object), **cols)
+
+
+def _write_source_manifest(cache_dir: str, paths: list, titles: TitleDictionary):
+    entries = []
+    digest = hashlib.blake2b(digest_size=16)
+    rows = 0
+    for path in paths:
+        manifest = read_manifest(default_cache_dir(path))
+        name = os.path.basename(path)
+        entries.append({"file": name, "blake2b": manifest["source"]["blake2b"]})
+        digest.update(name.encode("utf-8") + b"\0")
+        digest.update(manifest["source"]["blake2b"].encode("ascii"))
+        rows += manifest["rows"]
+    manifest = {
+        "version": CACHE_VERSION,
+        "titles_token": titles.token,
+        "source": {"blake2b": digest.hexdigest(), "partitions": entries},
+        "rows": rows,
+    }
+    if read_manifest(cache_dir) != manifest:
+        os.makedirs(cache_dir, exist_ok=True)
+        write_manifest(cache_dir, manifest)
@@ -0,0 +1,105 @@
+"""
+Top-N-Listen ohne Sortieren des ganzen Katalogs
+===============================================
+Fast jede Ausgabe ist ein sort_values(...).head(20) auf der kompletten
+Tabelle pro Spiel. Hier wird pro Kriterium nur eine Teilauswahl gebildet:
+
+    top_order(values, k)  argpartition auf die k größten Werte, danach nur
+                          diese k sortiert (absteigend, bei Gleichstand in
+                          Tabellenreihenfolge; NaN ganz hinten)
+    RankingIndex          hält für jedes Kriterium die besten `depth` Zeilen
+                          vorberechnet; top() filtert (z.B. min_players) nur
+                          entlang dieser Reihenfolge und fällt erst zurück auf
+                          eine neue Teilauswahl, wenn der Vorrat nicht reicht
+
+Dazu die beiden Scores aus FinnsPlayground (engagement_score,
+quality_score), damit Skripte und Top20.py dieselbe Definition nutzen.
+"""
+
+import numpy as np
+import pandas as pd
+
+RANK_DEPTH = 1000
+
+
+def top_order(values, k: int) -> np.ndarray:
+    """Zeilenpositionen der k größten Werte, absteigend (NaN zuletzt)."""
+    values = np.asarray(values, dtype=np.float64)
+    k = max(0, min(int(k), len(values)))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    valid = np.flatnonzero(~np.isnan(values))
+    if k > len(valid):
+        missing = np.flatnonzero(np.isnan(values))[: k - len(valid)]
+        return np.concatenate([valid[top_order(values[valid], len(valid))], missing])
+    v = values[valid]
+    if k < len(v):
+        # k-größter Wert als Grenze; bei Gleichstand gewinnt die frühere Zeile
+        cut = v[np.argpartition(-v, k - 1)[k - 1]]
+        above = np.flatnonzero(v > cut)
+        ties = np.flatnonzero(v == cut)[: k - len(above)]
+        pick = np.concatenate([above, ties])
+    else:
+        pick = np.arange(len(v))
+    return valid[pick[np.lexsort((pick, -v[pick]))]]
+
+
+def top_rows(df: pd.DataFrame, col: str, n: int = 20) -> pd.DataFrame:
+    """Wie df.sort_values(col, ascending=False).head(n), ohne Vollsortierung."""
+    return df.iloc[top_order(df[col].to_numpy(dtype=np.float64), n)]
+
+
+class RankingIndex:
+    """Vorberechnete Top-Reihenfolgen pro Kriterium für wiederholte Abfragen."""
+
+    def __init__(
+        self,
+        table: pd.DataFrame,
+        criteria,
+        depth: int = RANK_DEPTH,
+        players: str = "players",
+    ):
+        self.table = table.reset_index(drop=True)
+        self.players = players
+        self.values = {
+            c: self.table[c].to_numpy(dtype=np.float64, na_value=np.nan)
+            for c in criteria
+        }
+        self.order = {c: top_order(v, depth) for c, v in self.values.items()}
+
+    @property
+    def criteria(self) -> list:
+        return list(self.values)
+
+    def top(self, criterion: str, n: int = 20, min_players: int = 0) -> pd.DataFrame:
+        """Die n besten Zeilen nach criterion mit mindestens min_players Spielern."""
+        if criterion not in self.values:
+            raise KeyError(
+                f"Unbekanntes Kriterium: {criterion!r} (erlaubt: {self.criteria})"
+            )
+        order = self.order[criterion]
+        if min_players and self.players in self.table.columns:
+            ok = self.table[self.players].to_numpy() >= min_players
+            rows = order[ok[order]][:n]
+            if len(rows) < n and len(order) < len(self.table):
+                # Vorrat erschöpft: Teilauswahl nur über die gefilterten Zeilen
+                keep = np.flatnonzero(ok)
+                rows = keep[top_order(self.values[criterion][keep], n)]
+        else:
+            rows = order[:n]
+            if len(rows) < n and len(order) < len(self.table):
+                rows = top_order(self.values[criterion], n)
+        return self.table.iloc[rows]
+
+
+def engagement_score(metascore, avg_playtime_hours):
+    """Metascore/100 · log1p(Ø Spielzeit) – log1p dämpft Ausreißer."""
+    ms = metascore.fillna(0).clip(lower=0, upper=100)
+    return (ms / 100.0) * np.log1p(avg_playtime_hours.clip(lower=0))
+
+
+def quality_score(metascore, userscore=None):
+    """0.6 · Metascore/100 + 0.4 · Userscore/10 (fehlend -> 0)."""
+    ms = metascore.fillna(0).clip(lower=0, upper=100)
+    us_norm = 0.0 if userscore is None else userscore.fillna(0).clip(0, 10) / 10.0
+    return 0.6 * (ms / 100.0) + 0.4 * us_norm
@@ -0,0 +1,113 @@
+"""
+Retention/Engagement pro Spiel in einem Durchgang
+=================================================
+Ersetzt die Schleife "for game in purchases['Game'].unique()", die pro Spiel
+die kompletten purchase- und play-Frames filtert (O(Spiele × Zeilen)).
+Hier werden die Spiel-Codes einmal faktorisiert; Käufer und Spieler sind
+eindeutige (Spiel, User)-Paare, gezählt per bincount, die mittlere
+Spielzeit ist eine Segment-Summe über die nach Spiel (stabil) sortierten
+play-Zeilen. Ergebnis wie bisher (gleiche Reihenfolge, gleiche Werte):
+
+    game, retention_rate, avg_playtime, buyers, players
+    retention_category  "Niedrig (<lo%)", "Mittel (lo-hi%)", "Hoch (>hi%)"
+    quadrant            "Oben/Unten Rechts/Links" relativ zu den Medianen
+"""
+
+import numpy as np
+import pandas as pd
+
+RETENTION_BOUNDS = (40, 80)
+QUADRANTS = ("Oben Rechts", "Oben Links", "Unten Rechts", "Unten Links")
+
+
+def _unique_pairs(game: np.ndarray, user: np.ndarray, n_games: int) -> np.ndarray:
+    """Anzahl verschiedener User pro Spiel-Code."""
+    pairs = pd.DataFrame({"g": game, "u": user}).drop_duplicates()
+    return np.bincount(pairs["g"].to_numpy(), minlength=n_games)
+
+
+def _segment_mean(values: np.ndarray, game: np.ndarray, n_games: int) -> np.ndarray:
+    """
+    Mittelwert pro Spiel wie Series.mean() auf dem gefilterten Frame:
+    Summe der Zeilen (in Originalreihenfolge, im Werttyp) geteilt durch die
+    Anzahl. Die Segmente liegen nach einem stabilen Sortieren zusammen; die
+    Summe läuft pro Segment über np.add.reduce, damit die paarweise
+    Summation (und damit jedes Bit) wie bei pandas bleibt.
+    """
+    order = np.argsort(game, kind="stable")
+    counts = np.bincount(game, minlength=n_games)
+    x = values[order]
+    segments = np.split(x, np.cumsum(counts)[:-1])
+    sums = np.array([np.add.reduce(seg) for seg in segments], dtype=x.dtype)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts.astype(x.dtype)
+
+
+def retention_categories(rate, bounds=RETENTION_BOUNDS) -> np.ndarray:
+    """rate < lo -> niedrig, lo <= rate <= hi -> mittel, sonst hoch."""
+    lo, hi = bounds
+    rate = np.asarray(rate)
+    return np.select(
+        [rate < lo, rate <= hi],
+        [f"Niedrig (<{lo}%)", f"Mittel ({lo}-{hi}%)"],
+        default=f"Hoch (>{hi}%)",
+    )
+
+
+def retention_table(
+    events: pd.DataFrame,
+    min_buyers: int = 0,
+    bounds=RETENTION_BOUNDS,
+    user: str = "user_id",
+    game: str = "game",
+    behavior: str = "behavior",
+    hours: str = "hours",
+    segment=None,
+) -> pd.DataFrame:
+    """
+    Eine Zeile pro gekauftem Spiel (Reihenfolge des ersten Kaufs).
+    retention_rate = Spieler / Käufer · 100, avg_playtime = Mittel aller
+    play-Werte (0 ohne Spieler). Kategorien und Quadranten (Mediane) beziehen
+    sich auf die Spiele mit mindestens min_buyers Käufern.
+    segment: nur Zeilen, deren user im Segment liegt (segments.Segment).
+    """
+    codes, titles = pd.factorize(events[game])
+    n_games = len(titles)
+    users = events[user].to_numpy()
+    action = events[behavior].to_numpy()
+    bought = (action == "purchase") & (codes >= 0)
+    played = (action == "play") & (codes >= 0)
+    if segment is not None:
+        inside = segment.contains(users)
+        bought &= inside
+        played &= inside
+
+    buyers = _unique_pairs(codes[bought], users[bought], n_games)
+    players = _unique_pairs(codes[played], users[played], n_games)
+    values = events[hours].to_numpy()[played]
+    avg = _segment_mean(values, codes[played], n_games)
+
+    first_codes, first_rows = np.unique(codes[bought], return_index=True)
+    order = first_codes[np.argsort(first_rows)]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = players[order] / buyers[order] * 100
+    table = pd.DataFrame(
+        {
+            "game": np.asarray(titles)[order],
+            "retention_rate": rate,
+            "avg_playtime": np.where(players[order] > 0, avg[order], 0),
+            "buyers": buyers[order],
+            "players": players[order],
+        }
+    )
+    table = table[table["buyers"] >= min_buyers].copy()
+
+    table["retention_category"] = retention_categories(table["retention_rate"], bounds)
+    median_rate = table["retention_rate"].median()
+    median_time = table["avg_playtime"].median()
+    top = (table["retention_rate"] >= median_rate).to_numpy()
+    right = (table["avg_playtime"] >= median_time).to_numpy()
+    table["quadrant"] = np.select(
+        [top & right, top, right], list(QUADRANTS[:3]), default=QUADRANTS[3]
+    )
+    return table
@@ -0,0 +1,229 @@
+"""
+Nutzer-Segmente als Bitmaps
+===========================
+Alle Kennzahlen laufen sonst über alle User; für Kohorten (viele Spiele
+im Besitz, Top-10 % nach Spielzeit, Besitzer eines Spiels, Cluster aus
+TestML.py) müsste man den DataFrame filtern und das Skript neu laufen lassen.
+
+Ein Segment ist ein Bit pro User des Datensatzes: Bit i gehört zu
+users[i], den sortierten user_ids der Faktentabelle (facts.py, dieselbe
+Reihenfolge wie Interactions.user_ids). Die Bits liegen gepackt in
+uint64-Wörtern (12k User -> 1,5 KB pro Segment), & | ^ ~ - sind
+wortweise Operationen, len() zählt per Popcount. Gespeichert wird je nach
+Dichte als Wortliste oder als Liste der gesetzten Positionen
+(np.savez_compressed).
+
+Die Kennzahlen-Funktionen pro Spiel (group_stats, group_inequality,
+ThresholdIndex/threshold_shares, retention_table, owner_engagement_table,
+Interactions.players_per_game/owners_per_game) nehmen segment=...; die
+Zeilen außerhalb fallen über eine Maske auf user_id weg, der Basis-Frame
+wird nicht kopiert:
+
+    facts = open_facts("steam-200k.csv")
+    heavy = heavy_users(facts, 0.1)
+    collectors = owned_more_than(facts, 50)
+    group_stats(df, segment=heavy & ~collectors)
+"""
+
+import numpy as np
+
+from .facts import Facts
+from .ranking import top_order
+
+WORD_BITS = 64
+
+
+def _words(n: int) -> int:
+    return (n + WORD_BITS - 1) // WORD_BITS
+
+
+class Segment:
+    """Menge von Usern als gepackte Bitmap über einem festen User-Universum."""
+
+    def __init__(self, words: np.ndarray, users: np.ndarray):
+        self.words = np.asarray(words, dtype="<u8")
+        self.users = users
+        if len(self.words) != _words(len(users)):
+            raise ValueError(
+                f"{len(self.words)} Wörter passen nicht zu {len(users)} Usern."
+            )
+
+    # --- Aufbau --------------------------------------------------------
+
+    @classmethod
+    def from_mask(cls, mask, users: np.ndarray) -> "Segment":
+        """Bool-Maske in der Reihenfolge von users."""
+        mask = np.asarray(mask, dtype=bool)
+        if len(mask) != len(users):
+            raise ValueError(f"Maske hat {len(mask)} statt {len(users)} Einträge.")
+        bits = np.zeros(_words(len(users)) * WORD_BITS, dtype=bool)
+        bits[: len(mask)] = mask
+        return cls(np.packbits(bits, bitorder="little").view("<u8"), users)
+
+    @classmethod
+    def from_user_ids(cls, user_ids, users: np.ndarray) -> "Segment":
+        """Segment aus user_ids (unbekannte IDs werden ignoriert)."""
+        user_ids = np.asarray(user_ids)
+        mask = np.zeros(len(users), dtype=bool)
+        if len(users):
+            pos = np.minimum(np.searchsorted(users, user_ids), len(users) - 1)
+            mask[pos[users[pos] == user_ids]] = True
+        return cls.from_mask(mask, users)
+
+    @classmethod
+    def full(cls, users: np.ndarray) -> "Segment":
+        return cls.from_mask(np.ones(len(users), dtype=bool), users)
+
+    @classmethod
+    def empty(cls, users: np.ndarray) -> "Segment":
+        return cls(np.zeros(_words(len(users)), dtype="<u8"), users)
+
+    @classmethod
+    def from_labels(cls, labels, users: np.ndarray) -> dict:
+        """Ein Segment pro Label (z.B. KMeans-Cluster pro Zeile von users)."""
+        labels = np.asarray(labels)
+        return {
+            label.item(): cls.from_mask(labels == label, users)
+            for label in np.unique(labels)
+        }
+
+    # --- Mengenoperationen --------------------------------------------
+
+    def _check(self, other: "Segment") -> None:
+        if other.users is not self.users and not np.array_equal(
+            other.users, self.users
+        ):
+            raise ValueError("Segmente gehören zu verschiedenen User-Universen.")
+
+    def __and__(self, other: "Segment") -> "Segment":
+        self._check(other)
+        return Segment(self.words & other.words, self.users)
+
+    def __or__(self, other: "Segment") -> "Segment":
+        self._check(other)
+        return Segment(self.words | other.words, self.users)
+
+    def __xor__(self, other: "Segment") -> "Segment":
+        self._check(other)
+        return Segment(self.words ^ other.words, self.users)
+
+    def __sub__(self, other: "Segment") -> "Segment":
+        self._check(other)
+        return Segment(self.words & ~other.words, self.users)
+
+    def __invert__(self) -> "Segment":
+        words = ~self.words
+        tail = len(self.users) % WORD_BITS
+        if tail:
+            words[-1] &= np.uint64((1 << tail) - 1)
+        return Segment(words, self.users)
+
+    def __len__(self) -> int:
+        return int(np.bitwise_count(self.words).sum())
+
+    @property
+    def size(self) -> int:
+        """Anzahl User im Universum (gesetzt oder nicht)."""
+        return len(self.users)
+
+    # --- Abfragen -----------------------------------------------------
+
+    def mask(self) -> np.ndarray:
+        """Bool-Maske in der Reihenfolge von users."""
+        return np.unpackbits(
+            self.words.view(np.uint8), count=len(self.users), bitorder="little"
+        ).astype(bool)
+
+    def positions(self) -> np.ndarray:
+        return np.flatnonzero(self.mask())
+
+    def user_ids(self) -> np.ndarray:
+        return self.users[self.positions()]
+
+    def contains(self, user_ids) -> np.ndarray:
+        """Zeilenmaske: liegt user_id im Segment? (unbekannte IDs -> False)"""
+        user_ids = np.asarray(user_ids)
+        if len(self.users) == 0:
+            return np.zeros(user_ids.shape, dtype=bool)
+        pos = np.minimum(np.searchsorted(self.users, user_ids), len(self.users) - 1)
+        bits = self.words[pos >> 6] >> (pos & 63).astype(np.uint64)
+        return (self.users[pos] == user_ids) & (bits & np.uint64(1)).astype(bool)
+
+    # --- Persistenz ---------------------------------------------------
+
+    def to_state(self) -> dict:
+        """Dünn besetzt als Positionen, sonst als Wörter (kleinere Variante)."""
+        n = len(self)
+        if n * 4 < len(self.words) * 8:
+            return {"positions": self.positions().astype(np.uint32)}
+        return {"words": self.words}
+
+    @classmethod
+    def from_state(cls, state, users: np.ndarray) -> "Segment":
+        """Gegenstück zu to_state()."""
+        if "words" in state:
+            return cls(np.array(state["words"]), users)
+        mask = np.zeros(len(users), dtype=bool)
+        mask[np.asarray(state["positions"], dtype=np.int64)] = True
+        return cls.from_mask(mask, users)
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, users=self.users, **self.to_state())
+
+    @classmethod
+    def load(cls, path: str, users: np.ndarray = None) -> "Segment":
+        """
+        Lädt ein gespeichertes Segment. Mit users wird auf dieses Universum
+        abgebildet (User, die es dort nicht gibt, fallen weg).
+        """
+        with np.load(path) as state:
+            saved = state["users"]
+            segment = cls.from_state(state, saved)
+        if users is None or np.array_equal(saved, users):
+            return segment
+        return cls.from_user_ids(segment.user_ids(), users)
+
+
+# --- Kohorten aus der Faktentabelle -----------------------------------
+
+
+def user_universe(facts: Facts) -> np.ndarray:
+    """Sortierte user_ids der Faktentabelle (Bit-Reihenfolge der Segmente)."""
+    return np.unique(np.asarray(facts.user_id))
+
+
+def _per_user(facts: Facts, values: np.ndarray) -> np.ndarray:
+    """Summe von values pro User (Faktentabelle ist nach user_id sortiert)."""
+    user_id = np.asarray(facts.user_id)
+    if len(user_id) == 0:
+        return np.zeros(0, dtype=np.asarray(values).dtype)
+    starts = np.flatnonzero(np.concatenate([[True], user_id[1:] != user_id[:-1]]))
+    return np.add.reduceat(np.asarray(values), starts)
+
+
+def owned_more_than(facts: Facts, n: int) -> Segment:
+    """User mit mehr als n gekauften Spielen."""
+    users = user_universe(facts)
+    owned = _per_user(facts, np.asarray(facts.purchased, dtype=np.int64))
+    return Segment.from_mask(owned > n, users)
+
+
+def heavy_users(facts: Facts, share: float = 0.1) -> Segment:
+    """
+    Die share (Default: Top-10 %) User mit der höchsten Gesamtspielzeit
+    (Summe hours_sum; bei Gleichstand entscheidet die kleinere user_id).
+    """
+    users = user_universe(facts)
+    hours = np.nan_to_num(np.asarray(facts.hours_sum, dtype=np.float64))
+    total = _per_user(facts, hours)
+    mask = np.zeros(len(users), dtype=bool)
+    mask[top_order(total, int(np.ceil(share * len(users))))] = True
+    return Segment.from_mask(mask, users)
+
+
+def owners_of(facts: Facts, game) -> Segment:
+    """User, die game (Titel oder game_id) gekauft haben."""
+    users = user_universe(facts)
+    game_id = np.flatnonzero(facts.games == game) if isinstance(game, str) else game
+    rows = np.asarray(facts.purchased) & np.isin(np.asarray(facts.game_id), game_id)
+    return Segment.from_user_ids(np.asarray(facts.user_id)[rows], users)
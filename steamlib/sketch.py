@@ -0,0 +1,386 @@
+"""
+Mergebare Quantil-Skizzen pro Spiel
+===================================
+Optionale Alternative zu den exakten Perzentilen (group_stats), für die
+jeder Stundenwert im Speicher liegen und sortiert werden muss. Pro Spiel
+wird nur ein Histogramm über logarithmische Buckets gehalten:
+
+    Bucket i deckt (gamma^(i-1), gamma^i] ab, gamma = (1 + alpha) / (1 - alpha)
+    Schätzwert des Buckets: 2 · gamma^i / (gamma + 1)
+
+Jeder geschätzte Rangwert liegt damit höchstens alpha (relativ) neben dem
+exakten Wert (Fehlerschranke alpha, Default SKETCH_ALPHA = 1 %); Werte <= 0
+landen in einem eigenen Null-Bucket. Dazu kommen pro Spiel Anzahl, Summe
+und Quadratsumme (mean/std exakt). Der Speicher wächst mit Spielen × belegten
+Buckets (bei 1 % typischerweise wenige hundert), nicht mit den Zeilen.
+
+Zwei Skizzen mit gleichem alpha lassen sich mit merge() addieren – Chunks,
+Byte-Bereiche aus mehreren Prozessen (sketch_file) und Partitionen ergeben
+dieselbe Skizze wie ein Durchlauf über alles. save()/load() schreiben eine
+einzelne .npz; IncrementalAggregate hält auf Wunsch eine Skizze neben dem
+Aggregat (sketch_alpha=...).
+
+Skizziert wird dieselbe Population wie im exakten Pfad der Skripte:
+ein Wert pro gespieltem (user_id, game)-Paar (max. Stunden wie load_clean,
+aus der Faktentabelle bzw. der Paartabelle von IncrementalAggregate);
+count ist damit die Spielerzahl. sketch_file(reduce=None) skizziert
+stattdessen jede play-Zeile. compare_sketch() zeigt den Fehler gegenüber
+load_clean (gleiche Eingabe, innerhalb alpha) und allen play-Zeilen:
+
+    python -m steamlib.sketch ../steam-200k.csv 0.01
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .cache import BEHAVIORS, is_compressed, list_partitions
+from .parallel import byte_ranges, parse_file, parse_range, pool_context
+from .parallel import resolve_workers
+from .stats import derive_stats
+
+SKETCH_ALPHA = 0.01
+SKETCH_QUANTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75, "p90": 0.9, "p95": 0.95}
+ZERO_BUCKET = -(1 << 31)
+SKETCH_ARRAYS = ("keys", "n", "count", "total", "total_sq")
+PLAY = BEHAVIORS.index("play")
+
+
+def _keys(segment: np.ndarray, bucket: np.ndarray) -> np.ndarray:
+    """(Segment, Bucket) als ein sortierbarer uint64-Schlüssel."""
+    shifted = (bucket.astype(np.int64) - ZERO_BUCKET).astype(np.uint64)
+    return (segment.astype(np.uint64) << np.uint64(32)) | shifted
+
+
+def _split_keys(keys: np.ndarray):
+    segment = (keys >> np.uint64(32)).astype(np.int64)
+    bucket = (keys & np.uint64(0xFFFFFFFF)).astype(np.int64) + ZERO_BUCKET
+    return segment, bucket
+
+
+class QuantileSketch:
+    """Log-Bucket-Histogramme pro Segment (Spiel), mergebar und speicherbar."""
+
+    def __init__(self, alpha: float = SKETCH_ALPHA):
+        if not 0 < alpha < 1:
+            raise ValueError(f"alpha muss in (0, 1) liegen, nicht {alpha}")
+        self.alpha = float(alpha)
+        self.gamma = (1 + self.alpha) / (1 - self.alpha)
+        self.lookup = {}
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.n = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.total = np.zeros(0)
+        self.total_sq = np.zeros(0)
+
+    @property
+    def games(self) -> np.ndarray:
+        return np.array(list(self.lookup), dtype=object)
+
+    def _grow(self) -> None:
+        extra = len(self.lookup) - len(self.count)
+        if extra > 0:
+            self.count = np.concatenate([self.count, np.zeros(extra, np.int64)])
+            self.total = np.concatenate([self.total, np.zeros(extra)])
+            self.total_sq = np.concatenate([self.total_sq, np.zeros(extra)])
+
+    def drop(self, segments) -> "QuantileSketch":
+        """Leert die Histogramme der Segmente (Codes), z.B. vor dem Neuaufbau."""
+        self._grow()
+        segments = np.asarray(segments, dtype=np.int64)
+        self.count[segments] = 0
+        self.total[segments] = 0
+        self.total_sq[segments] = 0
+        keep = ~np.isin(_split_keys(self.keys)[0], segments)
+        self.keys, self.n = self.keys[keep], self.n[keep]
+        return self
+
+    def _add_buckets(self, keys: np.ndarray, n: np.ndarray) -> None:
+        keys = np.concatenate([self.keys, keys])
+        uniq, inv = np.unique(keys, return_inverse=True)
+        self.n = np.bincount(
+            inv, weights=np.concatenate([self.n, n]), minlength=len(uniq)
+        ).astype(np.int64)
+        self.keys = uniq
+
+    def bucket_of(self, values: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bucket = np.ceil(np.log(values) / np.log(self.gamma))
+        return np.where(values > 0, bucket, ZERO_BUCKET).astype(np.int64)
+
+    def bucket_value(self, bucket: np.ndarray) -> np.ndarray:
+        with np.errstate(over="ignore"):
+            value = 2 * self.gamma ** bucket.astype(np.float64) / (self.gamma + 1)
+        return np.where(bucket == ZERO_BUCKET, 0.0, value)
+
+    # --- Aktualisieren -----------------------------------------------
+
+    def update(self, games, values) -> "QuantileSketch":
+        """Nimmt (Titel, Wert)-Paare auf, z.B. game/hours eines play-Chunks."""
+        codes, uniques = pd.factorize(pd.Series(games))
+        remap = np.array(
+            [self.lookup.setdefault(t, len(self.lookup)) for t in uniques],
+            dtype=np.int64,
+        )
+        segment = np.where(codes >= 0, remap[np.maximum(codes, 0)], -1)
+        return self.update_arrays(segment, values)
+
+    def update_arrays(self, segment, values) -> "QuantileSketch":
+        """Nimmt bereits kodierte Segmente auf (Codes in self.lookup, -1 = keins)."""
+        self._grow()
+        segment = np.asarray(segment, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        valid = (segment >= 0) & ~np.isnan(values)
+        segment, values = segment[valid], values[valid]
+        m = len(self.count)
+        self.count += np.bincount(segment, minlength=m)
+        self.total += np.bincount(segment, weights=values, minlength=m)
+        self.total_sq += np.bincount(segment, weights=values * values, minlength=m)
+        uniq, n = np.unique(_keys(segment, self.bucket_of(values)), return_counts=True)
+        self._add_buckets(uniq, n)
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Addiert eine zweite Skizze (gleiches alpha) hinzu."""
+        if self.alpha != other.alpha:
+            raise ValueError("Skizzen mit unterschiedlichem alpha.")
+        remap = np.array(
+            [self.lookup.setdefault(t, len(self.lookup)) for t in other.lookup],
+            dtype=np.int64,
+        )
+        self._grow()
+        other._grow()
+        np.add.at(self.count, remap, other.count)
+        np.add.at(self.total, remap, other.total)
+        np.add.at(self.total_sq, remap, other.total_sq)
+        segment, bucket = _split_keys(other.keys)
+        self._add_buckets(_keys(remap[segment], bucket), other.n)
+        return self
+
+    # --- Speichern ---------------------------------------------------
+
+    def to_state(self) -> dict:
+        """Zustand als dict von Arrays (für np.savez); Titel siehe .games."""
+        self._grow()
+        state = {name: getattr(self, name) for name in SKETCH_ARRAYS}
+        state["alpha"] = np.array(self.alpha)
+        return state
+
+    @classmethod
+    def from_state(cls, state, games) -> "QuantileSketch":
+        """Gegenstück zu to_state(); games in der Reihenfolge der Codes."""
+        sketch = cls(float(state["alpha"]))
+        sketch.lookup = {title: i for i, title in enumerate(games)}
+        for name in SKETCH_ARRAYS:
+            setattr(sketch, name, np.array(state[name]))
+        return sketch
+
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, games=np.array(list(self.lookup), dtype=str), **self.to_state())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "QuantileSketch":
+        with np.load(path) as arrays:
+            return cls.from_state(arrays, arrays["games"].tolist())
+
+    # --- Auswerten ---------------------------------------------------
+
+    def _segments(self):
+        """Buckets sortiert nach (Segment, Bucket): (Segment, Schätzwert, n, ptr)."""
+        segment, bucket = _split_keys(self.keys)
+        ptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(segment, minlength=len(self.count)))]
+        )
+        return segment, self.bucket_value(bucket), self.n, ptr
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Quantil q je Segment, linear zwischen den Nachbarrängen (leer -> NaN)."""
+        _, value, n, ptr = self._segments()
+        if not len(value):
+            return np.full(len(self.count), np.nan)
+        cum = np.cumsum(n)
+        before = np.concatenate([[0], cum])[ptr[:-1]]
+        size = np.diff(np.concatenate([[0], cum])[ptr])
+        pos = q * np.maximum(size - 1, 0)
+        lo = np.floor(pos)
+        hi = np.minimum(lo + 1, np.maximum(size - 1, 0))
+
+        def at(rank):
+            j = np.searchsorted(cum, before + rank, side="right")
+            return value[np.minimum(j, len(value) - 1)]
+
+        t = pos - lo
+        out = at(lo) * (1 - t) + at(hi) * t
+        return np.where(size > 0, out, np.nan)
+
+    def gini(self) -> np.ndarray:
+        """Gini je Segment aus den Bucket-Schätzwerten (Bindungen blockweise)."""
+        segment, value, n, ptr = self._segments()
+        mass = value * n
+        cum = np.cumsum(mass)
+        start = np.concatenate([[0.0], cum])[ptr[:-1]]
+        before = cum - mass - start[segment]
+        m = len(self.count)
+        size = np.bincount(segment, weights=n, minlength=m)
+        total = np.bincount(segment, weights=mass, minlength=m)
+        weighted = np.bincount(
+            segment, weights=n * before + value * n * (n + 1) / 2, minlength=m
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            gini = (size + 1 - 2 * weighted / total) / size
+        gini = np.where(total == 0, 0.0, gini)
+        return np.where(size == 0, np.nan, gini)
+
+    def stats(
+        self,
+        quantiles: dict = None,
+        gini: bool = False,
+        tail_ratios: dict = None,
+        games=None,
+        by: str = "game",
+    ) -> pd.DataFrame:
+        """
+        Wie group_stats: by, count, mean, std, Quantile, iqr, cov, gini,
+        Tail-Ratios; eine Zeile pro Spiel mit Werten, alphabetisch.
+        games: optional nur diese Titel.
+        """
+        self._grow()
+        quantiles = quantiles if quantiles is not None else SKETCH_QUANTILES
+        n = self.count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.total / n
+            var = (self.total_sq - n * mean * mean) / (n - 1)
+        std = np.sqrt(np.maximum(var, 0))
+        std[n < 2] = np.nan
+        out = {"count": n, "mean": mean, "std": std}
+        for name, q in quantiles.items():
+            out[name] = self.quantile(q)
+        out = derive_stats(out, quantiles, tail_ratios, self.gini() if gini else None)
+        table = pd.DataFrame({by: self.games, **out})
+        keep = n > 0
+        if games is not None:
+            keep &= table[by].isin(list(games)).to_numpy()
+        table = table[keep].sort_values(by, kind="stable")
+        return table.reset_index(drop=True)
+
+
+# --- Ganze Dateien -----------------------------------------------------
+
+
+def _sketch_cols(cols: dict, local: list, alpha: float) -> QuantileSketch:
+    sketch = QuantileSketch(alpha)
+    sketch.lookup = {title: i for i, title in enumerate(local)}
+    play = cols["behavior"] == PLAY
+    return sketch.update_arrays(cols["game"][play], cols["hours"][play])
+
+
+def _sketch_range(path: str, start: int, end: int, alpha: float) -> QuantileSketch:
+    cols, local, _ = parse_range(path, start, end)
+    return _sketch_cols(cols, local, alpha)
+
+
+def sketch_file(
+    source: str, alpha: float = SKETCH_ALPHA, workers: int = None, reduce="max"
+) -> QuantileSketch:
+    """
+    Skizze der Spielzeiten pro Spiel für eine CSV (oder einen Ordner mit
+    Partitionen).
+    reduce: "max" (Default, wie load_clean) oder "sum" = ein Wert pro
+            gespieltem (user_id, game) aus der Faktentabelle; None = jede
+            play-Zeile, Byte-Bereiche werden dann parallel skizziert
+            (workers) und danach gemergt.
+    """
+    if reduce is not None:
+        return _sketch_facts(source, alpha, reduce)
+    sketch = QuantileSketch(alpha)
+    for path in list_partitions(source):
+        if is_compressed(path):
+            sketch.merge(_sketch_cols(*parse_file(path)[:2], alpha))
+            continue
+        ranges = byte_ranges(path)
+        n_workers = min(resolve_workers(path, workers), max(len(ranges), 1))
+        if n_workers == 1:
+            parts = (_sketch_range(path, a, b, alpha) for a, b in ranges)
+            for part in parts:
+                sketch.merge(part)
+            continue
+        with ProcessPoolExecutor(n_workers, mp_context=pool_context()) as pool:
+            futures = [pool.submit(_sketch_range, path, a, b, alpha) for a, b in ranges]
+            for fut in futures:
+                sketch.merge(fut.result())
+    return sketch
+
+
+def _sketch_facts(source: str, alpha: float, reduce: str) -> QuantileSketch:
+    from .facts import open_facts
+    from .loader import REDUCERS
+
+    if reduce not in REDUCERS:
+        raise ValueError(f"Unbekannte Reduktion: {reduce!r} (erlaubt: {REDUCERS})")
+    facts = open_facts(source)
+    played = np.asarray(facts.played)
+    hours = np.asarray(facts.hours_max if reduce == "max" else facts.hours_sum)
+    used, segment = np.unique(np.asarray(facts.game_id)[played], return_inverse=True)
+    sketch = QuantileSketch(alpha)
+    sketch.lookup = {facts.games[g]: i for i, g in enumerate(used)}
+    return sketch.update_arrays(segment, hours[played])
+
+
+def compare_sketch(
+    source: str,
+    alpha: float = SKETCH_ALPHA,
+    quantiles: dict = None,
+    sketch: QuantileSketch = None,
+) -> pd.DataFrame:
+    """
+    Vergleich Skizze vs. exakte Perzentile pro Spiel. Referenzen:
+    "clean" (load_clean, gleiche Eingabe wie die Default-Skizze – prüft die
+    Schranke alpha) und "rows" (alle play-Zeilen, wie sketch_file(reduce=None)).
+    Rückgabe: eine Zeile pro (Referenz, Quantil) mit mittlerem/maximalem
+    relativen Fehler und dem Anteil der Spiele innerhalb von alpha.
+    """
+    from .loader import load_clean, load_steam
+    from .stats import group_stats
+
+    quantiles = quantiles if quantiles is not None else SKETCH_QUANTILES
+    sketch = sketch if sketch is not None else sketch_file(source, alpha)
+    approx = sketch.stats(quantiles).set_index("game")
+    references = {
+        "rows": load_steam(source, behavior="play", columns=["game", "hours"]),
+        "clean": load_clean(source),
+    }
+    rows = []
+    for ref, df in references.items():
+        exact = group_stats(df, "game", "hours", quantiles=quantiles)
+        exact["game"] = exact["game"].astype(str)
+        exact = exact.set_index("game")
+        common = exact.index.intersection(approx.index)
+        for name in quantiles:
+            e = exact.loc[common, name].to_numpy(dtype=np.float64)
+            a = approx.loc[common, name].to_numpy(dtype=np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rel = np.where(e == 0, np.abs(a), np.abs(a - e) / np.abs(e))
+            rows.append(
+                {
+                    "reference": ref,
+                    "quantile": name,
+                    "games": len(common),
+                    "mean_rel_error": np.nanmean(rel) if len(rel) else np.nan,
+                    "max_rel_error": np.nanmax(rel) if len(rel) else np.nan,
+                    "within_alpha": (
+                        np.mean(rel <= alpha * (1 + 1e-6)) if len(rel) else np.nan
+                    ),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "steam-200k.csv"
+    alpha = float(sys.argv[2]) if len(sys.argv) > 2 else SKETCH_ALPHA
+    print(compare_sketch(csv_path, alpha).to_string(index=False))
@@ -0,0 +1,209 @@
+"""
+CSV-Sniffing mit genau einem vollständigen Parse
+================================================
+Encoding, Trennzeichen und Header-Zeile werden aus einem begrenzten
+Byte-Präfix (SNIFF_BYTES) bestimmt, danach wird die Datei genau einmal mit
+pd.read_csv gelesen. Das Ergebnis (inkl. Spalten-Umbenennungen wie
+user_score -> userscore) wird als schema.json im Cache-Verzeichnis der
+Datei abgelegt und beim nächsten Lauf wiederverwendet, solange Größe und
+mtime der Datei (und die Optionen) gleich sind.
+Nur falls ein Byte hinter dem Präfix nicht zum erkannten Encoding passt,
+wird mit dem nächsten Kandidaten erneut gelesen.
+"""
+
+import codecs
+import csv
+import io
+import json
+import os
+import re
+
+import pandas as pd
+
+from .cache import default_cache_dir, file_fingerprint
+
+SCHEMA_VERSION = 1
+SCHEMA_FILE = "schema.json"
+SNIFF_BYTES = 1 << 16
+ENCODINGS = ("utf-8", "utf-8-sig", "latin-1")
+DELIMITERS = ",;\t|"
+
+
+def normalize_columns(cols) -> list:
+    """Spaltennamen vereinheitlichen (klein, '_' statt Leerzeichen, nur a-z0-9_)."""
+    norm = []
+    for c in cols:
+        c = str(c)
+        c = c.strip().lower()
+        c = re.sub(r"\s+", "_", c)
+        c = c.replace("#", "num").replace("%", "pct")
+        c = re.sub(r"[^a-z0-9_]", "", c)
+        norm.append(c)
+    return norm
+
+
+def resolve_renames(columns, renames: dict) -> dict:
+    """
+    renames: Zielname -> Kandidaten in Priorität, z.B.
+    {"metascore": ["critic_score", "critic_score_avg"]}. Umbenannt wird nur,
+    wenn es den Zielnamen noch nicht gibt (erster vorhandener Kandidat).
+    """
+    mapping = {}
+    for target, candidates in (renames or {}).items():
+        if target in columns:
+            continue
+        for c in candidates:
+            if c in columns and c not in mapping:
+                mapping[c] = target
+                break
+    return mapping
+
+
+def _decode_prefix(prefix: bytes, encodings):
+    if prefix.startswith(codecs.BOM_UTF8) and "utf-8-sig" in encodings:
+        encodings = ["utf-8-sig"] + [e for e in encodings if e != "utf-8-sig"]
+    for enc in encodings:
+        try:
+            # final=False: ein am Präfixende abgeschnittenes Zeichen ist kein Fehler
+            text = codecs.getincrementaldecoder(enc)().decode(prefix, final=False)
+        except UnicodeDecodeError:
+            continue
+        return enc, text
+    raise UnicodeDecodeError("sniff", prefix, 0, 1, "kein passendes Encoding")
+
+
+def sniff_csv(
+    path: str,
+    expected_like=None,
+    renames: dict = None,
+    encodings=ENCODINGS,
+    sniff_bytes: int = SNIFF_BYTES,
+) -> dict:
+    """
+    Bestimmt das Schema aus dem Datei-Anfang:
+    encoding, sep, header (0 oder None), columns (normalisiert), renames.
+    Header: vorhanden, wenn die erste Zeile einen der expected_like-Namen
+    enthält, sonst entscheidet csv.Sniffer.has_header.
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(sniff_bytes)
+    encoding, text = _decode_prefix(prefix, encodings)
+    lines = text.splitlines()
+    if len(prefix) == sniff_bytes and len(lines) > 1:
+        lines = lines[:-1]  # letzte Zeile ist evtl. abgeschnitten
+    sample = "\n".join(lines)
+    try:
+        sep = csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        sep = ","
+    rows = list(csv.reader(io.StringIO(sample), delimiter=sep))
+    first = normalize_columns(rows[0]) if rows else []
+    if expected_like and any(k in first for k in expected_like):
+        header = 0
+    else:
+        try:
+            header = 0 if csv.Sniffer().has_header(sample) else None
+        except csv.Error:
+            header = 0
+    columns = first if header == 0 else [f"col_{i}" for i in range(len(first))]
+    return {
+        "encoding": encoding,
+        "sep": sep,
+        "header": header,
+        "columns": columns,
+        "renames": resolve_renames(columns, renames),
+    }
+
+
+def _options(expected_like, renames, encodings) -> dict:
+    return {
+        "expected_like": list(expected_like or []),
+        "renames": {k: list(v) for k, v in (renames or {}).items()},
+        "encodings": list(encodings),
+    }
+
+
+def resolved_schema(
+    path: str, expected_like=None, renames: dict = None, encodings=ENCODINGS
+) -> dict:
+    """Schema aus dem Cache (gleiche Größe/mtime/Optionen) oder frisch gesnifft."""
+    cache_file = os.path.join(default_cache_dir(path), SCHEMA_FILE)
+    fingerprint = file_fingerprint(path, with_hash=False)
+    options = _options(expected_like, renames, encodings)
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            cached = json.load(f)
+        if (
+            cached.get("version") == SCHEMA_VERSION
+            and cached.get("source") == fingerprint
+            and cached.get("options") == options
+        ):
+            return cached["schema"]
+    except (OSError, ValueError):
+        pass
+    schema = sniff_csv(path, expected_like, renames, encodings)
+    _store_schema(cache_file, fingerprint, options, schema)
+    return schema
+
+
+def _store_schema(cache_file: str, fingerprint: dict, options: dict, schema: dict):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp = cache_file + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": SCHEMA_VERSION,
+                "source": fingerprint,
+                "options": options,
+                "schema": schema,
+            },
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+    os.replace(tmp, cache_file)
+
+
+def read_csv_sniffed(
+    path: str,
+    expected_like=None,
+    renames: dict = None,
+    encodings=ENCODINGS,
+    **read_options,
+) -> pd.DataFrame:
+    """
+    CSV mit gesnifftem/gecachtem Schema lesen: ein Parse, normalisierte und
+    umbenannte Spalten. read_options gehen unverändert an pd.read_csv
+    (z.B. na_values).
+    """
+    schema = resolved_schema(path, expected_like, renames, encodings)
+    candidates = [schema["encoding"]] + [
+        e for e in encodings if e != schema["encoding"]
+    ]
+    last_err = None
+    for enc in candidates:
+        try:
+            df = pd.read_csv(
+                path,
+                encoding=enc,
+                sep=schema["sep"],
+                header=schema["header"],
+                **read_options,
+            )
+        except UnicodeDecodeError as e:
+            last_err = e  # Zeichen hinter dem Präfix passt nicht zum Encoding
+            continue
+        if enc != schema["encoding"]:
+            schema = dict(schema, encoding=enc)
+            _store_schema(
+                os.path.join(default_cache_dir(path), SCHEMA_FILE),
+                file_fingerprint(path, with_hash=False),
+                _options(expected_like, renames, encodings),
+                schema,
+            )
+        if schema["header"] == 0:
+            df.columns = normalize_columns(df.columns)
+        else:
+            df.columns = [f"col_{i}" for i in range(df.shape[1])]
+        return df.rename(columns=schema["renames"])
+    raise RuntimeError(f"CSV konnte nicht gelesen werden. Letzter Fehler: {last_err}")
@@ -0,0 +1,233 @@
+"""
+Segmentierte Verteilungsstatistik (ein Sortierlauf für alle Gruppen)
+====================================================================
+Statt groupby().agg mit Python-Lambdas (np.percentile pro Gruppe) und
+groupby.apply(gini) wird einmal nach (Gruppen-Code, Wert) sortiert. Danach
+liegt jede Gruppe als zusammenhängendes, sortiertes Segment vor
+(Offsets ptr[g] : ptr[g + 1]) und alle Kennzahlen sind reine
+Array-Operationen über alle Segmente gleichzeitig:
+
+    count, mean, std (ddof=1)  bincount über die Codes
+    Quantile                   lineare Interpolation wie np.percentile
+    iqr                        q75 - q25 (wenn beide angefragt)
+    cov                        std / mean
+    gini                       aus den rangeigenen Gewichten im Segment
+    Tail-Ratios                Quantil / Quantil (0 im Nenner -> NaN)
+
+Ungleichheit (group_inequality) nutzt dieselben sortierten Segmente plus
+eine kumulierte Summe: Lorenzkurven mit fester Auflösung (LORENZ_POINTS
+Stützstellen pro Segment, ein kompaktes float32-Array pro Gruppe), Gini und
+Anteil der obersten x % am Gesamtwert – für jedes Spiel, jeden User oder
+jedes Genre in einem Durchgang.
+"""
+
+import numpy as np
+import pandas as pd
+
+LORENZ_POINTS = 101
+TOP_SHARES = (0.01, 0.1)
+
+
+def sort_segments(values, codes, n_segments: int = None):
+    """Werte nach (Code, Wert) sortiert: (sortierte Werte, Codes, ptr)."""
+    values = np.asarray(values)
+    if values.dtype.kind != "f":
+        values = values.astype(np.float64)
+    codes = np.asarray(codes, dtype=np.int64)
+    if n_segments is None:
+        n_segments = int(codes.max()) + 1 if len(codes) else 0
+    order = np.lexsort((values, codes))
+    counts = np.bincount(codes, minlength=n_segments)
+    ptr = np.concatenate([[0], np.cumsum(counts)])
+    return values[order], codes[order], ptr
+
+
+def segment_quantile(x: np.ndarray, ptr: np.ndarray, q: float) -> np.ndarray:
+    """Quantil q je Segment (Methode "linear" wie np.percentile; leer -> NaN)."""
+    n = np.diff(ptr)
+    pos = q * np.maximum(n - 1, 0)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(n - 1, 0))
+    t = pos - lo
+    safe = n > 0
+    a = np.where(safe, x[np.minimum(ptr[:-1] + lo, len(x) - 1)], np.nan)
+    b = np.where(safe, x[np.minimum(ptr[:-1] + hi, len(x) - 1)], np.nan)
+    a, b = a.astype(x.dtype), b.astype(x.dtype)
+    # gleiche Rundung wie numpys _lerp (Gewichte in float64, Rechnung im Werttyp)
+    diff = b - a
+    out = a + diff * t.astype(x.dtype)
+    return np.where(t >= 0.5, b - diff * (1 - t).astype(x.dtype), out)
+
+
+def segment_gini(x: np.ndarray, codes: np.ndarray, ptr: np.ndarray) -> np.ndarray:
+    """
+    Gini je Segment aus sortierten Werten:
+    (n + 1 - 2 · Σ cumsum(x) / Σ x) / n, mit Σ cumsum(x) = Σ (n - i) · x_i.
+    """
+    n = np.diff(ptr)
+    rank = np.arange(len(x)) - ptr[codes]
+    total = np.bincount(codes, weights=x, minlength=len(n))
+    weighted = np.bincount(codes, weights=x * (n[codes] - rank), minlength=len(n))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gini = (n + 1 - 2 * weighted / total) / n
+    gini = np.where(total == 0, 0.0, gini)
+    return np.where(n == 0, np.nan, gini)
+
+
+def _lorenz_at(x: np.ndarray, ptr: np.ndarray, p: np.ndarray) -> np.ndarray:
+    """
+    Lorenzkurve L(p) je Segment (Zeilen) an den Anteilen p (Spalten), linear
+    zwischen den Stufen interpoliert. Summe 0 -> Gleichverteilung, leer -> NaN.
+    """
+    n = np.diff(ptr)
+    cs = np.concatenate([[0.0], np.cumsum(x, dtype=np.float64)])
+    start = ptr[:-1, None]
+    total = cs[ptr[1:]] - cs[ptr[:-1]]
+    pos = p[None, :] * n[:, None]
+    k = np.minimum(np.floor(pos).astype(np.int64), np.maximum(n - 1, 0)[:, None])
+    head = cs[start + k] - cs[start]
+    step = x[np.minimum(start + k, len(x) - 1)] if len(x) else np.zeros(k.shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        curve = (head + (pos - k) * step) / total[:, None]
+    curve = np.where(total[:, None] == 0, p[None, :], curve)
+    return np.where(n[:, None] == 0, np.nan, curve)
+
+
+def segment_lorenz(
+    x: np.ndarray, ptr: np.ndarray, points: int = LORENZ_POINTS
+) -> np.ndarray:
+    """Lorenzkurven (Segmente × points, float32) an p = 0, 1/(points-1), ..., 1."""
+    return _lorenz_at(x, ptr, np.linspace(0.0, 1.0, points)).astype(np.float32)
+
+
+def segment_top_share(x: np.ndarray, ptr: np.ndarray, share: float) -> np.ndarray:
+    """Anteil der obersten share (z.B. 0.1 = Top 10 %) am Segment-Gesamtwert."""
+    return 1.0 - _lorenz_at(x, ptr, np.array([1.0 - share]))[:, 0]
+
+
+def segment_stats(
+    values,
+    codes,
+    n_segments: int = None,
+    quantiles: dict = None,
+    gini: bool = False,
+    tail_ratios: dict = None,
+) -> dict:
+    """
+    Kennzahlen je Segment (Index = Code) als dict von Arrays.
+    quantiles:   Spaltenname -> q (0..1), z.B. {"p50": 0.5}
+    tail_ratios: Spaltenname -> (Zähler, Nenner) aus den quantiles-Namen
+    """
+    quantiles = quantiles or {}
+    x, codes, ptr = sort_segments(values, codes, n_segments)
+    n = np.diff(ptr)
+    # Summen in float64, Ergebnisse im Eingabetyp (wie groupby bei float32)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(codes, weights=x, minlength=len(n)) / n
+        sq = np.bincount(codes, weights=(x - mean[codes]) ** 2, minlength=len(n))
+        std = np.sqrt(sq / (n - 1))
+    std[n < 2] = np.nan
+    if x.dtype != np.float64:
+        # wie groupby.mean: Summe auf den Werttyp runden, dann teilen
+        total = np.bincount(codes, weights=x, minlength=len(n)).astype(x.dtype)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / n.astype(x.dtype)
+    mean, std = mean.astype(x.dtype), std.astype(x.dtype)
+    out = {"count": n, "mean": mean, "std": std}
+    for name, q in quantiles.items():
+        out[name] = segment_quantile(x, ptr, q)
+    gini = segment_gini(x.astype(np.float64), codes, ptr) if gini else None
+    return derive_stats(out, quantiles, tail_ratios, gini, x.dtype)
+
+
+def derive_stats(
+    out: dict, quantiles: dict, tail_ratios: dict, gini, dtype=np.float64
+) -> dict:
+    """
+    Ergänzt count/mean/std/Quantile um iqr, cov, gini (falls gegeben) und die
+    Tail-Ratios – gemeinsam für den exakten Pfad und die Quantil-Skizze.
+    """
+    by_q = {q: name for name, q in quantiles.items()}
+    if 0.25 in by_q and 0.75 in by_q:
+        out["iqr"] = out[by_q[0.75]] - out[by_q[0.25]]
+    std, mean = out["std"], out["mean"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["cov"] = std / np.where(mean == 0, np.nan, mean).astype(dtype)
+    if gini is not None:
+        out["gini"] = gini
+    for name, (num, den) in (tail_ratios or {}).items():
+        den = np.where(out[den] == 0, np.nan, out[den]).astype(dtype)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[name] = out[num] / den
+    return out
+
+
+def group_stats(
+    df: pd.DataFrame,
+    by: str = "game",
+    col: str = "hours",
+    quantiles: dict = None,
+    gini: bool = False,
+    tail_ratios: dict = None,
+    segment=None,
+    user: str = "user_id",
+) -> pd.DataFrame:
+    """
+    segment_stats für eine DataFrame-Spalte, gruppiert nach by.
+    Eine Zeile pro vorkommender Gruppe, sortiert wie groupby(by, observed=True).
+    segment: nur Zeilen, deren user im Segment liegt (segments.Segment).
+    """
+    codes, uniques = pd.factorize(df[by], sort=True)
+    valid = codes >= 0  # NaN-Gruppen fallen wie bei groupby weg
+    if segment is not None:
+        valid &= segment.contains(df[user].to_numpy())
+    stats = segment_stats(
+        df[col].to_numpy()[valid],
+        codes[valid],
+        len(uniques),
+        quantiles=quantiles,
+        gini=gini,
+        tail_ratios=tail_ratios,
+    )
+    if isinstance(uniques, pd.CategoricalIndex):
+        uniques = pd.Categorical(uniques, categories=df[by].cat.categories)
+    table = pd.DataFrame({by: uniques, **stats})
+    return table[table["count"] > 0].reset_index(drop=True)
+
+
+def group_inequality(
+    df: pd.DataFrame,
+    by: str = "game",
+    col: str = "hours",
+    points: int = LORENZ_POINTS,
+    top_shares=TOP_SHARES,
+    segment=None,
+    user: str = "user_id",
+):
+    """
+    Ungleichheit von col je Gruppe (Spiel, User, Genre, ...).
+    Rückgabe: (Tabelle by, count, total, gini, top_<x>pct_share;
+    Lorenzkurven als Array Zeilen × points, Zeile i gehört zu Tabellenzeile i).
+    segment: nur Zeilen, deren user im Segment liegt (segments.Segment).
+    """
+    codes, uniques = pd.factorize(df[by], sort=True)
+    valid = codes >= 0
+    if segment is not None:
+        valid &= segment.contains(df[user].to_numpy())
+    x, seg, ptr = sort_segments(df[col].to_numpy()[valid], codes[valid], len(uniques))
+    x = x.astype(np.float64)
+    if isinstance(uniques, pd.CategoricalIndex):
+        uniques = pd.Categorical(uniques, categories=df[by].cat.categories)
+    table = pd.DataFrame(
+        {
+            by: uniques,
+            "count": np.diff(ptr),
+            "total": np.bincount(seg, weights=x, minlength=len(ptr) - 1),
+            "gini": segment_gini(x, seg, ptr),
+        }
+    )
+    for share in top_shares:
+        table[f"top_{share * 100:g}pct_share"] = segment_top_share(x, ptr, share)
+    curves = segment_lorenz(x, ptr, points)
+    keep = table["count"].to_numpy() > 0
+    return table[keep].reset_index(drop=True), curves[keep]
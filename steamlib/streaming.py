@@ -0,0 +1,387 @@
+"""
+Out-of-Core-Aggregation für Steam-Event-Logs
+============================================
+Liest das Log in Chunks fester Größe und aktualisiert dabei mergebare
+Akkumulatoren, statt alles in einen DataFrame zu laden:
+- pro Spiel: play-/purchase-Zeilen, Stundensumme, min/max, Bucket-Zählungen
+- pro (user_id, game): play-Zeilen, Stundensumme, max. Stunden, gekauft ja/nein
+  (daraus: eindeutige Spieler/Käufer pro Spiel und die deduplizierte
+  Tabelle, die load_clean() liefert)
+Der Speicher wächst nur mit der Zahl der Spiele und der (user, game)-Paare,
+nicht mit der Zahl der Zeilen. Zwei Aggregate lassen sich mit merge()
+zusammenführen (z.B. aus parallel verarbeiteten Teilen); to_state()/
+from_state() machen den Zustand speicherbar (siehe incremental.py).
+Die Endtabellen entsprechen exakt dem In-Memory-Pfad (load_steam/load_clean +
+groupby). Stundensummen werden wie in facts.py in float64 summiert und erst
+in game_table() auf das float32 von STEAM_SCHEMA gerundet; Referenz ist also
+groupby-sum über die Stunden als float64, danach float32 (ein groupby-sum
+direkt über die float32-Spalte summiert kompensiert in float32 und kann in
+der letzten Stelle abweichen).
+Mit distinct_precision=... werden Spieler/Käufer pro Spiel stattdessen mit
+HyperLogLog-Zählern geschätzt (siehe hll.py); die Paartabelle entfällt
+dann (kein clean_table()), der Speicher hängt nur noch an der Spielzahl.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .cache import BEHAVIORS, CHUNK_ROWS, encode_chunk, read_raw_chunks
+from .hll import DistinctCounter
+from .validation import validate_chunk
+
+PLAY = BEHAVIORS.index("play")
+PURCHASE = BEHAVIORS.index("purchase")
+DEFAULT_THRESHOLDS = (3.0,)
+GAME_ARRAYS = (
+    "play_rows",
+    "purchase_rows",
+    "hours_sum",
+    "hours_min",
+    "hours_max",
+    "buckets",
+)
+PAIR_ARRAYS = ("keys", "play_rows", "hours_sum", "hours_max", "purchased")
+
+
+def pair_keys(user_id: np.ndarray, game: np.ndarray) -> np.ndarray:
+    return (user_id.astype(np.uint64) << np.uint64(32)) | game.astype(np.uint64)
+
+
+def split_pair_keys(keys: np.ndarray):
+    user_id = (keys >> np.uint64(32)).astype(np.uint32)
+    game = (keys & np.uint64(0xFFFFFFFF)).astype(np.int32)
+    return user_id, game
+
+
+def _reduce_pairs(parts) -> dict:
+    """Fasst Teil-Paartabellen zu einer sortierten, eindeutigen Tabelle zusammen."""
+    keys = np.concatenate([p["keys"] for p in parts])
+    uniq, inv = np.unique(keys, return_inverse=True)
+    n = len(uniq)
+    hours_max = np.full(n, np.nan)
+    np.fmax.at(hours_max, inv, np.concatenate([p["hours_max"] for p in parts]))
+    purchased = np.zeros(n, dtype=bool)
+    purchased[inv[np.concatenate([p["purchased"] for p in parts])]] = True
+    return {
+        "keys": uniq,
+        "play_rows": np.bincount(
+            inv, weights=np.concatenate([p["play_rows"] for p in parts]), minlength=n
+        ).astype(np.int64),
+        "hours_sum": np.bincount(
+            inv, weights=np.concatenate([p["hours_sum"] for p in parts]), minlength=n
+        ),
+        "hours_max": hours_max,
+        "purchased": purchased,
+    }
+
+
+class StreamAggregate:
+    """Mergebarer Zustand für chunkweise Aggregation eines Event-Logs."""
+
+    def __init__(self, thresholds=DEFAULT_THRESHOLDS, distinct_precision: int = None):
+        self.thresholds = np.asarray(sorted(thresholds), dtype=np.float64)
+        self.lookup = {}
+        self.distinct_precision = distinct_precision
+        self.players_hll = self.buyers_hll = None
+        if distinct_precision is not None:
+            self.players_hll = DistinctCounter(distinct_precision)
+            self.buyers_hll = DistinctCounter(distinct_precision)
+            self.players_hll.lookup = self.buyers_hll.lookup = self.lookup
+        n_buckets = len(self.thresholds) + 1
+        self.play_rows = np.zeros(0, dtype=np.int64)
+        self.purchase_rows = np.zeros(0, dtype=np.int64)
+        self.hours_sum = np.zeros(0)
+        self.hours_min = np.zeros(0)
+        self.hours_max = np.zeros(0)
+        self.buckets = np.zeros((0, n_buckets), dtype=np.int64)
+        self._pairs = None
+        self._pending = []
+        self._pending_rows = 0
+
+    # --- Zustand -----------------------------------------------------
+
+    @property
+    def games(self) -> np.ndarray:
+        return np.array(list(self.lookup), dtype=object)
+
+    def _grow(self, n: int) -> None:
+        extra = n - len(self.play_rows)
+        if extra <= 0:
+            return
+        self.play_rows = np.concatenate([self.play_rows, np.zeros(extra, np.int64)])
+        self.purchase_rows = np.concatenate(
+            [self.purchase_rows, np.zeros(extra, np.int64)]
+        )
+        self.hours_sum = np.concatenate([self.hours_sum, np.zeros(extra)])
+        self.hours_min = np.concatenate([self.hours_min, np.full(extra, np.inf)])
+        self.hours_max = np.concatenate([self.hours_max, np.full(extra, -np.inf)])
+        self.buckets = np.vstack(
+            [self.buckets, np.zeros((extra, self.buckets.shape[1]), np.int64)]
+        )
+
+    def _add_pairs(self, part: dict) -> None:
+        # Log-strukturiert: Teiltabellen sammeln und erst verdichten, wenn sie
+        # zusammen größer als der bisherige Zustand sind (amortisiert O(n log n)).
+        self._pending.append(part)
+        self._pending_rows += len(part["keys"])
+        base = 0 if self._pairs is None else len(self._pairs["keys"])
+        if self._pending_rows > base:
+            self._compact()
+
+    def _compact(self) -> None:
+        if not self._pending:
+            return
+        parts = self._pending if self._pairs is None else [self._pairs, *self._pending]
+        self._pairs = _reduce_pairs(parts)
+        self._pending = []
+        self._pending_rows = 0
+
+    # --- Aktualisieren -----------------------------------------------
+
+    def update(self, chunk: pd.DataFrame) -> "StreamAggregate":
+        """Nimmt einen Roh-Chunk (siehe cache.read_raw_chunks) auf, ohne ungültige Zeilen."""
+        valid, _, _ = validate_chunk(chunk)
+        cols = encode_chunk(valid, self.lookup)
+        return self.update_arrays(**cols)
+
+    def update_arrays(self, user_id, game, behavior, hours) -> "StreamAggregate":
+        """Nimmt bereits kodierte Spalten auf (game = Codes in self.lookup)."""
+        n = len(self.lookup)
+        self._grow(n)
+        hours = np.asarray(hours)
+        # Schwellen im Werttyp vergleichen (wie ThresholdIndex, hours > 0.1 bei float32)
+        dtype = hours.dtype if hours.dtype.kind == "f" else np.float64
+        cut = self.thresholds.astype(dtype).astype(np.float64)
+        hours = hours.astype(np.float64)
+        valid = game >= 0
+        play = valid & (behavior == PLAY) & ~np.isnan(hours)
+        purchase = valid & (behavior == PURCHASE)
+
+        g, h = game[play], hours[play]
+        self.play_rows += np.bincount(g, minlength=n)
+        self.purchase_rows += np.bincount(game[purchase], minlength=n)
+        self.hours_sum += np.bincount(g, weights=h, minlength=n)
+        np.minimum.at(self.hours_min, g, h)
+        np.maximum.at(self.hours_max, g, h)
+        nb = self.buckets.shape[1]
+        b = np.searchsorted(cut, h, side="left")
+        self.buckets += np.bincount(g * nb + b, minlength=n * nb).reshape(n, nb)
+        if self.distinct_precision is not None:
+            self.players_hll.add_arrays(g, user_id[play])
+            self.buyers_hll.add_arrays(game[purchase], user_id[purchase])
+            return self
+
+        sel = play | purchase
+        keys = pair_keys(user_id[sel], game[sel])
+        uniq, inv = np.unique(keys, return_inverse=True)
+        k = len(uniq)
+        is_play = play[sel]
+        hours_max = np.full(k, np.nan)
+        np.fmax.at(hours_max, inv[is_play], hours[sel][is_play])
+        purchased = np.zeros(k, dtype=bool)
+        purchased[inv[purchase[sel]]] = True
+        self._add_pairs(
+            {
+                "keys": uniq,
+                "play_rows": np.bincount(inv, weights=is_play, minlength=k),
+                "hours_sum": np.bincount(
+                    inv, weights=np.where(is_play, hours[sel], 0.0), minlength=k
+                ),
+                "hours_max": hours_max,
+                "purchased": purchased,
+            }
+        )
+        return self
+
+    def merge(self, other: "StreamAggregate") -> "StreamAggregate":
+        """Führt ein zweites Aggregat (z.B. aus einem anderen Prozess) hinzu."""
+        if not np.array_equal(self.thresholds, other.thresholds):
+            raise ValueError("Aggregate mit unterschiedlichen Schwellen.")
+        if self.distinct_precision != other.distinct_precision:
+            raise ValueError("Aggregate mit unterschiedlicher distinct_precision.")
+        remap = np.array(
+            [self.lookup.setdefault(t, len(self.lookup)) for t in other.lookup],
+            dtype=np.int64,
+        )
+        self._grow(len(self.lookup))
+        np.add.at(self.play_rows, remap, other.play_rows)
+        np.add.at(self.purchase_rows, remap, other.purchase_rows)
+        np.add.at(self.hours_sum, remap, other.hours_sum)
+        np.minimum.at(self.hours_min, remap, other.hours_min)
+        np.maximum.at(self.hours_max, remap, other.hours_max)
+        np.add.at(self.buckets, remap, other.buckets)
+        if self.distinct_precision is not None:
+            self.players_hll.merge(other.players_hll)
+            self.buyers_hll.merge(other.buyers_hll)
+            return self
+        other._compact()
+        if other._pairs is not None:
+            part = dict(other._pairs)
+            user_id, game = split_pair_keys(part["keys"])
+            keys = pair_keys(user_id, remap[game])
+            order = np.argsort(keys, kind="stable")
+            part = {name: arr[order] for name, arr in part.items()}
+            part["keys"] = keys[order]
+            self._add_pairs(part)
+        return self
+
+    # --- Speichern -----------------------------------------------------
+
+    def to_state(self) -> dict:
+        """Zustand als dict von Arrays (für np.savez); Titel siehe .games."""
+        self._grow(len(self.lookup))
+        state = {name: getattr(self, name) for name in GAME_ARRAYS}
+        state["thresholds"] = self.thresholds
+        if self.distinct_precision is not None:
+            for name in ("players_hll", "buyers_hll"):
+                counter = getattr(self, name).to_state()
+                state.update({f"{name}_{key}": arr for key, arr in counter.items()})
+            state["distinct_precision"] = np.array(self.distinct_precision)
+            return state
+        pairs = self.pairs()
+        state.update({"pair_" + name: pairs[name] for name in PAIR_ARRAYS})
+        return state
+
+    @classmethod
+    def from_state(cls, state, games) -> "StreamAggregate":
+        """Gegenstück zu to_state(); games in der Reihenfolge der Codes."""
+        precision = (
+            int(state["distinct_precision"]) if "distinct_precision" in state else None
+        )
+        agg = cls(np.asarray(state["thresholds"]), precision)
+        agg.lookup = {title: i for i, title in enumerate(games)}
+        for name in GAME_ARRAYS:
+            setattr(agg, name, np.array(state[name]))
+        if precision is not None:
+            for name in ("players_hll", "buyers_hll"):
+                prefix = name + "_"
+                counter = DistinctCounter.from_state(
+                    {
+                        key[len(prefix) :]: state[key]
+                        for key in state.keys()
+                        if key.startswith(prefix)
+                    },
+                    games,
+                )
+                counter.lookup = agg.lookup
+                setattr(agg, name, counter)
+            return agg
+        agg._pairs = {name: np.array(state["pair_" + name]) for name in PAIR_ARRAYS}
+        return agg
+
+    # --- Ergebnistabellen --------------------------------------------
+
+    def pairs(self) -> dict:
+        """Verdichtete (user_id, game)-Tabelle als dict von Arrays."""
+        if self.distinct_precision is not None:
+            raise ValueError(
+                "Keine (user, game)-Paare: distinct_precision ist gesetzt."
+            )
+        self._compact()
+        if self._pairs is None:
+            self._pairs = _reduce_pairs(
+                [
+                    {
+                        "keys": np.zeros(0, np.uint64),
+                        "play_rows": np.zeros(0),
+                        "hours_sum": np.zeros(0),
+                        "hours_max": np.zeros(0),
+                        "purchased": np.zeros(0, bool),
+                    }
+                ]
+            )
+        return self._pairs
+
+    def bucket_labels(self) -> list:
+        t = [f"{x:g}" for x in self.thresholds]
+        return [f"<={t[0]}h"] + [
+            f">{lo}h" if i == len(t) - 1 else f">{lo}h,<={t[i + 1]}h"
+            for i, lo in enumerate(t)
+        ]
+
+    def game_table(self) -> pd.DataFrame:
+        """
+        Pro Spiel (Index = Titel, alphabetisch):
+        play_rows, purchase_rows, players, buyers, hours_sum, hours_min,
+        hours_max und eine Spalte pro Stunden-Bucket (Anzahl play-Zeilen).
+        Stundenspalten als float32 wie in STEAM_SCHEMA.
+        """
+        n = len(self.lookup)
+        self._grow(n)
+        if self.distinct_precision is not None:
+            players = np.rint(self.players_hll.estimate()).astype(np.int64)
+            buyers = np.rint(self.buyers_hll.estimate()).astype(np.int64)
+        else:
+            pairs = self.pairs()
+            _, game = split_pair_keys(pairs["keys"])
+            players = np.bincount(game[pairs["play_rows"] > 0], minlength=n)
+            buyers = np.bincount(game[pairs["purchased"]], minlength=n)
+        has_play = self.play_rows > 0
+        table = pd.DataFrame(
+            {
+                "play_rows": self.play_rows,
+                "purchase_rows": self.purchase_rows,
+                "players": players,
+                "buyers": buyers,
+                "hours_sum": self.hours_sum.astype(np.float32),
+                "hours_min": np.where(has_play, self.hours_min, np.nan).astype(
+                    np.float32
+                ),
+                "hours_max": np.where(has_play, self.hours_max, np.nan).astype(
+                    np.float32
+                ),
+            },
+            index=pd.Index(self.games, name="game"),
+        )
+        for i, label in enumerate(self.bucket_labels()):
+            table[label] = self.buckets[:, i]
+        return table.sort_index()
+
+    def clean_table(self, reduce: str = "max", games=None) -> pd.DataFrame:
+        """
+        Entspricht load_clean(reduce=...): user_id, game, hours pro gespieltem Paar.
+        games: optional nur diese Titel (z.B. die seit dem letzten Lauf geänderten).
+        """
+        pairs = self.pairs()
+        played = pairs["play_rows"] > 0
+        if games is not None:
+            codes = [self.lookup[g] for g in games if g in self.lookup]
+            _, game = split_pair_keys(pairs["keys"])
+            played &= np.isin(game, np.asarray(codes, dtype=np.int32))
+        user_id, game = split_pair_keys(pairs["keys"][played])
+        hours = pairs["hours_max" if reduce == "max" else "hours_sum"][played]
+        titles = self.games
+        used = np.unique(game)
+        categories = sorted(titles[used])
+        rank = np.full(len(titles), -1, dtype=np.int32)
+        rank[used] = np.searchsorted(np.array(categories, dtype=object), titles[used])
+        codes = rank[game]
+        order = np.lexsort((codes, user_id))
+        return pd.DataFrame(
+            {
+                "user_id": user_id[order],
+                "game": pd.Categorical.from_codes(codes[order], categories=categories),
+                "hours": hours[order].astype(np.float32),
+            }
+        )
+
+
+def iter_event_chunks(csv_path: str, chunk_rows: int = CHUNK_ROWS):
+    """Roh-Chunks mit höchstens chunk_rows Zeilen."""
+    return read_raw_chunks(csv_path, chunk_rows)
+
+
+def aggregate_stream(
+    csv_path: str,
+    chunk_rows: int = CHUNK_ROWS,
+    thresholds=DEFAULT_THRESHOLDS,
+    distinct_precision: int = None,
+) -> StreamAggregate:
+    """
+    Aggregiert eine beliebig große CSV chunkweise.
+    distinct_precision: HyperLogLog statt exakter Spieler/Käufer (None = exakt)
+    """
+    agg = StreamAggregate(thresholds, distinct_precision)
+    for chunk in iter_event_chunks(csv_path, chunk_rows):
+        agg.update(chunk)
+    return agg
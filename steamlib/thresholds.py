@@ -0,0 +1,88 @@
+"""
+Schwellen-Sweeps: Anteil über X Stunden für beliebig viele X
+============================================================
+Statt pro Schwelle eine String-Spalte (np.where(hours > 3, ">3h", "<=3h"))
+anzulegen und groupby/unstack neu laufen zu lassen, werden die Werte einmal
+nach (Spiel, Wert) sortiert (ThresholdIndex). Jede Zelle der Matrix
+Spiel × Schwelle ist danach ein searchsorted auf einem ganzzahligen
+Schlüssel (Spiel-Code, Rang des Werts):
+
+    above(t)  = Zeilen mit Wert >  t   (inclusive=False, Default)
+    above(t)  = Zeilen mit Wert >= t   (inclusive=True)
+    below     = total - above
+
+Die Kosten wachsen mit Spiele × Schwellen × log(Zeilen), 100 Schwellen
+kosten also kaum mehr als eine. NaN-Werte zählen nicht mit (wie dropna).
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class ThresholdIndex:
+    """Einmal sortierte Werte pro Gruppe für schnelle Schwellen-Abfragen."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        by: str = "game",
+        col: str = "hours",
+        segment=None,
+        user: str = "user_id",
+    ):
+        """segment: nur Zeilen, deren user im Segment liegt (segments.Segment)."""
+        codes, uniques = pd.factorize(df[by], sort=True)
+        values = df[col].to_numpy()
+        # Schwellen im Werttyp vergleichen (wie hours > 3 bei float32)
+        self.dtype = values.dtype if values.dtype.kind == "f" else np.float64
+        values = values.astype(np.float64)
+        valid = (codes >= 0) & ~np.isnan(values)
+        if segment is not None:
+            valid &= segment.contains(df[user].to_numpy())
+        codes, values = codes[valid], values[valid]
+        if isinstance(uniques, pd.CategoricalIndex):
+            uniques = pd.CategoricalIndex(uniques, categories=df[by].cat.categories)
+        self.by = by
+        self.values = np.unique(values)
+        rank = np.searchsorted(self.values, values)
+        self.stride = len(self.values) + 1
+        self.keys = np.sort(codes.astype(np.int64) * self.stride + rank)
+        totals = np.bincount(codes, minlength=len(uniques))
+        present = totals > 0
+        self.groups = pd.Index(uniques[present], name=by)
+        self.codes = np.flatnonzero(present)
+        self.totals = totals[present]
+
+    def counts(self, thresholds, inclusive: bool = False) -> pd.DataFrame:
+        """
+        Tabelle pro Gruppe (Index = by, sortiert): total und eine Spalte pro
+        Schwelle mit der Anzahl Werte darüber (> t bzw. >= t).
+        """
+        thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+        cut = thresholds.astype(self.dtype).astype(np.float64)
+        side = "left" if inclusive else "right"
+        rank = np.searchsorted(self.values, cut, side=side)
+        start = self.codes[:, None] * self.stride
+        first = np.searchsorted(self.keys, (start + rank[None, :]).ravel())
+        end = np.searchsorted(self.keys, start[:, 0] + self.stride)
+        above = end[:, None] - first.reshape(len(self.codes), len(thresholds))
+        table = pd.DataFrame(above, index=self.groups, columns=thresholds.tolist())
+        table.insert(0, "total", self.totals)
+        return table
+
+    def shares(self, thresholds, inclusive: bool = False) -> pd.DataFrame:
+        """Matrix Gruppe × Schwelle mit dem Anteil der Werte über der Schwelle."""
+        counts = self.counts(thresholds, inclusive)
+        return counts.drop(columns="total").div(counts["total"], axis=0)
+
+
+def threshold_shares(
+    df: pd.DataFrame,
+    thresholds,
+    by: str = "game",
+    col: str = "hours",
+    inclusive: bool = False,
+    segment=None,
+) -> pd.DataFrame:
+    """Anteil über jeder Schwelle pro Gruppe (einmal sortieren, dann searchsorted)."""
+    return ThresholdIndex(df, by, col, segment).shares(thresholds, inclusive)
@@ -0,0 +1,177 @@
+"""
+Globales Titel-Wörterbuch (Titel -> dichte int32-IDs)
+=====================================================
+Gemeinsam für Steam- und Metacritic-Tabellen, damit Joins, groupby und isin
+auf Integern statt auf Titel-Strings laufen:
+- game_id: ID des Roh-Titels (genau so, wie er in der Quelldatei steht)
+- norm_id: ID des normalisierten Titels (Join-Schlüssel Steam <-> Metacritic)
+Das Wörterbuch ist append-only: neue Titel bekommen neue IDs hinten dran,
+bestehende IDs ändern sich nie. Dadurch bleiben gecachte Artefakte gültig.
+Gespeichert als JSON; das Token ändert sich nur, wenn die Datei neu angelegt
+wird (Caches, die mit einem anderen Token gebaut wurden, sind ungültig).
+Die Normalform (raw -> norm, siehe normalize.py) wird mitgespeichert; bei
+neuen Normalisierungsregeln werden nur norm/raw_to_norm neu berechnet, die
+game_ids und das Token bleiben gleich.
+"""
+
+import glob
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .normalize import NORMALIZE_VERSION, normalize_title
+
+TITLE_DICT_VERSION = 1
+TITLE_DICT_FILE = "title_ids.json"
+
+
+def default_title_path(data_path: str) -> str:
+    """Wörterbuch liegt neben der Datendatei (bzw. im Partitionsverzeichnis)."""
+    data_path = os.path.abspath(data_path)
+    if os.path.isdir(data_path):
+        return os.path.join(data_path, TITLE_DICT_FILE)
+    base = os.path.dirname(data_path)
+    while glob.has_magic(base):
+        base = os.path.dirname(base)
+    return os.path.join(base, TITLE_DICT_FILE)
+
+
+class TitleDictionary:
+    """Append-only Zuordnung Roh-Titel -> game_id und normalisiert -> norm_id."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.token = uuid.uuid4().hex
+        self.raw = []
+        self.norm = []
+        self.raw_to_norm = []
+        self._raw_lookup = {}
+        self._norm_lookup = {}
+        self._dirty = False
+
+    @classmethod
+    def open(cls, path: str) -> "TitleDictionary":
+        """Lädt das Wörterbuch aus path (oder legt ein leeres an)."""
+        titles = cls(path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != TITLE_DICT_VERSION:
+                raise ValueError(f"Unbekannte Wörterbuch-Version in {path}")
+            titles.token = data["token"]
+            titles.raw = data["raw"]
+            titles.norm = data["norm"]
+            titles.raw_to_norm = data["raw_to_norm"]
+            titles._raw_lookup = {t: i for i, t in enumerate(titles.raw)}
+            titles._norm_lookup = {t: i for i, t in enumerate(titles.norm)}
+            if data.get("rules", 1) != NORMALIZE_VERSION:
+                titles._renormalize()
+        return titles
+
+    def _renormalize(self) -> None:
+        """norm/raw_to_norm mit den aktuellen Regeln neu aufbauen."""
+        raw = self.raw
+        self.raw, self.norm, self.raw_to_norm = [], [], []
+        self._raw_lookup, self._norm_lookup = {}, {}
+        for title in raw:
+            self.add(title)
+        self._dirty = True
+
+    def save(self, path: str = None) -> None:
+        path = path or self.path
+        if path is None:
+            raise ValueError("Kein Pfad für das Titel-Wörterbuch angegeben.")
+        if not self._dirty and path == self.path and os.path.exists(path):
+            return
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": TITLE_DICT_VERSION,
+                    "token": self.token,
+                    "rules": NORMALIZE_VERSION,
+                    "raw": self.raw,
+                    "norm": self.norm,
+                    "raw_to_norm": self.raw_to_norm,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp, path)
+        self.path = path
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def add(self, title: str) -> int:
+        """game_id für einen Roh-Titel (legt ihn bei Bedarf an)."""
+        game_id = self._raw_lookup.get(title)
+        if game_id is not None:
+            return game_id
+        key = normalize_title(title)
+        norm_id = self._norm_lookup.get(key)
+        if norm_id is None:
+            norm_id = len(self.norm)
+            self._norm_lookup[key] = norm_id
+            self.norm.append(key)
+        game_id = len(self.raw)
+        self._raw_lookup[title] = game_id
+        self.raw.append(title)
+        self.raw_to_norm.append(norm_id)
+        self._dirty = True
+        return game_id
+
+    def lookup_ids(self, values, append: bool = True) -> np.ndarray:
+        """game_ids für eindeutige Roh-Titel (unbekannt und append=False -> -1)."""
+        if append:
+            return np.fromiter((self.add(v) for v in values), np.int32, len(values))
+        get = self._raw_lookup.get
+        return np.fromiter((get(v, -1) for v in values), np.int32, len(values))
+
+    def ids(self, values, append: bool = True) -> np.ndarray:
+        """game_ids für eine ganze Spalte; Lookup nur einmal pro eindeutigem Titel."""
+        codes, uniques = _factorize(values)
+        return _take(self.lookup_ids(uniques, append), codes)
+
+    def norm_ids(self, values, append: bool = True) -> np.ndarray:
+        """norm_ids für eine ganze Spalte (Join-Schlüssel Steam <-> Metacritic)."""
+        return self.to_norm(self.ids(values, append))
+
+    def to_norm(self, game_ids) -> np.ndarray:
+        game_ids = np.asarray(game_ids)
+        table = np.asarray(self.raw_to_norm, dtype=np.int32)
+        return np.where(game_ids >= 0, table[np.maximum(game_ids, 0)], -1).astype(
+            np.int32
+        )
+
+    def titles(self, game_ids) -> np.ndarray:
+        """Roh-Titel zu game_ids."""
+        return np.asarray(self.raw, dtype=object)[np.asarray(game_ids)]
+
+    def norm_titles(self, norm_ids) -> np.ndarray:
+        return np.asarray(self.norm, dtype=object)[np.asarray(norm_ids)]
+
+
+def _factorize(values):
+    """(codes, eindeutige Werte) – nutzt vorhandene Kategorien direkt."""
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        cat = pd.Categorical(values)
+        return np.asarray(cat.codes), list(cat.categories)
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    return codes, list(uniques)
+
+
+def _take(ids: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    out = np.full(len(codes), -1, dtype=np.int32)
+    valid = codes >= 0
+    out[valid] = ids[codes[valid]]
+    return out
+
+
+def open_titles(data_path: str) -> TitleDictionary:
+    """Das gemeinsame Titel-Wörterbuch neben data_path."""
+    return TitleDictionary.open(default_title_path(data_path))
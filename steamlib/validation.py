@@ -0,0 +1,190 @@
+"""
+Validierung der Steam-Events beim Einlesen
+==========================================
+Jeder Roh-Chunk wird vektorisiert gegen feste Regeln geprüft, bevor er
+kodiert wird – im selben Durchlauf wie das Parsen, ohne zweiten Lesevorgang.
+user_id, hours und die 5. Spalte werden ohne festen Typ gelesen und erst
+hier in Zahlen umgewandelt (coerce_chunk), damit ein einzelner kaputter
+Wert nicht das ganze Einlesen abbricht:
+
+    user_id_not_integer user_id fehlt oder ist keine ganze Zahl
+    behavior_known      behavior ist "purchase" oder "play"
+    game_present        Titel vorhanden
+    hours_not_numeric   Stundenwert vorhanden, aber keine Zahl (z.B. "abc")
+    hours_finite        Stundenwert vorhanden und endlich
+    hours_non_negative  Stundenwert >= 0
+    purchase_value_one  purchase-Zeilen haben den Wert 1
+    trailing_zero       5. Spalte ist 0
+
+Zeilen mit mindestens einem Verstoß landen nicht im Cache, sondern in
+quarantine.csv (Rohspalten wie gelesen + verletzte Regeln, durch "|"
+getrennt).
+Die Zählung pro Regel steht in validation.json im Cache-Verzeichnis.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import (
+    BEHAVIORS,
+    default_cache_dir,
+    is_partitioned,
+    list_partitions,
+)
+
+RULES = (
+    "user_id_not_integer",
+    "behavior_known",
+    "game_present",
+    "hours_not_numeric",
+    "hours_finite",
+    "hours_non_negative",
+    "purchase_value_one",
+    "trailing_zero",
+)
+VALIDATION_FILE = "validation.json"
+QUARANTINE_FILE = "quarantine.csv"
+
+
+def _integers(col: pd.Series):
+    """(int64-Werte, Maske "ganze Zahl") für eine Rohspalte."""
+    values = pd.to_numeric(col, errors="coerce")  # schon Zahlen: kein Aufwand
+    if values.dtype.kind in "iu":
+        return values.to_numpy(dtype=np.int64), np.ones(len(col), dtype=bool)
+    # Lücken/Text machen die Spalte float bzw. object; gültige user_ids
+    # (uint32) sind in float64 exakt
+    values = values.to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        ok = np.isfinite(values) & (values == np.floor(values))
+        ok &= np.abs(values) < 2.0**53
+    return np.where(ok, values, 0).astype(np.int64), ok
+
+
+def _floats(col: pd.Series):
+    """(float64-Werte, Maske "vorhanden, aber keine Zahl") für eine Rohspalte."""
+    values = pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64)
+    return values, np.isnan(values) & col.notna().to_numpy()
+
+
+def coerce_chunk(chunk: pd.DataFrame):
+    """
+    Wandelt user_id/hours/other eines Roh-Chunks in Zahlen um.
+    Rückgabe: (Chunk mit user_id int64, hours/other float32,
+    Maske user_id ungültig, Maske hours keine Zahl).
+    """
+    user_id, user_ok = _integers(chunk["user_id"])
+    hours, hours_bad = _floats(chunk["hours"])
+    other, _ = _floats(chunk["other"])
+    typed = chunk.assign(
+        user_id=user_id, hours=hours.astype(np.float32), other=other.astype(np.float32)
+    )
+    return typed, ~user_ok, hours_bad
+
+
+def check_chunk(chunk: pd.DataFrame, user_bad=None, hours_bad=None) -> np.ndarray:
+    """
+    Bool-Matrix (Zeilen × RULES): True = Regel verletzt.
+    chunk mit Zahlenspalten (siehe coerce_chunk), user_bad/hours_bad die
+    Masken aus der Umwandlung (None = alles umwandelbar).
+    """
+    n = len(chunk)
+    user_bad = np.zeros(n, dtype=bool) if user_bad is None else user_bad
+    hours_bad = np.zeros(n, dtype=bool) if hours_bad is None else hours_bad
+    behavior = chunk["behavior"]
+    hours = chunk["hours"].to_numpy(dtype=np.float64)
+    other = chunk["other"].to_numpy(dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        violations = [
+            user_bad,
+            ~behavior.isin(BEHAVIORS).to_numpy(),
+            chunk["game"].isna().to_numpy(),
+            hours_bad,
+            ~np.isfinite(hours) & ~hours_bad,
+            hours < 0,
+            (behavior == "purchase").to_numpy() & (hours != 1) & ~hours_bad,
+            other != 0,
+        ]
+    return np.column_stack(violations)
+
+
+def validate_chunk(chunk: pd.DataFrame):
+    """
+    Rückgabe: (gültige Zeilen, Zählung pro Regel, Quarantäne-Zeilen).
+    Die gültigen Zeilen haben Zahlenspalten (user_id int64, hours float32),
+    die Quarantäne-Zeilen die Rohwerte und eine zusätzliche Spalte "rules".
+    """
+    typed, user_bad, hours_bad = coerce_chunk(chunk)
+    violations = check_chunk(typed, user_bad, hours_bad)
+    bad = violations.any(axis=1)
+    counts = dict(zip(RULES, violations.sum(axis=0).tolist()))
+    if not bad.any():
+        return typed, counts, chunk.iloc[:0].assign(rules="")
+    names = np.array(RULES, dtype=object)
+    quarantined = chunk[bad].assign(
+        rules=["|".join(names[row]) for row in violations[bad]]
+    )
+    return typed[~bad], counts, quarantined
+
+
+class ValidationReport:
+    """Sammelt Zählungen über alle Chunks und schreibt die Quarantäne mit."""
+
+    def __init__(self, quarantine_path: str = None):
+        self.quarantine_path = quarantine_path
+        self.rows = 0
+        self.quarantined = 0
+        self.counts = dict.fromkeys(RULES, 0)
+        if quarantine_path is not None and os.path.exists(quarantine_path):
+            os.remove(quarantine_path)
+
+    def add(self, rows: int, counts: dict, quarantined: pd.DataFrame) -> None:
+        self.rows += rows
+        self.quarantined += len(quarantined)
+        for rule, n in counts.items():
+            self.counts[rule] += n
+        if len(quarantined) and self.quarantine_path is not None:
+            quarantined.to_csv(
+                self.quarantine_path,
+                mode="a",
+                header=not os.path.exists(self.quarantine_path),
+                index=False,
+            )
+
+    def filter(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Prüft einen Chunk, verbucht ihn und gibt nur die gültigen Zeilen zurück."""
+        valid, counts, quarantined = validate_chunk(chunk)
+        self.add(len(chunk), counts, quarantined)
+        return valid
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "rows_valid": self.rows - self.quarantined,
+            "rows_quarantined": self.quarantined,
+            "rules": dict(self.counts),
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def validation_report(csv_path: str) -> dict:
+    """
+    Bericht aus dem Cache (nach load_steam/open_events). Bei Partitionen
+    werden die Berichte aller Partitionen aufsummiert.
+    """
+    paths = list_partitions(csv_path) if is_partitioned(csv_path) else [csv_path]
+    total = ValidationReport()
+    for path in paths:
+        report_path = os.path.join(default_cache_dir(path), VALIDATION_FILE)
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+        total.rows += report["rows"]
+        total.quarantined += report["rows_quarantined"]
+        for rule, n in report["rules"].items():
+            total.counts[rule] += n
+    return total.to_dict()
@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import IncrementalAggregate, refresh_table
+
+ROWS = [
+    '1,"Dota 2",purchase,1.0,0\n',
+    '1,"Dota 2",play,10.5,0\n',
+    '1,"Portal",purchase,1.0,0\n',
+    '2,"Portal",purchase,1.0,0\n',
+    '2,"Portal",play,3.0,0\n',
+    '3,"Dota 2",purchase,1.0,0\n',
+    '3,"Dota 2",play,0.5,0\n',
+]
+MORE = [
+    '4,"Portal",purchase,1.0,0\n',
+    '4,"Portal",play,7.25,0\n',
+    '4,"Half-Life",purchase,1.0,0\n',
+]
+
+
+def write(path, lines, mode="w"):
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        f.writelines(lines)
+
+
+def per_game(state, games):
+    table = state.game_table().rename_axis("game").reset_index()
+    return table if games is None else table[table["game"].isin(games)]
+
+
+def run(csv, out):
+    state = IncrementalAggregate.open(str(csv), name="test")
+    changed = state.refresh()
+    table, _ = refresh_table(
+        str(out),
+        lambda games: per_game(state, games),
+        changed,
+        rebuilt=state.rebuilt,
+    )
+    state.save()
+    return state, changed, table
+
+
+def full(csv, tmp_path):
+    state = IncrementalAggregate.open(str(csv), state_dir=str(tmp_path / "full"))
+    state.refresh()
+    return state.game_table()
+
+
+def test_append_matches_full_recompute(tmp_path):
+    csv = tmp_path / "steam.csv"
+    write(csv, ROWS)
+    run(csv, tmp_path / "out.csv")
+    write(csv, MORE, "a")
+    state, changed, table = run(csv, tmp_path / "out.csv")
+
+    assert not state.rebuilt
+    assert sorted(changed) == ["Half-Life", "Portal"]
+    pd.testing.assert_frame_equal(
+        state.game_table().sort_index(), full(csv, tmp_path).sort_index()
+    )
+    assert sorted(table["game"]) == ["Dota 2", "Half-Life", "Portal"]
+
+
+def test_half_written_line_is_deferred(tmp_path):
+    csv = tmp_path / "steam.csv"
+    write(csv, ROWS)
+    run(csv, tmp_path / "out.csv")
+    write(csv, MORE[:1] + [MORE[1][:12]], "a")
+    state, changed, _ = run(csv, tmp_path / "out.csv")
+    assert state.game_table().loc["Portal", "buyers"] == 3
+    assert state.game_table().loc["Portal", "play_rows"] == 1
+
+    write(csv, [MORE[1][12:]] + MORE[2:], "a")
+    state, changed, _ = run(csv, tmp_path / "out.csv")
+    assert not state.rebuilt
+    assert state.game_table().loc["Portal", "play_rows"] == 2
+    pd.testing.assert_frame_equal(
+        state.game_table().sort_index(), full(csv, tmp_path).sort_index()
+    )
+
+
+def test_rewrite_drops_removed_games(tmp_path):
+    csv = tmp_path / "steam.csv"
+    out = tmp_path / "out.csv"
+    write(csv, ROWS)
+    run(csv, out)
+    write(csv, [r for r in ROWS if "Dota 2" not in r] + MORE)
+    state, _, table = run(csv, out)
+
+    assert "Dota 2" not in set(table["game"])
+    assert "Dota 2" not in set(pd.read_csv(out)["game"])
+    assert sorted(table["game"]) == ["Half-Life", "Portal"]
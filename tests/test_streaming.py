@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import aggregate_stream, load_steam
+
+GAMES = ["Dota 2", "Portal", "Half-Life", "Team Fortress 2", "Skyrim"]
+
+
+def write(path, lines, mode="w"):
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        f.writelines(lines)
+
+
+def random_rows(n, seed=0):
+    # viele play-Zeilen pro Spiel, auch mehrere pro (user_id, game)
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        user = rng.integers(1, 200)
+        game = GAMES[rng.integers(len(GAMES))]
+        rows.append(f'{user},"{game}",purchase,1.0,0\n')
+        hours = round(float(rng.lognormal(1.0, 2.0)), 1)
+        rows.append(f'{user},"{game}",play,{hours},0\n')
+    return rows
+
+
+def test_game_table_equals_groupby(tmp_path):
+    csv = tmp_path / "steam.csv"
+    write(csv, random_rows(3000))
+
+    table = aggregate_stream(str(csv), chunk_rows=500).game_table()
+
+    df = load_steam(str(csv), use_cache=False)
+    play = df[df["behavior"] == "play"]
+    by_game = play.groupby("game", observed=True)
+    expected = pd.DataFrame(
+        {
+            "play_rows": by_game.size(),
+            "players": by_game["user_id"].nunique(),
+            # Referenz wie facts.py: in float64 summieren, dann float32
+            "hours_sum": play["hours"]
+            .astype(np.float64)
+            .groupby(play["game"], observed=True)
+            .sum()
+            .astype(np.float32),
+            "hours_min": by_game["hours"].min(),
+            "hours_max": by_game["hours"].max(),
+        }
+    )
+    expected.index = expected.index.astype(str)
+    expected = expected.sort_index().rename_axis("game")
+
+    pd.testing.assert_frame_equal(table[expected.columns], expected, check_exact=True)
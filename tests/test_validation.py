@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from steamlib import aggregate_stream, open_events, read_steam_csv, validation_report
+from steamlib.parallel import parse_range
+
+GOOD = [
+    '1,"Dota 2",purchase,1.0,0\n',
+    '1,"Dota 2",play,10.5,0\n',
+    '2,"Portal",purchase,1.0,0\n',
+    '2,"Portal",play,3.0,0\n',
+]
+
+
+def write(path, lines):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.writelines(lines)
+
+
+def quarantine(csv):
+    return pd.read_csv(str(csv) + ".cache/quarantine.csv")
+
+
+def test_non_numeric_hours_is_quarantined(tmp_path):
+    csv = tmp_path / "steam.csv"
+    write(csv, GOOD + ['3,"Portal",play,abc,0\n'])
+
+    events = open_events(str(csv))
+    assert len(events) == len(GOOD)
+    report = validation_report(str(csv))
+    assert report["rows_quarantined"] == 1
+    assert report["rules"]["hours_not_numeric"] == 1
+    assert report["rules"]["hours_finite"] == 0
+    bad = quarantine(csv)
+    assert bad["hours"].tolist() == ["abc"]
+    assert bad["rules"].tolist() == ["hours_not_numeric"]
+
+    assert len(read_steam_csv(str(csv))) == len(GOOD)
+    assert aggregate_stream(str(csv)).game_table()["play_rows"].sum() == 2
+    cols, _, (rows, counts, _) = parse_range(str(csv), 0, os.path.getsize(csv))
+    assert rows == len(GOOD) + 1 and counts["hours_not_numeric"] == 1
+    assert len(cols["hours"]) == len(GOOD)
+
+
+def test_missing_user_id_is_quarantined(tmp_path):
+    csv = tmp_path / "steam.csv"
+    write(csv, GOOD[:2] + [',"Portal",play,2.0,0\n'] + GOOD[2:])
+
+    events = open_events(str(csv))
+    assert sorted(set(events.user_id.tolist())) == [1, 2]
+    report = validation_report(str(csv))
+    assert report["rules"]["user_id_not_integer"] == 1
+    assert quarantine(csv)["rules"].tolist() == ["user_id_not_integer"]
+
+    assert read_steam_csv(str(csv))["user_id"].tolist() == [1, 1, 2, 2]
+    cols, _, (rows, counts, _) = parse_range(str(csv), 0, os.path.getsize(csv))
+    assert counts["user_id_not_integer"] == 1
+    assert cols["user_id"].tolist() == [1, 1, 2, 2]
+
+    # Text statt Zahl macht die Spalte zu object; gültige IDs bleiben erhalten
+    write(csv, GOOD[:2] + ['x7,"Portal",play,2.0,0\n'] + GOOD[2:])
+    assert read_steam_csv(str(csv))["user_id"].tolist() == [1, 1, 2, 2]
+    assert len(open_events(str(csv))) == len(GOOD)
+    assert validation_report(str(csv))["rules"]["user_id_not_integer"] == 1